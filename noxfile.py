@@ -183,6 +183,48 @@ def tests(session):
     )
 
 
+@nox.session
+def benchmarks(session):
+    """Execute benchmarks using pytest"""
+    pytest_cmd = install_with_tests(session)
+    session.run(
+        *pytest_cmd,
+        "-m",
+        "benchmark",
+        "-s",
+        *session.posargs,
+        env=TEST_ENV_VARS,
+    )
+
+
+@nox.session
+def memory(session):
+    """Execute memory footprint tests using pytest"""
+    pytest_cmd = install_with_tests(session)
+    session.run(
+        *pytest_cmd,
+        "-m",
+        "memory",
+        "-s",
+        *session.posargs,
+        env=TEST_ENV_VARS,
+    )
+
+
+@nox.session
+def scaling(session):
+    """Execute scaling tests on synthetic content using pytest"""
+    pytest_cmd = install_with_tests(session)
+    session.run(
+        *pytest_cmd,
+        "-m",
+        "scaling",
+        "-s",
+        *session.posargs,
+        env=TEST_ENV_VARS,
+    )
+
+
 @no_venv_session(name="tests-cov")
 def tests_cov(session):
     """Execute unit-tests using pytest+pytest-cov"""
@@ -1,3 +1,4 @@
 """Importing myst_reader package."""
 
+from ._async_renderer import AsyncMySTRenderer  # NOQA
 from .myst_reader import *  # NOQA
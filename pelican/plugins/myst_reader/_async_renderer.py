@@ -0,0 +1,122 @@
+"""Asynchronous rendering of MyST strings, for live-preview services.
+
+Docutils and markdown-it renders run in an executor, while Sphinx projects are
+built by a ``sphinx-build`` subprocess or a warm worker awaited by the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Hashable
+from concurrent.futures import Executor
+from typing import Any
+
+from ._cache import hash_key
+from ._sphinx_renderer import sphinx_renderer_async
+from .myst_reader import RENDERER, MySTReader
+
+
+class AsyncMySTRenderer:
+    """Render MyST strings with a :class:`MySTReader` from asyncio code.
+
+    Identical renders in flight are coalesced into one. Each preview ``session``
+    only waits for its latest render: a new render for the same session cancels
+    the previous one. A render nobody waits for anymore is cancelled, which kills
+    its ``sphinx-build`` subprocess, but a render already running in a thread or
+    in a warm Sphinx worker runs to completion, and its result is discarded.
+    """
+
+    def __init__(self, reader: MySTReader, executor: Executor | None = None):
+        self.reader = reader
+        # None is the default executor of the event loop.
+        self.executor = executor
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+        self._sessions: dict[Hashable, asyncio.Task] = {}
+
+    async def render(
+        self,
+        content: str,
+        source_path: str | None = None,
+        session: Hashable | None = None,
+    ) -> tuple[str, dict[str, Any]]:
+        """Render a MyST Markdown string and return HTML5 markup and metadata.
+
+        If a previous render of the same ``session`` is still running, it is
+        cancelled and raises :exc:`asyncio.CancelledError` to its caller. Only the
+        render is cancelled, not the task of the caller.
+        """
+        if session is None:
+            return await self._render_shared(content, source_path)
+
+        previous = self._sessions.get(session)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        # The render of a session runs in its own task, to be cancelled alone.
+        task = self._sessions[session] = asyncio.create_task(
+            self._render_shared(content, source_path)
+        )
+        try:
+            return await task
+        finally:
+            if self._sessions.get(session) is task:
+                del self._sessions[session]
+
+    async def _render_shared(
+        self, content: str, source_path: str | None
+    ) -> tuple[str, dict[str, Any]]:
+        """Wait for the render of ``content``, started by this call or another."""
+        key = hash_key(content, source_path)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.create_task(
+                self._render(content, source_path)
+            )
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # Shielded, so that cancelling a caller does not cancel the others.
+            output, metadata = await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                # Nobody waits for this render anymore.
+                task.cancel()
+        return output, metadata.copy()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def _render(
+        self, content: str, source_path: str | None
+    ) -> tuple[str, dict[str, Any]]:
+        reader = self.reader
+        loop = asyncio.get_running_loop()
+
+        if source_path is not None and "{cite" in content:
+            bib_files = reader._find_bibs(source_path)
+        else:
+            bib_files = []
+
+        if reader._select_renderer(bib_files) is not RENDERER.SPHINX:
+            return await loop.run_in_executor(
+                self.executor, reader.render, content, source_path, bib_files
+            )
+
+        output = await sphinx_renderer_async(
+            content,
+            conf=reader.sphinx_config,
+            bib_files=bib_files,
+            worker_pool=reader.sphinx_worker_pool,
+        )
+        metadata = await loop.run_in_executor(
+            self.executor,
+            reader._extract_metadata,
+            content,
+            RENDERER.SPHINX,
+            {"source_path": source_path},
+        )
+        return reader._postprocess_html(output), metadata
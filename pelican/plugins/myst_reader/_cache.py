@@ -0,0 +1,237 @@
+"""Caches shared by the renderers of MyST documents.
+
+Values are kept in a bounded in-memory LRU and, if a directory is given, pickled on
+disk so that they persist from one build to the next. Cache directories can be
+exported as shards with a manifest of checksums and merged back, to share caches
+between the jobs of a split build.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Name and version of the manifest listing the files of a cache shard.
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Namespaces of the caches which miss in the current thread.
+_bypassed = threading.local()
+
+
+def _json_default(obj: Any) -> Any:
+    """Make sets and other objects JSON serializable in a deterministic way."""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    return repr(obj)
+
+
+def hash_key(*parts: Any) -> str:
+    """Return a stable hexadecimal digest identifying the given parts."""
+    data = json.dumps(parts, sort_keys=True, default=_json_default)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def bypassed_namespaces() -> frozenset[str]:
+    """Return the namespaces of the caches bypassed by the current thread."""
+    return getattr(_bypassed, "namespaces", frozenset())
+
+
+@contextmanager
+def bypass_caches(namespaces: Iterable[str]) -> Iterator[None]:
+    """Make the caches of ``namespaces`` miss in the current thread.
+
+    Values are still stored, so that the work done is that of a cold cache.
+    """
+    previous = bypassed_namespaces()
+    _bypassed.namespaces = previous | frozenset(namespaces)
+    try:
+        yield
+    finally:
+        _bypassed.namespaces = previous
+
+
+@cache
+def package_versions() -> dict[str, str | None]:
+    """Return the versions of the packages which render MyST documents."""
+    versions = {}
+    for name in (
+        "pelican-myst-reader",
+        "myst-parser",
+        "markdown-it-py",
+        "mdit-py-plugins",
+        "docutils",
+        "sphinx",
+        "sphinxcontrib-bibtex",
+        "pygments",
+    ):
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+class Cache:
+    """Key-value cache, in memory and optionally on disk.
+
+    On disk, each value is pickled into ``<directory>/<namespace>/<key[:2]>/<key>``,
+    where ``key`` is usually computed with :func:`hash_key`. A cache can be shared
+    by several threads.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        directory: str | Path | None = None,
+        maxsize: int = 1024,
+    ):
+        self.namespace = namespace
+        self.path = Path(directory) / namespace if directory else None
+        self.maxsize = maxsize
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value cached for ``key``, or ``default`` if there is none."""
+        if self.namespace in bypassed_namespaces():
+            return default
+
+        with self._lock:
+            try:
+                value = self._memory[key]
+            except KeyError:
+                pass
+            else:
+                self._memory.move_to_end(key)
+                return value
+
+        if self.path is None:
+            return default
+
+        try:
+            with open(self._file(key), "rb") as file:
+                value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+        self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Cache ``value`` for ``key``."""
+        self._remember(key, value)
+        if self.path is None:
+            return
+
+        path = self._file(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that a partially written file is never
+        # read by another build sharing the same cache directory.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+
+def _cache_entries(directory: Path) -> dict[str, str | None]:
+    """Return the entries of a cache directory with their manifest checksums.
+
+    Checksums are None for the entries missing from the manifest, for instance
+    those written by a build since the directory was merged.
+    """
+    # Entries are laid out as <namespace>/<key[:2]>/<key>.
+    entries: dict[str, str | None] = {
+        path.relative_to(directory).as_posix(): None
+        for path in directory.glob("*/*/*")
+        if path.is_file() and not path.name.endswith(".tmp")
+    }
+
+    manifest_path = directory / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported cache manifest version in {directory}")
+        entries |= manifest["entries"]
+    return entries
+
+
+def merge_caches(
+    sources: Iterable[str | Path], destination: str | Path
+) -> tuple[int, int]:
+    """Merge cache directories or shards into ``destination`` and write its manifest.
+
+    Entries whose checksum does not match the manifest of their shard are skipped.
+    When several sources have the same entry, the first one wins, so merging the
+    same shards in the same order always gives the same cache. Returns the number
+    of entries copied and skipped.
+    """
+    destination = Path(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+    entries = _cache_entries(destination)
+    copied = skipped = 0
+
+    for source in map(Path, sources):
+        for name, checksum in sorted(_cache_entries(source).items()):
+            if name in entries and (destination / name).exists():
+                continue
+            try:
+                data = (source / name).read_bytes()
+            except OSError:
+                data = None
+            digest = hashlib.sha256(data).hexdigest() if data is not None else None
+            if digest is None or checksum not in (None, digest):
+                logger.warning("Skipping corrupted cache entry %s of %s", name, source)
+                skipped += 1
+                continue
+
+            path = destination / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+            entries[name] = digest
+            copied += 1
+
+    # Entries of the destination itself may not have checksums yet.
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "entries": {
+            name: checksum
+            or hashlib.sha256((destination / name).read_bytes()).hexdigest()
+            for name, checksum in sorted(entries.items())
+            if (destination / name).exists()
+        },
+    }
+    (destination / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1) + "\n")
+    return copied, skipped
+
+
+def export_cache(cache_path: str | Path, shard_path: str | Path) -> int:
+    """Export the entries of a cache directory to a shard with a manifest."""
+    copied, _ = merge_caches([cache_path], shard_path)
+    return copied
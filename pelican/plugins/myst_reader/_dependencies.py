@@ -0,0 +1,244 @@
+"""Track the files a MyST document depends on to know when to render it again."""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from ._cache import bypassed_namespaces
+
+# Opening of a ``{include}`` or ``{literalinclude}`` directive, with backticks or colons.
+INCLUDE_RE = re.compile(
+    r"^[ \t]*(?:`{3,}|:{3,})[ \t]*\{(?:include|literalinclude)\}[ \t]+(?P<path>\S.*?)[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def find_includes(content: str, source_path: str | Path) -> list[str]:
+    """Find the files included by ``content`` with ``{include}`` like directives.
+
+    Paths are resolved like MyST's ``{include}`` directive does outside Sphinx:
+    relative ones from the directory of ``source_path``, and absolute ones from the
+    root of the file system.
+    """
+    if "include}" not in content:
+        return []
+
+    directory = Path(source_path).absolute().parent
+    return [
+        os.path.normpath(directory / match["path"])
+        for match in INCLUDE_RE.finditer(content)
+    ]
+
+
+# State of a file: modification time and size, or None if it is missing.
+FileState = tuple[int, int] | None
+
+
+def stat_files(paths: Iterable[str | Path]) -> dict[str, FileState]:
+    """Return the modification time and size of each file, or None if missing."""
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stats[str(path)] = None
+        else:
+            stats[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+class DependencyCache:
+    """In-memory cache of render results, valid as long as their dependencies are.
+
+    Each result is stored with the fingerprint of the settings used to produce it
+    and the state of the files it depends on: the source file itself, its
+    bibliographies and its included files. Results with cross-references are also
+    stored with the fingerprint of the labels they resolve against. The cache can
+    be shared by several threads.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[str, dict, str | None, Any]] = {}
+        self._renders: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def rendering(self, source_path: str | Path) -> Iterator[None]:
+        """Render ``source_path`` in one thread at a time.
+
+        A thread reading a document which another thread is rendering, like the
+        watcher, waits for it and then finds the result in the cache.
+        """
+        path = str(source_path)
+        while True:
+            with self._lock:
+                event = self._renders.get(path)
+                if event is None:
+                    event = self._renders[path] = threading.Event()
+                    break
+            event.wait()
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._renders[path]
+            event.set()
+
+    def get(
+        self, source_path: str | Path, settings_key: str, labels: str | None = None
+    ) -> Any:
+        """Return the cached result, or None if it is missing or outdated.
+
+        ``labels`` is the current fingerprint of the labels, if any.
+        """
+        with self._lock:
+            try:
+                key, dependencies, result_labels, result = self._entries[
+                    str(source_path)
+                ]
+            except KeyError:
+                return None
+
+        if (
+            key != settings_key
+            or (result_labels is not None and result_labels != labels)
+            or stat_files(dependencies) != dependencies
+        ):
+            return None
+        return result
+
+    def set(
+        self,
+        source_path: str | Path,
+        settings_key: str,
+        dependencies: dict[str, FileState],
+        result: Any,
+        labels: str | None = None,
+    ):
+        """Cache the ``result`` of rendering ``source_path``.
+
+        ``dependencies`` is the state of the files the result depends on, as
+        returned by :func:`stat_files` *before* reading them. ``labels`` is the
+        fingerprint of the labels its cross-references resolve against, if any.
+        """
+        with self._lock:
+            self._entries[str(source_path)] = (
+                settings_key,
+                dependencies,
+                labels,
+                result,
+            )
+
+    def dependencies(self, source_path: str | Path) -> list[str]:
+        """Return the files the last cached render of ``source_path`` depends on."""
+        with self._lock:
+            try:
+                return list(self._entries[str(source_path)][1])
+            except KeyError:
+                return []
+
+    def dependents(self, path: str | Path) -> list[str]:
+        """Return the cached documents which depend on ``path``."""
+        path = os.path.abspath(path)
+        with self._lock:
+            return [
+                source_path
+                for source_path, (_, dependencies, _, _) in self._entries.items()
+                if any(os.path.abspath(other) == path for other in dependencies)
+            ]
+
+    def dependency_paths(self) -> set[str]:
+        """Return the files which the cached documents depend on."""
+        with self._lock:
+            return {
+                path
+                for _, dependencies, _, _ in self._entries.values()
+                for path in dependencies
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class IncludeCache:
+    """Cache of the files included by MyST documents.
+
+    The content of each file and the files it includes in turn are cached by path
+    along with the state of the file, so that a snippet included by many documents
+    is only read and scanned once per change. The cache can be shared by several
+    threads.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[FileState, bytes | None, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, path: str) -> tuple[FileState, bytes | None, list[str]]:
+        # Get the state before reading, not to miss changes made while reading.
+        state = stat_files([path])[path]
+        with self._lock:
+            entry = self._entries.get(path)
+        if (
+            entry is not None
+            and entry[0] == state
+            and "include" not in bypassed_namespaces()
+        ):
+            return entry
+
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            data, includes = None, []
+        else:
+            try:
+                includes = find_includes(data.decode("utf-8-sig"), path)
+            except UnicodeDecodeError:
+                includes = []
+        entry = (state, data, includes)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def get(self, path: str | Path) -> tuple[FileState, list[str]]:
+        """Return the state of a file and the files it includes.
+
+        Missing or unreadable files include nothing.
+        """
+        state, _, includes = self._get(str(path))
+        return state, includes
+
+    def read(
+        self, path: str | Path, encoding: str = "utf-8", errors: str = "strict"
+    ) -> str:
+        """Return the text of a file, like :meth:`pathlib.Path.read_text`."""
+        _, data, _ = self._get(str(path))
+        if data is None:
+            # Raise the error of the missing or unreadable file.
+            return Path(path).read_text(encoding=encoding, errors=errors)
+        # Translate newlines like files opened in text mode.
+        return data.decode(encoding, errors).replace("\r\n", "\n").replace("\r", "\n")
+
+    def dependencies(
+        self, content: str, source_path: str | Path
+    ) -> dict[str, FileState]:
+        """Return the state of the files included by ``content``, recursively."""
+        states: dict[str, FileState] = {}
+        pending = find_includes(content, source_path)
+        while pending:
+            path = pending.pop()
+            if path in states:
+                continue
+            states[path], includes = self.get(path)
+            pending.extend(includes)
+        return states
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
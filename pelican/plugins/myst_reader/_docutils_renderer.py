@@ -5,15 +5,59 @@ See Docutils docs at: https://docutils.sourceforge.io
 
 from __future__ import annotations
 
-from typing import Any
+import logging
+import os
+import pickle
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from docutils.core import publish_parts
+from docutils import io, nodes, writers
+from docutils.core import Publisher, publish_doctree
+from docutils.parsers.rst import DirectiveError, directives
 from docutils.parsers.rst import Parser as RstParser
-from myst_parser.config.main import MdParserConfig
+from docutils.parsers.rst.directives.misc import Include
+from docutils.readers import doctree as doctree_reader
+from docutils.writers.html5_polyglot import HTMLTranslator
+from myst_parser.config.main import (
+    MdParserConfig,
+    TopmatterReadError,
+    merge_file_level,
+    read_topmatter,
+)
+from myst_parser.mdit_to_docutils.base import DocutilsRenderer as MystDocutilsRenderer
+from myst_parser.mdit_to_docutils.base import token_line
+from myst_parser.mocking import MockIncludeDirective, MockingError, MockInliner
+from myst_parser.parsers.directives import MarkupError, parse_directive_text
 from myst_parser.parsers.docutils_ import (
     Parser as MystDocutilsParser,
 )
-from myst_parser.parsers.docutils_ import attr_to_optparse_option
+from myst_parser.parsers.docutils_ import (
+    attr_to_optparse_option,
+    create_myst_config,
+    depart_container_html,
+    depart_rubric_html,
+    visit_container_html,
+    visit_rubric_html,
+)
+from myst_parser.parsers.mdit import create_md_parser
+from myst_parser.warnings_ import MystWarnings, create_warning
+
+from ._cache import Cache, hash_key
+from ._dependencies import FileState
+
+if TYPE_CHECKING:
+    from markdown_it.tree import SyntaxTreeNode
+
+    from ._highlight import Highlighter
+
+logger = logging.getLogger(__name__)
+
+# Roles resolved with a label index.
+CROSS_REFERENCE_ROLES = ("ref", "doc")
 
 
 def create_myst_settings_spec(config: MdParserConfig, prefix: str = "myst_"):
@@ -25,14 +69,399 @@ def create_myst_settings_spec(config: MdParserConfig, prefix: str = "myst_"):
     )
 
 
+class IncludeDirective(MockIncludeDirective):
+    """MyST's ``{include}`` directive, reading files from an include cache.
+
+    The cache is given by the ``include_cache`` Docutils setting. Literal, code and
+    partial includes are left to MyST, which reads the file each time.
+    """
+
+    # Options handled here, like MyST does.
+    cached_options = frozenset(
+        {"encoding", "heading-offset", "relative-images", "relative-docs"}
+    )
+
+    def run(self) -> list[nodes.Element]:
+        include_cache = getattr(self.document.settings, "include_cache", None)
+        include_arg = "".join([s.strip() for s in self.arguments[0].splitlines()])
+        if (
+            include_cache is None
+            or not self.document.settings.file_insertion_enabled
+            or (include_arg.startswith("<") and include_arg.endswith(">"))
+            or not self.cached_options.issuperset(self.options)
+        ):
+            return super().run()
+
+        # Same path and errors as MyST outside Sphinx.
+        source_dir = Path(self.document["source"]).absolute().parent
+        path = source_dir.joinpath(include_arg)
+        self.document.settings.record_dependencies.add(str(path))
+        encoding = self.options.get("encoding", self.document.settings.input_encoding)
+        error_handler = self.document.settings.input_encoding_error_handler
+        try:
+            file_content = include_cache.read(path, encoding, error_handler)
+        except FileNotFoundError as error:
+            raise DirectiveError(
+                4, f'Directive "{self.name}": file not found: {str(path)!r}'
+            ) from error
+        except Exception as error:
+            raise DirectiveError(
+                4, f'Directive "{self.name}": error reading file: {path}\n{error}.'
+            ) from error
+        file_content = "\n".join(file_content.splitlines())
+
+        # Render the included text as if it were in the document, with the path
+        # and lines of the included file in the messages.
+        renderer = self.renderer
+        source = renderer.document["source"]
+        rsource = renderer.reporter.source
+        line_func = getattr(renderer.reporter, "get_source_and_line", None)
+        try:
+            renderer.document["source"] = str(path)
+            renderer.reporter.source = str(path)
+            renderer.reporter.get_source_and_line = lambda li: (str(path), li)
+            if "relative-images" in self.options:
+                renderer.md_env["relative-images"] = os.path.relpath(
+                    path.parent, source_dir
+                )
+            if "relative-docs" in self.options:
+                renderer.md_env["relative-docs"] = (
+                    self.options["relative-docs"],
+                    source_dir,
+                    path.parent,
+                )
+            renderer.nested_render_text(
+                file_content, 1, heading_offset=self.options.get("heading-offset", 0)
+            )
+        finally:
+            renderer.document["source"] = source
+            renderer.reporter.source = rsource
+            renderer.md_env.pop("relative-images", None)
+            renderer.md_env.pop("relative-docs", None)
+            if line_func is not None:
+                renderer.reporter.get_source_and_line = line_func
+            else:
+                del renderer.reporter.get_source_and_line
+        return []
+
+
+class DocutilsRenderer(MystDocutilsRenderer):
+    """MyST renderer to Docutils, with :class:`IncludeDirective` for includes.
+
+    With a ``label_index`` setting, ``{ref}`` and ``{doc}`` roles, which are
+    otherwise Sphinx only, are resolved by :func:`cross_reference_role`. They are
+    not registered in Docutils, so that they are only known to the parses which
+    have an index, whatever the other threads parse.
+    """
+
+    def render_myst_role(self, token: SyntaxTreeNode) -> None:
+        name = token.meta["name"]
+        if (
+            name not in CROSS_REFERENCE_ROLES
+            or getattr(self.document.settings, "label_index", None) is None
+        ):
+            return super().render_myst_role(token)
+
+        rawsource = f":{name}:`{token.content}`"
+        lineno = token_line(token) if token.map else 0
+        _nodes, messages = cross_reference_role(
+            name, rawsource, token.content, lineno, MockInliner(self)
+        )
+        self.current_node += _nodes + messages
+
+    def run_directive(
+        self,
+        name: str,
+        first_line: str,
+        content: str,
+        position: int,
+        additional_options: dict[str, str] | None = None,
+    ) -> list[nodes.Element]:
+        directive_class, _ = directives.directive(
+            name, self.language_module_rst, self.document
+        )
+        if directive_class is None or not issubclass(directive_class, Include):
+            return super().run_directive(
+                name, first_line, content, position, additional_options
+            )
+
+        # Same as MyST, which hardcodes its own include directive.
+        self.document.current_line = position
+        directive_class.option_spec["relative-images"] = directives.flag
+        directive_class.option_spec["relative-docs"] = directives.path
+        directive_class.option_spec["heading-offset"] = directives.nonnegative_int
+        try:
+            parsed = parse_directive_text(
+                directive_class,
+                first_line,
+                content,
+                line=position,
+                additional_options=additional_options,
+            )
+        except MarkupError as error:
+            return [self.reporter.error(f"Directive '{name}': {error}", line=position)]
+        for _warning in parsed.warnings:
+            self.create_warning(
+                f"{name!r}: {_warning.msg}",
+                _warning.type,
+                line=_warning.lineno if _warning.lineno is not None else position,
+                append_to=self.current_node,
+            )
+
+        directive_instance = IncludeDirective(
+            self,
+            name=name,
+            klass=directive_class,
+            arguments=parsed.arguments,
+            options=parsed.options,
+            body=parsed.body,
+            lineno=position,
+        )
+        try:
+            return directive_instance.run()
+        except DirectiveError as error:
+            msg_node = self.reporter.system_message(
+                error.level, error.msg, line=position
+            )
+            msg_node += nodes.literal_block(content, content)
+            return [msg_node]
+        except MockingError as exc:
+            return [
+                self.reporter.error(
+                    f"Directive '{name}' cannot be mocked: "
+                    f"{exc.__class__.__name__}: {exc}",
+                    nodes.literal_block(content, content),
+                    line=position,
+                )
+            ]
+
+
 class Parser(MystDocutilsParser):
-    @classmethod
-    def override_settings_spec(cls, config: MdParserConfig):
-        cls.settings_spec = (
-            "MyST options",
-            None,
-            create_myst_settings_spec(config),
-            *RstParser.settings_spec,
+    """MyST parser for Docutils, with the MyST settings defaulting to ``config``.
+
+    A parser keeps the state of the document being parsed, so a parser instance
+    must not be shared between threads.
+    """
+
+    def __init__(self, config: MdParserConfig | None = None):
+        super().__init__()
+        if config is not None:
+            # Set on the instance, not to change the defaults of other parsers.
+            self.settings_spec = (
+                "MyST options",
+                None,
+                create_myst_settings_spec(config),
+                *RstParser.settings_spec,
+            )
+
+    def parse(self, inputstring: str, document: nodes.document) -> None:
+        """Parse source text, like MyST does, with our :class:`DocutilsRenderer`."""
+        HTMLTranslator.visit_rubric = visit_rubric_html
+        HTMLTranslator.depart_rubric = depart_rubric_html
+        HTMLTranslator.visit_container = visit_container_html
+        HTMLTranslator.depart_container = depart_container_html
+
+        self.setup_parse(inputstring, document)
+
+        # check for exorbitantly long lines
+        if hasattr(document.settings, "line_length_limit"):
+            for i, line in enumerate(inputstring.split("\n")):
+                if len(line) > document.settings.line_length_limit:
+                    error = document.reporter.error(
+                        f"Line {i+1} exceeds the line-length-limit:"
+                        f" {document.settings.line_length_limit}."
+                    )
+                    document.append(error)
+                    return
+
+        # create parsing configuration from the global config
+        try:
+            config = create_myst_config(document.settings)
+        except Exception as exc:
+            error = document.reporter.error(f"Global myst configuration invalid: {exc}")
+            document.append(error)
+            config = MdParserConfig()
+
+        if "attrs_image" in config.enable_extensions:
+            create_warning(
+                document,
+                "The `attrs_image` extension is deprecated, "
+                "please use `attrs_inline` instead.",
+                MystWarnings.DEPRECATED,
+            )
+
+        # update the global config with the file-level config
+        try:
+            topmatter = read_topmatter(inputstring)
+        except TopmatterReadError:
+            pass  # this will be reported during the render
+        else:
+            if topmatter:
+
+                def warning(wtype, msg):
+                    create_warning(document, msg, wtype, line=1, append_to=document)
+
+                config = merge_file_level(config, topmatter, warning)
+
+        # parse content
+        parser = create_md_parser(config, DocutilsRenderer)
+        parser.options["document"] = document
+        parser.render(inputstring)
+
+        # replace raw nodes if raw is not allowed
+        if not getattr(document.settings, "raw_enabled", True):
+            for node in document.traverse(nodes.raw):
+                warning = document.reporter.warning("Raw content disabled.")
+                node.parent.replace(node, warning)
+
+        self.finish_parse()
+
+
+class GlobalPatch:
+    """Patch of the global state of Docutils, applied only while parses need it.
+
+    Docutils looks lexers up in module globals. Concurrent parses share
+    the patch, and the original state is restored after the last one, so that the
+    other documents and users of Docutils are left untouched.
+    """
+
+    def __init__(self, apply: Callable[[], Any], restore: Callable[[Any], None]):
+        self._apply = apply
+        self._restore = restore
+        self._saved = None
+        self._users = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def applied(self) -> Iterator[None]:
+        with self._lock:
+            if not self._users:
+                self._saved = self._apply()
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._users -= 1
+                if not self._users:
+                    self._restore(self._saved)
+                    self._saved = None
+
+
+def cross_reference_role(
+    name, rawtext, text, lineno, inliner, options=None, content=None
+):
+    """Resolve ``{ref}`` and ``{doc}`` roles with a site-wide label index.
+
+    The index and the path of the document being rendered are read from the
+    ``label_index`` and ``label_source_path`` Docutils settings.
+    """
+    settings = inliner.document.settings
+    source_path = getattr(settings, "label_source_path", None)
+    resolved = settings.label_index.resolve(name, text, source_path)
+    if resolved is None:
+        logger.warning(
+            "Could not resolve {%s}`%s` in %s", name, text, source_path or "<string>"
+        )
+        return [nodes.literal(rawtext, text)], []
+
+    href, title = resolved
+    return [nodes.reference(rawtext, title, refuri=href, classes=["internal"])], []
+
+
+@cache
+def _writer_setting_names(writer_name: str = "html5") -> frozenset[str]:
+    """Return the names of the settings which only affect the writer stage."""
+    writer_class = writers.get_writer_class(writer_name)
+    names = set()
+    spec = writer_class.settings_spec
+    # A settings_spec is a flat sequence of (title, description, options) triples.
+    for options in spec[2::3]:
+        for _, option_strings, kwargs in options:
+            names.add(
+                kwargs.get("dest") or option_strings[0].lstrip("-").replace("-", "_")
+            )
+    return frozenset(names)
+
+
+def doctree_key(
+    content: str,
+    conf: dict[str, Any],
+    includes: dict[str, FileState] | None = None,
+) -> str:
+    """Identify the document tree of ``content`` by the settings used to parse it.
+
+    Writer settings are left out, so that changing them does not invalidate the
+    cached document trees. ``includes`` is the state of the included files.
+    """
+    writer_settings = _writer_setting_names()
+    parser_settings = {}
+    for name, value in conf.items():
+        if name in writer_settings or name in ("warning_stream", "include_cache"):
+            continue
+        if name == "label_index":
+            # The index itself is not hashable in a stable way, but its labels are.
+            value = value.fingerprint if value is not None else None
+        parser_settings[name] = value
+    return hash_key(content, parser_settings, includes or {})
+
+
+def parse_doctree(
+    content: str,
+    conf: dict[str, Any],
+    parser: Parser,
+    source_path: str | None = None,
+    highlighter: Highlighter | None = None,
+) -> nodes.document:
+    """Parse ``content`` and apply the transforms of the reader and parser.
+
+    Included files are resolved relative to ``source_path``. Cross-reference roles
+    are only available with a ``label_index`` setting. Code is highlighted with
+    ``highlighter``, if given.
+    """
+    with ExitStack() as stack:
+        if highlighter is not None:
+            stack.enter_context(highlighter.installed())
+        return publish_doctree(
+            source=content,
+            source_path=source_path,
+            source_class=io.StringInput,
+            reader_name="standalone",
+            parser=parser,
+            settings_overrides=conf,
+        )
+
+
+def write_doctree(document: nodes.document, conf: dict[str, Any]) -> str:
+    """Write a parsed document tree with the HTML5 writer and return the body."""
+    # Same as publish_from_doctree, but keeps the publisher to access the parts.
+    publisher = Publisher(
+        reader=doctree_reader.Reader(parser_name="null"),
+        source=io.DocTreeInput(document),
+        destination_class=io.StringOutput,
+    )
+    publisher.set_writer("html5")
+    publisher.process_programmatic_settings(None, conf, None)
+    publisher.set_destination(None, None)
+    publisher.publish(enable_exit_status=False)
+    return publisher.writer.parts["body"]
+
+
+def _pickle_doctree(document: nodes.document) -> bytes:
+    """Pickle a document tree without its settings and processing objects."""
+    reporter, transformer, settings = (
+        document.reporter,
+        document.transformer,
+        document.settings,
+    )
+    document.reporter = document.transformer = document.settings = None
+    try:
+        return pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        document.reporter, document.transformer, document.settings = (
+            reporter,
+            transformer,
+            settings,
         )
 
 
@@ -40,13 +469,33 @@ def docutils_renderer(
     content: str,
     conf: dict[str, Any],
     parser: Parser,
+    env: dict[str, Any] | None = None,
+    doctree_cache: Cache | None = None,
+    source_path: str | None = None,
+    includes: dict[str, FileState] | None = None,
+    highlighter: Highlighter | None = None,
 ):
-    """Use the HTML5 writer: https://docutils.sourceforge.io/docs/user/config.html#html5-writer"""
-    parts = publish_parts(
-        source=content,
-        writer_name="html5",
-        settings_overrides=conf,
-        parser=parser,
-    )
-    output = parts["body"]
+    """Use the HTML5 writer: https://docutils.sourceforge.io/docs/user/config.html#html5-writer
+
+    If an ``env`` dictionary is given, the document tree is stored in its
+    ``doctree`` key. If a ``doctree_cache`` is given, the parsed and transformed
+    document trees are cached there, and only the writer runs on a cache hit.
+    Cached trees are only valid for the state of the ``includes`` of the document.
+    Code blocks are highlighted with the memoized ``highlighter``, if given.
+    """
+    document = None
+    if doctree_cache is not None:
+        key = doctree_key(content, conf, includes)
+        # Document trees are cached pickled, since the writer modifies them.
+        if (data := doctree_cache.get(key)) is not None:
+            document = pickle.loads(data)
+
+    if document is None:
+        document = parse_doctree(content, conf, parser, source_path, highlighter)
+        if doctree_cache is not None:
+            doctree_cache.set(key, _pickle_doctree(document))
+
+    output = write_doctree(document, conf)
+    if env is not None:
+        env["doctree"] = document
     return output.strip()
@@ -0,0 +1,118 @@
+"""Syntax highlighting of code blocks shared by the Docutils and MDIT renderers.
+
+Code is split into tokens classified with Pygments, as done by Docutils, and the
+tokens are cached by code, language and token names. Identical snippets, like
+install commands repeated across posts, are thus only lexed once per build.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from docutils.parsers.rst.directives import body
+from docutils.utils.code_analyzer import Lexer, LexerError
+from markdown_it.common.utils import escapeHtml
+from myst_parser.mdit_to_docutils import base
+
+from ._cache import Cache, hash_key
+from ._docutils_renderer import GlobalPatch
+
+# Classified tokens, as yielded by Docutils' Lexer: [(classes, value), ...]
+HighlightTokens = list[tuple[list[str], str]]
+
+
+class Highlighter:
+    """Memoized syntax highlighter of code blocks.
+
+    ``tokennames`` is the style of the classes of markdown-it code blocks, as the
+    ``syntax_highlight`` setting of Docutils.
+    """
+
+    def __init__(self, cache: Cache | None = None, tokennames: str = "short"):
+        self.cache = Cache("highlight") if cache is None else cache
+        self.tokennames = tokennames
+
+    def tokens(self, lexer: Lexer) -> HighlightTokens:
+        """Return the classified tokens of a Docutils ``lexer``."""
+        if lexer.lexer is None:
+            # Nothing to lex, with the "text" language or "none" token names.
+            return [([], lexer.code)]
+
+        key = hash_key(lexer.code, lexer.language, lexer.tokennames)
+        if (tokens := self.cache.get(key)) is None:
+            tokens = list(Lexer.__iter__(lexer))
+            self.cache.set(key, tokens)
+        return tokens
+
+    @contextmanager
+    def installed(self) -> Iterator[None]:
+        """Memoize the highlighting of the MyST code fences and ``code`` directives.
+
+        Only the Docutils documents parsed in the current thread and context use
+        this highlighter, until the context exits.
+        """
+        token = _docutils_highlighter.set(self)
+        try:
+            with _cached_lexer.applied():
+                yield
+        finally:
+            _docutils_highlighter.reset(token)
+
+    def highlight(self, code: str, language: str, attrs: str = "") -> str:
+        """Highlight a fence for markdown-it, like Docutils renders a code block.
+
+        Returns an empty string if ``language`` is unknown, for markdown-it to
+        render the code without highlighting.
+        """
+        if not language:
+            return ""
+        try:
+            lexer = Lexer(code, language, self.tokennames)
+        except LexerError:
+            return ""
+
+        spans = "".join(
+            (
+                f'<span class="{" ".join(classes)}">{escapeHtml(value)}</span>'
+                if classes
+                else escapeHtml(value)
+            )
+            for classes, value in self.tokens(lexer)
+        )
+        return (
+            f'<pre class="code {escapeHtml(language)} literal-block"><code>'
+            f"{spans}</code></pre>"
+        )
+
+
+# Highlighter of the Docutils document being parsed in the current thread.
+_docutils_highlighter: ContextVar[Highlighter | None] = ContextVar(
+    "docutils_highlighter", default=None
+)
+
+
+class CachedLexer(Lexer):
+    """Docutils lexer reading its tokens from the highlighter of the document."""
+
+    def __iter__(self):
+        highlighter = _docutils_highlighter.get()
+        if highlighter is None:
+            return super().__iter__()
+        return iter(highlighter.tokens(self))
+
+
+def _install_cached_lexer() -> tuple[type[Lexer], type[Lexer]]:
+    saved = base.Lexer, body.Lexer
+    base.Lexer = body.Lexer = CachedLexer
+    return saved
+
+
+def _restore_lexers(saved: tuple[type[Lexer], type[Lexer]]):
+    base.Lexer, body.Lexer = saved
+
+
+# The lexer is replaced in the modules of MyST-Parser and Docutils using it, as
+# Docutils does not let parsers configure it.
+_cached_lexer = GlobalPatch(_install_cached_lexer, _restore_lexers)
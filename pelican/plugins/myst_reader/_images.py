@@ -0,0 +1,154 @@
+"""Intrinsic size of the images referenced by MyST documents."""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import unquote
+
+from ._dependencies import FileState, stat_files
+
+# Prefixes of the links resolved by Pelican, relative to the content directory.
+PELICAN_LINK_PREFIXES = ("{static}", "{attach}", "{filename}")
+
+# JPEG start of frame markers, which hold the size of the image.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG application marker of the Exif metadata.
+_JPEG_APP1_MARKER = 0xE1
+# Exif orientations which rotate the image by a quarter turn, swapping its sides.
+_TRANSPOSED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+
+ImageSize = tuple[int, int] | None
+
+
+def _exif_orientation(tiff: bytes) -> int:
+    """Return the orientation tag of Exif metadata, 1 if it is missing."""
+    byte_order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if byte_order is None:
+        return 1
+    (offset,) = struct.unpack(byte_order + "I", tiff[4:8])
+    (count,) = struct.unpack(byte_order + "H", tiff[offset : offset + 2])
+    for index in range(count):
+        entry = offset + 2 + 12 * index
+        tag, _, _, value = struct.unpack(byte_order + "HHIH", tiff[entry : entry + 10])
+        if tag == 0x0112:
+            return value
+    return 1
+
+
+def _jpeg_size(file: BinaryIO) -> ImageSize:
+    file.seek(2)
+    orientation = 1
+    while marker := file.read(2):
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # Fill byte before a marker.
+            file.seek(-1, os.SEEK_CUR)
+            continue
+        (length,) = struct.unpack(">H", file.read(2))
+        if marker[1] == _JPEG_APP1_MARKER:
+            segment = file.read(length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                orientation = _exif_orientation(segment[6:])
+            continue
+        if marker[1] in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">xHH", file.read(5))
+            if orientation in _TRANSPOSED_ORIENTATIONS:
+                # Browsers display the image rotated as its Exif metadata says.
+                return height, width
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def read_image_size(path: str | Path) -> ImageSize:
+    """Read the width and height of a PNG, GIF, JPEG or WebP image.
+
+    Only the header of the file is read, the image is not decoded. The size of JPEG
+    images is the displayed one, rotated according to their Exif orientation.
+    Return None if the format is not recognized.
+    """
+    try:
+        with open(path, "rb") as file:
+            head = file.read(30)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8 ":
+                    width, height = struct.unpack("<HH", head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b"VP8L":
+                    (bits,) = struct.unpack("<I", head[21:25])
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b"VP8X":
+                    width = int.from_bytes(head[24:27], "little") + 1
+                    height = int.from_bytes(head[27:30], "little") + 1
+                    return width, height
+            if head[:2] == b"\xff\xd8":
+                return _jpeg_size(file)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+class ImageSizes:
+    """Cache of the image sizes of a site, valid as long as the images are unchanged.
+
+    Sizes are keyed by path and checked against the modification time and size of
+    the files, so that images referenced by many documents are only read once.
+    The cache can be shared by several threads.
+    """
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = root
+        self._sizes: dict[str, tuple[FileState, ImageSize]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, src: str, source_path: str | Path | None = None) -> str | None:
+        """Return the path of an image linked with ``{static}`` like prefixes.
+
+        Paths starting with ``/`` are relative to ``root`` and the others to the
+        directory of ``source_path``, like Pelican does. Other links are not files
+        of the site and give None.
+        """
+        src = unquote(src)
+        prefix = next((p for p in PELICAN_LINK_PREFIXES if src.startswith(p)), None)
+        if prefix is None:
+            return None
+
+        path = src.removeprefix(prefix).split("?")[0].split("#")[0]
+        if path.startswith("/"):
+            if self.root is None:
+                return None
+            path = Path(self.root) / path.lstrip("/")
+        elif source_path is not None:
+            path = Path(source_path).parent / path
+        else:
+            return None
+        return os.path.normpath(path)
+
+    def get(self, src: str, source_path: str | Path | None = None) -> ImageSize:
+        """Return the width and height of the image linked by ``src``, if known."""
+        if (path := self.resolve(src, source_path)) is None:
+            return None
+        return self.size(path)
+
+    def size(self, path: str) -> ImageSize:
+        """Return the width and height of the image at ``path``, if known."""
+        state = stat_files([path])[path]
+        with self._lock:
+            cached = self._sizes.get(path)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        size = read_image_size(path) if state is not None else None
+        with self._lock:
+            self._sizes[path] = state, size
+        return size
@@ -0,0 +1,262 @@
+"""Site-wide index of the labels of MyST documents, to resolve cross-references.
+
+The index is built by a cheap first pass over all the sources, which only looks
+for titles, headings and ``(label)=`` targets line by line, without parsing the
+Markdown. Renderers then resolve ``{ref}`` and ``{doc}`` roles against it.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from functools import cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from docutils.nodes import fully_normalize_name, make_id
+from markdown_it import MarkdownIt
+from markdown_it.renderer import RendererHTML
+from myst_parser.config.main import MdParserConfig
+from myst_parser.parsers.mdit import create_md_parser
+
+from ._cache import Cache, hash_key
+from ._dependencies import stat_files
+from ._notebooks import notebook_to_myst, parse_notebook
+from ._toc import inline_text
+
+logger = logging.getLogger(__name__)
+
+TARGET_RE = re.compile(r"^\s*\((?P<label>[^()\s][^()]*)\)=\s*$")
+HEADING_RE = re.compile(r"^ {0,3}#{1,6}[ \t]+(?P<text>.+?)(?:[ \t]+#+)?[ \t]*$")
+FENCE_RE = re.compile(r"^ {0,3}(?P<fence>`{3,}|~{3,}|:{3,})")
+TITLE_RE = re.compile(r"^title:\s*(?P<title>.+?)\s*$", re.IGNORECASE)
+# Explicit title of a role, as in {ref}`title <label>`
+ROLE_TITLE_RE = re.compile(r"^(?P<title>.+?)\s*<(?P<target>[^<>]+)>$", re.DOTALL)
+# Characters of inline markup, without which the text of a heading is plain.
+INLINE_MARKUP_CHARS = frozenset("*_`[]<>{}!~$&\\")
+# Opening of a {ref} or {doc} role.
+CROSS_REFERENCE_RE = re.compile(r"\{(?:ref|doc)\}`")
+
+# Index of a document: (title, [(label, anchor id, title, is explicit target), ...])
+DocumentIndex = tuple[str, list[tuple[str, str, str, bool]]]
+
+
+@cache
+def _inline_parser() -> MarkdownIt:
+    return create_md_parser(MdParserConfig(), RendererHTML)
+
+
+def heading_text(markdown: str) -> str:
+    """Return the plain text of a heading, from which renderers create its id."""
+    if INLINE_MARKUP_CHARS.isdisjoint(markdown):
+        return markdown.strip()
+    return inline_text(_inline_parser().parseInline(markdown)[0])
+
+
+def has_cross_references(content: str) -> bool:
+    """Return whether ``content`` has ``{ref}`` or ``{doc}`` roles to resolve."""
+    return CROSS_REFERENCE_RE.search(content) is not None
+
+
+def scan_document(content: str) -> DocumentIndex:
+    """Find the title, headings and targets of a MyST document."""
+    lines = iter(content.splitlines())
+    title = ""
+
+    # Front-matter
+    first_line = next(lines, "")
+    if first_line.startswith("---"):
+        for line in lines:
+            if line.startswith(("---", "...")):
+                break
+            if match := TITLE_RE.match(line):
+                title = match["title"].strip("'\"")
+    else:
+        lines = iter([first_line, *lines])
+
+    labels = []
+    pending_targets: list[str] = []
+    fence = None
+    for line in lines:
+        if match := FENCE_RE.match(line):
+            if fence is None:
+                fence = match["fence"]
+            elif match["fence"].startswith(fence):
+                fence = None
+            continue
+        if fence is not None:
+            continue
+
+        if match := TARGET_RE.match(line):
+            pending_targets.append(match["label"].strip())
+        elif match := HEADING_RE.match(line):
+            text = heading_text(match["text"])
+            # Headings are labelled by their text, as with sphinx.ext.autosectionlabel.
+            labels.append((text, make_id(text), text, False))
+            # Targets right before a heading are titled by the heading.
+            labels.extend(
+                (label, make_id(label), text, True) for label in pending_targets
+            )
+            pending_targets = []
+        elif line.strip():
+            labels.extend(
+                (label, make_id(label), label, True) for label in pending_targets
+            )
+            pending_targets = []
+
+    labels.extend((label, make_id(label), label, True) for label in pending_targets)
+    return title, labels
+
+
+class LabelIndex:
+    """Index of the documents and labels found under a content directory."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        extensions: Iterable[str],
+        cache: Cache | None = None,
+    ):
+        self.root = Path(root).absolute()
+        self.extensions = tuple(f".{ext}" for ext in extensions)
+        self.cache = Cache("labels") if cache is None else cache
+        self._cache_key = hash_key(str(self.root), self.extensions)
+        # Relative path of each document -> (file state, document index)
+        self._files: dict[str, tuple[Any, DocumentIndex]] = self.cache.get(
+            self._cache_key, {}
+        )
+        self.documents: dict[str, tuple[str, str]] = {}
+        self.labels: dict[str, tuple[str, str, str]] = {}
+        # Changes whenever the resolution of a reference may change.
+        self.fingerprint = hash_key(self.documents, self.labels)
+        self._lock = threading.Lock()
+
+    def update(self):
+        """Scan the documents which changed since the last update."""
+        # Readers and the watcher may update the index from several threads.
+        with self._lock:
+            self._update()
+
+    def _update(self):
+        paths = [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(self.root)
+            for name in names
+            if name.endswith(self.extensions)
+        ]
+        stats = stat_files(paths)
+
+        files = {}
+        changed = False
+        for path, stat in stats.items():
+            relative_path = Path(path).relative_to(self.root).as_posix()
+            try:
+                previous_stat, document_index = self._files[relative_path]
+            except KeyError:
+                previous_stat = document_index = None
+            if previous_stat != stat:
+                try:
+                    document_index = self._scan(path)
+                except (OSError, ValueError, KeyError, TypeError) as err:
+                    # Pelican reports the error when it reads the document.
+                    logger.warning("Could not index the labels of %s: %s", path, err)
+                    continue
+                changed = True
+            files[relative_path] = (stat, document_index)
+
+        if changed or files.keys() != self._files.keys():
+            self._files = files
+            self.cache.set(self._cache_key, files)
+        self._build()
+
+    @staticmethod
+    def _scan(path: str) -> DocumentIndex:
+        with open(path, encoding="utf-8-sig") as file:
+            content = file.read()
+        if path.endswith(".ipynb"):
+            content = notebook_to_myst(parse_notebook(content))
+        return scan_document(content)
+
+    def _build(self):
+        self.documents = {}
+        heading_labels, target_labels = {}, {}
+        for relative_path, (_, (title, labels)) in sorted(self._files.items()):
+            stem = os.path.splitext(relative_path)[0]
+            self.documents[stem] = (relative_path, title or stem)
+            for label, anchor, label_title, explicit in labels:
+                (target_labels if explicit else heading_labels).setdefault(
+                    fully_normalize_name(label), (relative_path, anchor, label_title)
+                )
+        # Explicit targets take precedence over the labels of headings.
+        self.labels = heading_labels | target_labels
+        self.fingerprint = hash_key(self.documents, self.labels)
+
+    def _relative_path(self, source_path: str | Path | None) -> str | None:
+        if source_path is None:
+            return None
+        try:
+            return Path(source_path).absolute().relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def resolve(
+        self, role: str, content: str, source_path: str | Path | None = None
+    ) -> tuple[str, str] | None:
+        """Resolve the content of a ``{ref}`` or ``{doc}`` role.
+
+        Returns the URL and the title of the link, or None if the target is unknown.
+        URLs of other documents use Pelican's ``{filename}`` syntax.
+        """
+        if match := ROLE_TITLE_RE.match(content):
+            title, target = match["title"], match["target"].strip()
+        else:
+            title, target = None, content.strip()
+
+        current_path = self._relative_path(source_path)
+        if role == "ref":
+            try:
+                relative_path, anchor, label_title = self.labels[
+                    fully_normalize_name(target)
+                ]
+            except KeyError:
+                return None
+            if relative_path == current_path:
+                return f"#{anchor}", title or label_title
+            return f"{{filename}}/{relative_path}#{anchor}", title or label_title
+
+        elif role == "doc":
+            if target.startswith("/") or current_path is None:
+                stem = target.lstrip("/")
+            else:
+                stem = os.path.join(os.path.dirname(current_path), target)
+            stem = os.path.splitext(os.path.normpath(stem))[0].replace(os.sep, "/")
+            try:
+                relative_path, doc_title = self.documents[stem]
+            except KeyError:
+                return None
+            return f"{{filename}}/{relative_path}", title or doc_title
+
+        return None
+
+
+# Indexes shared by all readers, since Pelican creates new readers on each build.
+_label_indexes: dict[tuple[str, str], LabelIndex] = {}
+
+
+def get_label_index(
+    root: str | Path,
+    extensions: Iterable[str],
+    cache_path: str | Path | None = None,
+) -> LabelIndex:
+    """Return the up to date label index of the documents under ``root``."""
+    key = (str(Path(root).absolute()), str(cache_path))
+    try:
+        index = _label_indexes[key]
+    except KeyError:
+        index = _label_indexes[key] = LabelIndex(
+            root, extensions, cache=Cache("labels", cache_path)
+        )
+    index.update()
+    return index
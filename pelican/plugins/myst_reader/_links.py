@@ -0,0 +1,67 @@
+"""Collect the outbound links of documents from markdown-it tokens or Docutils trees.
+
+Each link is a dictionary with the ``kind`` of the link, ``"link"`` or
+``"image"``, its ``url`` and its ``text``, which is the alternative text of images.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from docutils import nodes
+from markdown_it.token import Token
+
+from ._toc import inline_text
+
+
+def _link(kind: str, url: str, text: str) -> dict[str, Any]:
+    return {"kind": kind, "url": url, "text": text.strip()}
+
+
+def links_from_tokens(tokens: Sequence[Token]) -> list[dict[str, Any]]:
+    """Collect the links and images of markdown-it tokens, in document order."""
+    links = []
+    for token in tokens:
+        if token.type in ("fence", "colon_fence") and token.info.startswith("{image}"):
+            src = token.info.removeprefix("{image}").strip()
+            alt = next(
+                (
+                    line.removeprefix(":alt:")
+                    for line in token.content.splitlines()
+                    if line.startswith(":alt:")
+                ),
+                "",
+            )
+            links.append(_link("image", src, alt))
+            continue
+
+        children = token.children or ()
+        for index, child in enumerate(children):
+            if child.type == "image":
+                links.append(_link("image", child.attrGet("src") or "", child.content))
+            elif child.type == "link_open":
+                # The text of the link is made of the children until link_close.
+                end = next(
+                    i
+                    for i in range(index, len(children))
+                    if children[i].type == "link_close"
+                )
+                text = inline_text(Token("inline", "", 0, children=children[index:end]))
+                links.append(_link("link", child.attrGet("href") or "", text))
+    return links
+
+
+def links_from_doctree(document: nodes.document) -> list[dict[str, Any]]:
+    """Collect the references and images of a Docutils document tree."""
+    links = []
+    for node in document.findall(
+        lambda node: isinstance(node, (nodes.reference, nodes.image))
+    ):
+        if isinstance(node, nodes.image):
+            links.append(_link("image", node["uri"], node.get("alt", "")))
+        elif "refuri" in node:
+            links.append(_link("link", node["refuri"], node.astext()))
+        elif "refid" in node:
+            links.append(_link("link", f"#{node['refid']}", node.astext()))
+    return links
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import importlib
-from collections.abc import Sequence
+import logging
+import shutil
+import subprocess
+from collections.abc import Callable, Iterable, Sequence
 from typing import TYPE_CHECKING, Any
 
+from docutils.nodes import make_id
 from markdown_it import MarkdownIt
 from markdown_it.common.utils import escapeHtml
 from markdown_it.renderer import RendererHTML
+from markdown_it.rules_core import StateCore
 from markdown_it.token import Token
 from mdit_py_plugins.amsmath import amsmath_plugin
 from mdit_py_plugins.dollarmath import dollarmath_plugin
@@ -16,6 +21,15 @@ if TYPE_CHECKING:
 from myst_parser.config.main import MdParserConfig
 from myst_parser.parsers.mdit import create_md_parser
 
+from ._cache import Cache, hash_key
+from ._toc import set_heading_ids
+
+if TYPE_CHECKING:
+    from ._images import ImageSizes
+    from ._label_index import LabelIndex
+
+logger = logging.getLogger(__name__)
+
 
 def _mdit_init_native(conf: dict[str, Any]) -> MarkdownIt:
     extensions = conf.get("myst_enable_extensions", set("front_matter"))
@@ -27,7 +41,17 @@ def _mdit_init_native(conf: dict[str, Any]) -> MarkdownIt:
     return md
 
 
-def _mdit_init_from_myst_parser(config: MdParserConfig) -> MarkdownIt:
+def _mdit_init_from_myst_parser(
+    config: MdParserConfig,
+    render_math: Callable[..., str] | None = None,
+    heading_ids: bool = False,
+    label_index: LabelIndex | None = None,
+    highlight: Callable[[str, str, str], str] | None = None,
+    image_sizes: ImageSizes | None = None,
+) -> MarkdownIt:
+    if render_math is None:
+        render_math = math_renderer
+
     customized_extensions: list[str] = []
     for ext in "amsmath", "dollarmath":
         if ext in config.enable_extensions:
@@ -43,13 +67,30 @@ def _mdit_init_from_myst_parser(config: MdParserConfig) -> MarkdownIt:
             allow_space=config.dmath_allow_space,
             allow_digits=config.dmath_allow_digits,
             double_inline=config.dmath_double_inline,
-            renderer=math_renderer,
+            renderer=render_math,
         )
     if "amsmath" in customized_extensions:
-        _ = md.use(amsmath_plugin, renderer=math_renderer)
+        _ = md.use(amsmath_plugin, renderer=render_math)
 
+    if "colon_fence" in md.renderer.rules:
+        # Keep the plugin's rule as a fallback for colon fences which are not images.
+        md.add_render_rule(
+            "default_colon_fence", md.renderer.rules["colon_fence"].__func__
+        )
     md.add_render_rule("colon_fence", render_colon_fence_image)
 
+    if heading_ids or label_index is not None:
+        md.core.ruler.push("heading_ids", heading_ids_rule)
+
+    if label_index is not None:
+        add_cross_reference_rules(md, label_index)
+
+    if highlight is not None:
+        md.options["highlight"] = highlight
+
+    if image_sizes is not None:
+        md.options["image_sizes"] = image_sizes
+
     return md
 
 
@@ -59,8 +100,97 @@ mdit_init = _mdit_init_from_myst_parser
 def mdit_renderer(
     content: str,
     parser: MarkdownIt,
+    env: EnvType | None = None,
 ):
-    return parser.render(content).strip()
+    """Render ``content`` to HTML.
+
+    If an ``env`` dictionary is given, it is used as the markdown-it environment
+    and the token stream is stored in its ``tokens`` key.
+    """
+    if env is None:
+        return parser.render(content).strip()
+
+    tokens = env["tokens"] = parser.parse(content, env)
+    return parser.renderer.render(tokens, parser.options, env).strip()
+
+
+def mdit_render_many(
+    contents: Iterable[str],
+    parser: MarkdownIt,
+) -> list[str]:
+    """Render several MyST snippets with the same parser, preserving their order.
+
+    Equivalent to calling :func:`mdit_renderer` on each snippet, but the core rule
+    chain, the renderer and its options are resolved once for the whole batch and
+    the ``env`` sandbox is recycled from one snippet to the next.
+    """
+    core_rules = parser.core.ruler.getRules("")
+    render = parser.renderer.render
+    options = parser.options
+    env: EnvType = {}
+
+    outputs = []
+    for content in contents:
+        env.clear()
+        state = StateCore(content, parser, env)
+        for rule in core_rules:
+            rule(state)
+        outputs.append(render(state.tokens, options, env).strip())
+    return outputs
+
+
+def heading_ids_rule(state: StateCore):
+    """Add anchor ids to the headings, as Docutils does for sections."""
+    set_heading_ids(state.tokens)
+
+
+def add_cross_reference_rules(md: MarkdownIt, label_index: LabelIndex):
+    """Resolve ``{ref}`` and ``{doc}`` roles with a site-wide label index.
+
+    The path of the document being rendered is read from ``env["source_path"]``.
+    """
+    render_default_role = md.renderer.rules["myst_role"]
+
+    def render_myst_role(
+        self: Renderer,
+        tokens: Sequence[Token],
+        idx: int,
+        options: OptionsDict,
+        env: EnvType,
+    ) -> str:
+        token = tokens[idx]
+        name = token.meta["name"]
+        if name not in ("ref", "doc"):
+            return render_default_role(tokens, idx, options, env)
+
+        resolved = label_index.resolve(name, token.content, env.get("source_path"))
+        if resolved is None:
+            logger.warning(
+                "Could not resolve {%s}`%s` in %s",
+                name,
+                token.content,
+                env.get("source_path", "<string>"),
+            )
+            return render_default_role(tokens, idx, options, env)
+
+        href, title = resolved
+        return (
+            f'<a class="reference internal" href="{escapeHtml(href)}">'
+            f"{escapeHtml(title)}</a>"
+        )
+
+    def render_myst_target(
+        self: Renderer,
+        tokens: Sequence[Token],
+        idx: int,
+        options: OptionsDict,
+        env: EnvType,
+    ) -> str:
+        # Anchor for the references to this target, with the same id as Docutils.
+        return f'<span id="{make_id(tokens[idx].content)}"></span>\n'
+
+    md.add_render_rule("myst_role", render_myst_role)
+    md.add_render_rule("myst_target", render_myst_target)
 
 
 class Renderer(RendererHTML):
@@ -77,22 +207,50 @@ class Renderer(RendererHTML):
         ):
             return field.removeprefix(field_name).strip()
 
-    def _render_img(self, token: Token) -> str:
+    def _render_img(self, token: Token, options: OptionsDict, env: EnvType) -> str:
         src = token.info.removeprefix("{image}").strip()
         alt = self._get_field(token, ":alt:")
 
         tmpToken = Token(type="", tag="", nesting=0, attrs=token.attrs.copy())
         tmpToken.attrJoin("src", src)
         tmpToken.attrJoin("alt", alt)
+        self._add_image_attrs(tmpToken, options, env)
 
         return "<img" + self.renderAttrs(tmpToken) + "/>\n"
 
+    @staticmethod
+    def _add_image_attrs(token: Token, options: OptionsDict, env: EnvType):
+        """Add the intrinsic size and lazy-loading attributes of an image, if enabled.
+
+        The paths of the images whose size is read are added to ``env["image_paths"]``,
+        since the output must be rendered again when they change.
+        """
+        if (image_sizes := options.get("image_sizes")) is None:
+            return
+
+        if token.attrGet("width") is None and token.attrGet("height") is None:
+            path = image_sizes.resolve(token.attrGet("src"), env.get("source_path"))
+            if path is not None:
+                env.setdefault("image_paths", []).append(path)
+                if (size := image_sizes.size(path)) is not None:
+                    token.attrSet("width", str(size[0]))
+                    token.attrSet("height", str(size[1]))
+        for name, value in (("loading", "lazy"), ("decoding", "async")):
+            if token.attrGet(name) is None:
+                token.attrSet(name, value)
+
+    def image(
+        self, tokens: Sequence[Token], idx: int, options: OptionsDict, env: EnvType
+    ) -> str:
+        self._add_image_attrs(tokens[idx], options, env)
+        return super().image(tokens, idx, options, env)
+
     def fence(
         self, tokens: Sequence[Token], idx: int, options: OptionsDict, env: EnvType
     ) -> str:
         token = tokens[idx]
         if token.info.startswith("{image}"):
-            return self._render_img(token)
+            return self._render_img(token, options, env)
         else:
             return super().fence(tokens, idx, options, env)
 
@@ -106,9 +264,9 @@ def render_colon_fence_image(
 ) -> str:
     token = tokens[idx]
     if token.info.startswith("{image}"):
-        return self._render_img(token)
+        return self._render_img(token, options, env)
     else:
-        return super().colon_fence(tokens, idx, options, env)
+        return self.rules["default_colon_fence"](tokens, idx, options, env)
 
 
 def math_renderer(
@@ -123,3 +281,79 @@ def math_renderer(
     # display_mode is False => inline
     display_mode = True if options is None else options.get("display_mode", True)
     return f"\\[ {content} \\]" if display_mode else f"\\( {content} \\)"
+
+
+def _load_latex2mathml() -> Callable[[str, bool], str]:
+    from latex2mathml.converter import convert
+
+    def latex2mathml(content: str, display_mode: bool) -> str:
+        return convert(content, display="block" if display_mode else "inline")
+
+    return latex2mathml
+
+
+def _load_katex() -> Callable[[str, bool], str]:
+    executable = shutil.which("katex")
+    if executable is None:
+        raise FileNotFoundError("Could not find the katex command line interface.")
+
+    def katex(content: str, display_mode: bool) -> str:
+        args = [executable, "--display-mode"] if display_mode else [executable]
+        completed_process = subprocess.run(
+            args, input=content, capture_output=True, text=True, check=True
+        )
+        return completed_process.stdout.strip()
+
+    return katex
+
+
+# Engines which can pre-render math at build time, without any network access.
+MATH_ENGINES = {
+    # Pure Python LaTeX to MathML converter: ``pip install pelican-myst-reader[mathml]``
+    "mathml": _load_latex2mathml,
+    # Locally installed KaTeX command line interface: ``npm install -g katex``
+    "katex": _load_katex,
+}
+
+
+def create_math_renderer(
+    engine: str | None = None,
+    cache: Cache | None = None,
+) -> Callable[..., str]:
+    """Return a math renderer pre-rendering equations with ``engine`` at build time.
+
+    Without an engine, equations are left to MathJax in the browser. Pre-rendered
+    equations are cached by engine, source and display mode.
+    """
+    if not engine:
+        return math_renderer
+
+    try:
+        load_engine = MATH_ENGINES[engine]
+    except KeyError:
+        raise ValueError(
+            f"Unknown math pre-rendering engine {engine!r}. "
+            f"Choose one of {sorted(MATH_ENGINES)}."
+        ) from None
+    convert = load_engine()
+    cache = Cache("math") if cache is None else cache
+
+    def prerender_math(
+        content: str,
+        options: dict[str, bool] | None = None,
+    ) -> str:
+        display_mode = True if options is None else options.get("display_mode", True)
+        key = hash_key(engine, content, display_mode)
+        if (output := cache.get(key)) is not None:
+            return output
+        try:
+            output = convert(content, display_mode)
+        except Exception as err:
+            # Fall back to MathJax rather than failing the whole build. The fallback
+            # is not cached, to retry once the engine or the formula is fixed.
+            logger.warning("Could not pre-render math %r: %s", content, err)
+            return math_renderer(content, options)
+        cache.set(key, output)
+        return output
+
+    return prerender_math
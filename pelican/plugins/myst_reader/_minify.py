@@ -0,0 +1,106 @@
+"""Minification of the HTML fragments produced by the renderers."""
+
+from __future__ import annotations
+
+import re
+
+# Elements whose content is kept verbatim, since their whitespace is significant.
+PRESERVED_TAGS = frozenset({"pre", "code", "textarea", "script", "style"})
+# Preserved elements whose content is text up to their end tag, in which "<" does
+# not start a tag.
+RAW_TEXT_TAGS = frozenset({"textarea", "script", "style"})
+
+# Elements next to which whitespace is not rendered, because they start or end a
+# line box.
+BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "body", "br", "caption", "col",
+        "colgroup", "dd", "details", "div", "dl", "dt", "fieldset", "figcaption",
+        "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+        "hr", "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table",
+        "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+    }
+)  # fmt: skip
+
+# A comment, a tag whose attribute values may contain ">", or text.
+_TOKENS = re.compile(
+    r"(?P<comment><!--.*?-->)"
+    r"|(?P<tag></?(?P<name>[A-Za-z][\w:-]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)"
+    r"|(?P<text>[^<]+|<)",
+    re.DOTALL,
+)
+# ASCII whitespace only, as in HTML: a no-break space is significant.
+HTML_WHITESPACE = " \t\n\f\r"
+_WHITESPACE = re.compile(f"[{HTML_WHITESPACE}]+")
+# End tag of each raw text element.
+_RAW_TEXT_ENDS = {
+    name: re.compile(f"</{name}[{HTML_WHITESPACE}/>]", re.IGNORECASE)
+    for name in RAW_TEXT_TAGS
+}
+
+
+def minify_html(html: str) -> str:
+    """Collapse the insignificant whitespace of an HTML fragment.
+
+    The fragment is scanned once, without building a document tree. Runs of
+    whitespace become a single space and are removed next to block elements. The
+    content of ``pre``, ``code``, ``textarea``, ``script`` and ``style`` elements
+    and comments are kept as they are.
+    """
+    parts: list[str] = []
+    # Number of open elements whose content is preserved.
+    preserved = 0
+    # Whether the previous token allows to drop whitespace after it.
+    after_block = True
+    # Whitespace waiting for the next token to know if it can be dropped.
+    pending_space = False
+
+    position = 0
+    while position < len(html):
+        match = _TOKENS.match(html, position)
+        position = match.end()
+        token = match.group()
+        if preserved:
+            parts.append(token)
+            if name := match["name"]:
+                name = name.lower()
+                if name in PRESERVED_TAGS:
+                    preserved += -1 if token.startswith("</") else 1
+                    if not preserved:
+                        after_block = name in BLOCK_TAGS
+            continue
+
+        if match["text"] is not None:
+            text = _WHITESPACE.sub(" ", token)
+            if text == " ":
+                pending_space = pending_space or not after_block
+                continue
+            if text.startswith(" ") and not after_block:
+                pending_space = True
+            text = text.strip(" ")
+            if pending_space:
+                parts.append(" ")
+            parts.append(text)
+            pending_space = token[-1] in HTML_WHITESPACE
+            after_block = False
+            continue
+
+        name = (match["name"] or "").lower()
+        is_block = name in BLOCK_TAGS
+        if pending_space and not is_block:
+            parts.append(" ")
+        pending_space = False
+        parts.append(token)
+        if match["comment"] is None:
+            after_block = is_block
+            if name in RAW_TEXT_TAGS and not token.startswith("</"):
+                # Keep the text up to the end tag, which is then a token.
+                end = _RAW_TEXT_ENDS[name].search(html, position)
+                end_position = len(html) if end is None else end.start()
+                parts.append(html[position:end_position])
+                position = end_position
+            elif name in PRESERVED_TAGS and not token.startswith("</"):
+                if not token.endswith("/>"):
+                    preserved = 1
+
+    return "".join(parts)
@@ -0,0 +1,288 @@
+"""Convert Jupyter notebooks and MyST text notebooks to MyST Markdown.
+
+Notebooks are rendered by the same pipeline as Markdown posts: markdown cells are
+kept as they are, code cells become code blocks and their outputs become HTML or
+Markdown. Stored outputs are used as is, unless execution is requested, in which
+case outputs are cached by the source of the code cells and the kernel.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Iterator
+
+import yaml
+
+from ._cache import Cache, hash_key
+
+# Execution modes: never execute, execute notebooks without outputs, or always.
+EXECUTION_MODES = ("off", "auto", "force")
+
+# Fenced blocks, matched whole so that the fences they contain are skipped. Code
+# cells of text notebooks are the blocks of ``{code-cell}`` directives, as in MyST-NB.
+FENCED_BLOCK_RE = re.compile(
+    r"^(?P<fence>`{3,}|~{3,}|:{3,})[ \t]*(?P<info>[^\n]*)\n"
+    r"(?P<source>.*?)^(?P=fence)[ \t]*$",
+    re.DOTALL | re.MULTILINE,
+)
+FRONT_MATTER_RE = re.compile(
+    r"\A---[ \t]*\n(?P<yaml>.*?)^(?:---|\.\.\.)[ \t]*$", re.DOTALL | re.MULTILINE
+)
+CELL_BREAK_RE = re.compile(r"^\+\+\+.*$", re.MULTILINE)
+TAGS_RE = re.compile(r"^:tags:[ \t]*\[(?P<tags>[^\]]*)\][ \t]*\n", re.MULTILINE)
+ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+def _front_matter(content: str) -> dict[str, Any]:
+    """Return the front-matter of MyST content, empty if missing or invalid."""
+    if (match := FRONT_MATTER_RE.match(content)) is None:
+        return {}
+    try:
+        front_matter = yaml.safe_load(match["yaml"])
+    except yaml.YAMLError:
+        return {}
+    return front_matter if isinstance(front_matter, dict) else {}
+
+
+def is_text_notebook(content: str) -> bool:
+    """Return whether MyST content is a text notebook.
+
+    Like MyST-NB, text notebooks are told by their front-matter, which has a
+    ``kernelspec`` or the ``myst`` format of jupytext.
+    """
+    if (match := FRONT_MATTER_RE.match(content)) is None:
+        return False
+    if "kernelspec" not in match["yaml"] and "jupytext" not in match["yaml"]:
+        # Most posts are not notebooks, and their front-matter is parsed later on.
+        return False
+
+    front_matter = _front_matter(content)
+    if "kernelspec" in front_matter:
+        return True
+    jupytext = front_matter.get("jupytext")
+    if not isinstance(jupytext, dict):
+        return False
+    text_representation = jupytext.get("text_representation") or {}
+    return text_representation.get("format_name") == "myst"
+
+
+def _code_cells(content: str) -> Iterator[re.Match]:
+    """Find the ``{code-cell}`` blocks of MyST content, outside of other blocks."""
+    for match in FENCED_BLOCK_RE.finditer(content):
+        if match["info"].startswith("{code-cell}"):
+            yield match
+
+
+def _join(source: str | list[str]) -> str:
+    return source if isinstance(source, str) else "".join(source)
+
+
+def _cell(cell_type: str, source: str, **fields: Any) -> dict[str, Any]:
+    return {"cell_type": cell_type, "metadata": {}, "source": source, **fields}
+
+
+def parse_notebook(text: str) -> dict[str, Any]:
+    """Parse a Jupyter notebook in the nbformat 4 JSON format."""
+    notebook = json.loads(text)
+    if notebook.get("nbformat", 4) < 4:
+        raise ValueError(f"Unsupported notebook format {notebook['nbformat']}")
+    return notebook
+
+
+def parse_text_notebook(content: str) -> dict[str, Any]:
+    """Parse a MyST text notebook into a notebook without outputs.
+
+    The kernel is read from the ``kernelspec`` of the front-matter, if any.
+    """
+    cells = []
+    position = 0
+    for match in _code_cells(content):
+        cells.append(_cell("markdown", content[position : match.start()]))
+        source = match["source"]
+        metadata = {}
+        if tags := TAGS_RE.match(source):
+            metadata["tags"] = [tag.strip(" '\"") for tag in tags["tags"].split(",")]
+            source = source[tags.end() :]
+        cells.append(
+            _cell("code", source.rstrip("\n"), outputs=[], execution_count=None)
+        )
+        cells[-1]["metadata"] = metadata
+        position = match.end()
+    cells.append(_cell("markdown", content[position:]))
+
+    for cell in cells:
+        if cell["cell_type"] == "markdown":
+            cell["source"] = CELL_BREAK_RE.sub("", cell["source"]).strip("\n")
+
+    kernelspec = _front_matter(content).get("kernelspec")
+    if not isinstance(kernelspec, dict):
+        kernelspec = {}
+    return {
+        "cells": [
+            cell for cell in cells if cell["source"] or cell["cell_type"] == "code"
+        ],
+        "metadata": {"kernelspec": kernelspec} if kernelspec else {},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+
+def _html_block(html: str) -> str:
+    # A blank line would end the HTML block in Markdown.
+    lines = (line for line in html.splitlines() if line.strip())
+    return '<div class="cell_output">\n' + "\n".join(lines) + "\n</div>"
+
+
+def _fence(text: str, language: str = "text") -> str:
+    fence = "```"
+    while fence in text:
+        fence += "`"
+    return f"{fence}{language}\n{text.rstrip()}\n{fence}"
+
+
+def output_to_myst(output: dict[str, Any]) -> str:
+    """Convert an output of a code cell to MyST Markdown."""
+    output_type = output.get("output_type")
+    if output_type == "stream":
+        return _fence(ANSI_ESCAPE_RE.sub("", _join(output.get("text", ""))))
+    if output_type == "error":
+        traceback = "\n".join(output.get("traceback", []))
+        return _fence(ANSI_ESCAPE_RE.sub("", traceback))
+
+    data = output.get("data", {})
+    if "text/html" in data:
+        return _html_block(_join(data["text/html"]))
+    if "image/svg+xml" in data:
+        return _html_block(_join(data["image/svg+xml"]))
+    for mime_type in ("image/png", "image/jpeg", "image/gif"):
+        if mime_type in data:
+            encoded = _join(data[mime_type]).replace("\n", "")
+            # Check that the output is valid base64, not to inject HTML.
+            base64.b64decode(encoded, validate=True)
+            return _html_block(
+                f'<img src="data:{mime_type};base64,{encoded}" alt="" />'
+            )
+    if "text/markdown" in data:
+        return _join(data["text/markdown"])
+    if "text/plain" in data:
+        return _fence(_join(data["text/plain"]))
+    return ""
+
+
+def notebook_language(notebook: dict[str, Any]) -> str:
+    metadata = notebook.get("metadata", {})
+    return (
+        metadata.get("language_info", {}).get("name")
+        or metadata.get("kernelspec", {}).get("language")
+        or "python"
+    )
+
+
+def notebook_to_myst(notebook: dict[str, Any]) -> str:
+    """Convert a notebook to MyST Markdown.
+
+    The front-matter is the first markdown or raw cell, if it starts with ``---``.
+    Cells tagged with ``remove-cell``, ``remove-input`` or ``remove-output`` are
+    rendered without them, like with MyST-NB.
+    """
+    language = notebook_language(notebook)
+    blocks = []
+    for cell in notebook.get("cells", []):
+        source = _join(cell.get("source", ""))
+        tags = set(cell.get("metadata", {}).get("tags", ()))
+        if "remove-cell" in tags:
+            continue
+
+        if cell["cell_type"] == "markdown":
+            blocks.append(source)
+        elif cell["cell_type"] == "raw":
+            # Other raw cells are meant for other output formats.
+            if not blocks and source.startswith("---"):
+                blocks.append(source)
+        elif cell["cell_type"] == "code":
+            if source.strip() and "remove-input" not in tags:
+                blocks.append(_fence(source, language))
+            if "remove-output" not in tags:
+                blocks.extend(
+                    block
+                    for output in cell.get("outputs", [])
+                    if (block := output_to_myst(output))
+                )
+    return "\n\n".join(block.strip("\n") for block in blocks) + "\n"
+
+
+def _has_outputs(notebook: dict[str, Any]) -> bool:
+    return any(
+        cell.get("outputs") for cell in notebook["cells"] if cell["cell_type"] == "code"
+    )
+
+
+def _kernel_name(notebook: dict[str, Any]) -> str:
+    return notebook.get("metadata", {}).get("kernelspec", {}).get("name", "python3")
+
+
+class NotebookExecutor:
+    """Execute notebooks with a Jupyter kernel, caching their outputs.
+
+    Outputs are cached by the source of the code cells and the name of the kernel,
+    so unchanged notebooks are never executed again. Execution requires ``nbclient``
+    and a kernel: ``pip install pelican-myst-reader[notebooks]``.
+    """
+
+    def __init__(self, mode: str = "off", cache: Cache | None = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown notebook execution mode {mode!r}. "
+                f"Choose one of {list(EXECUTION_MODES)}."
+            )
+        self.mode = mode
+        self.cache = Cache("notebook") if cache is None else cache
+
+    def update_outputs(
+        self, notebook: dict[str, Any], source_path: str | Path
+    ) -> dict[str, Any]:
+        """Return the notebook with the outputs of its execution, if needed."""
+        if self.mode == "off" or (self.mode == "auto" and _has_outputs(notebook)):
+            return notebook
+
+        code_cells = [cell for cell in notebook["cells"] if cell["cell_type"] == "code"]
+        key = hash_key(
+            [_join(cell["source"]) for cell in code_cells], _kernel_name(notebook)
+        )
+        outputs = self.cache.get(key)
+        if outputs is None:
+            outputs = self._execute(notebook, Path(source_path).parent)
+            self.cache.set(key, outputs)
+
+        notebook = deepcopy(notebook)
+        for cell, cell_outputs in zip(
+            (cell for cell in notebook["cells"] if cell["cell_type"] == "code"), outputs
+        ):
+            cell["outputs"] = deepcopy(cell_outputs)
+        return notebook
+
+    @staticmethod
+    def _execute(notebook: dict[str, Any], directory: Path) -> list[list[dict]]:
+        """Execute a notebook and return the outputs of each code cell."""
+        import nbformat
+        from nbclient import NotebookClient
+
+        node = nbformat.from_dict(deepcopy(notebook))
+        node.metadata.setdefault(
+            "kernelspec", {"name": _kernel_name(notebook), "display_name": ""}
+        )
+        NotebookClient(
+            node,
+            kernel_name=_kernel_name(notebook),
+            resources={"metadata": {"path": str(directory)}},
+            allow_errors=True,
+        ).execute()
+        return [
+            json.loads(json.dumps(cell.get("outputs", [])))
+            for cell in node.cells
+            if cell.cell_type == "code"
+        ]
@@ -0,0 +1,126 @@
+"""Skip the markdown-it rules which a document cannot use.
+
+Most documents are plain prose, but every parse runs all the rules of the enabled
+MyST extensions. A cheap pre-scan finds the rules whose trigger characters are
+absent from a document, which cannot match it. Skipping them gives the same tokens.
+"""
+
+from __future__ import annotations
+
+import threading
+from copy import copy
+
+from markdown_it import MarkdownIt
+from markdown_it.ruler import Ruler
+
+# Rules of markdown-it and its plugins, with the strings which a document must
+# contain for them to match. Each rule checks one of them first. Rules which are
+# not listed are always run.
+RULE_TRIGGERS: dict[str, tuple[str, ...]] = {
+    # Block rules
+    "table": ("|",),
+    "code": ("    ", "\t"),
+    "fence": ("```", "~~~"),
+    "colon_fence": (":::",),
+    "math_block": ("$$",),
+    "amsmath": ("\\begin{",),
+    "substitution_block": ("{{",),
+    "myst_line_comment": ("%",),
+    "blockquote": (">",),
+    "myst_block_break": ("+",),
+    "myst_target": (")=",),
+    "hr": ("*", "-", "_"),
+    "list": ("*", "-", "+", ".", ")"),
+    "footnote_def": ("[^",),
+    "reference": ("]:",),
+    "html_block": ("<",),
+    "heading": ("#",),
+    "lheading": ("=", "-"),
+    "deflist": (":", "~"),
+    "fieldlist": (":",),
+    # Inline rules
+    "escape": ("\\",),
+    "math_inline": ("$",),
+    "substitution_inline": ("{{",),
+    "myst_role": ("{",),
+    "backticks": ("`",),
+    "strikethrough": ("~~",),
+    "emphasis": ("*", "_"),
+    "link": ("[",),
+    "image": ("![",),
+    "footnote_ref": ("[^",),
+    "autolink": ("<",),
+    "html_inline": ("<",),
+    "entity": ("&",),
+}
+
+
+def unused_rules(content: str, rule_names: set[str]) -> frozenset[str]:
+    """Return the rules among ``rule_names`` which cannot match ``content``."""
+    rule_names = rule_names & RULE_TRIGGERS.keys()
+    # Characters are found much faster than strings, so look for the first one first.
+    found = {
+        trigger
+        for name in rule_names
+        for trigger in RULE_TRIGGERS[name]
+        if trigger[0] in content and trigger in content
+    }
+    return frozenset(
+        name for name in rule_names if found.isdisjoint(RULE_TRIGGERS[name])
+    )
+
+
+def _copy_ruler(ruler: Ruler) -> Ruler:
+    """Copy a ruler, so that its rules are enabled or disabled independently."""
+    new_ruler = copy(ruler)
+    new_ruler.__rules__ = [copy(rule) for rule in ruler.__rules__]
+    new_ruler.__cache__ = None
+    return new_ruler
+
+
+class PrunedParsers:
+    """Variants of a markdown-it parser without the rules a document cannot use.
+
+    Variants share the options and renderer of the parser, and are cached by the
+    set of disabled rules, which is the same for most documents.
+    """
+
+    def __init__(self, parser: MarkdownIt):
+        self.parser = parser
+        self.rule_names = {
+            rule.name
+            for ruler in self._rulers(parser)
+            for rule in ruler.__rules__
+            if rule.enabled
+        }
+        self._variants: dict[frozenset[str], MarkdownIt] = {frozenset(): parser}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rulers(parser: MarkdownIt) -> tuple[Ruler, ...]:
+        return (
+            parser.core.ruler,
+            parser.block.ruler,
+            parser.inline.ruler,
+            parser.inline.ruler2,
+        )
+
+    def get(self, content: str) -> MarkdownIt:
+        """Return a parser equivalent to the full one for ``content``."""
+        disabled = unused_rules(content, self.rule_names)
+        try:
+            return self._variants[disabled]
+        except KeyError:
+            pass
+
+        variant = copy(self.parser)
+        variant.core = copy(self.parser.core)
+        variant.block = copy(self.parser.block)
+        variant.inline = copy(self.parser.inline)
+        variant.core.ruler = _copy_ruler(self.parser.core.ruler)
+        variant.block.ruler = _copy_ruler(self.parser.block.ruler)
+        variant.inline.ruler = _copy_ruler(self.parser.inline.ruler)
+        variant.inline.ruler2 = _copy_ruler(self.parser.inline.ruler2)
+        variant.disable(list(disabled), ignoreInvalid=True)
+        with self._lock:
+            return self._variants.setdefault(disabled, variant)
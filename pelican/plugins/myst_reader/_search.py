@@ -0,0 +1,150 @@
+"""Extract the plain text of documents for site search, and write a search index.
+
+The text of a document is split in sections, each one being a dictionary with the
+``level``, ``title`` and anchor ``id`` of a heading and the ``text`` up to the next
+heading. Text before the first heading is in a section of level 0 without title.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from docutils import nodes
+from markdown_it.token import Token
+
+from ._toc import inline_text, set_heading_ids
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Docutils nodes without text to search.
+_SKIPPED_NODES = (
+    nodes.comment,
+    nodes.raw,
+    nodes.system_message,
+    nodes.substitution_definition,
+    nodes.target,
+    nodes.docinfo,
+)
+
+
+def _section(level: int, title: str, heading_id: str) -> dict[str, Any]:
+    return {"level": level, "title": title, "id": heading_id, "text": []}
+
+
+def _join(sections: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Join the blocks of text of each section, and drop an empty introduction."""
+    for section in sections:
+        section["text"] = "\n".join(
+            block
+            for text in section["text"]
+            if (block := _WHITESPACE.sub(" ", text).strip())
+        )
+    if sections and not sections[0]["level"] and not sections[0]["text"]:
+        del sections[0]
+    return sections
+
+
+def sections_from_tokens(tokens: Sequence[Token]) -> list[dict[str, Any]]:
+    """Split the text of markdown-it tokens in sections."""
+    set_heading_ids(tokens)
+    sections = [_section(0, "", "")]
+    in_heading = False
+    for token in tokens:
+        if token.type == "heading_open":
+            sections.append(_section(int(token.tag[1:]), "", token.attrGet("id")))
+            in_heading = True
+        elif token.type == "heading_close":
+            in_heading = False
+        elif token.type == "inline":
+            if in_heading:
+                sections[-1]["title"] = inline_text(token)
+            else:
+                sections[-1]["text"].append(inline_text(token))
+        elif token.type in ("fence", "code_block") and not token.info.startswith("{"):
+            # Directives are skipped, since their content is not plain text.
+            sections[-1]["text"].append(token.content)
+    return _join(sections)
+
+
+def sections_from_doctree(
+    document: nodes.document, initial_header_level: int = 1
+) -> list[dict[str, Any]]:
+    """Split the text of a Docutils document tree in sections."""
+    sections = [_section(0, "", "")]
+
+    def visit(node: nodes.Element, level: int):
+        for child in node.children:
+            if isinstance(child, nodes.section):
+                if child.children and isinstance(child[0], nodes.title):
+                    heading_id = child["ids"][0] if child["ids"] else ""
+                    sections.append(_section(level, child[0].astext(), heading_id))
+                visit(child, level + 1)
+            elif isinstance(child, (nodes.title, *_SKIPPED_NODES)):
+                continue
+            elif isinstance(child, nodes.TextElement):
+                sections[-1]["text"].append(child.astext())
+            elif isinstance(child, nodes.Element):
+                # Lists, tables and admonitions hold blocks of text.
+                visit(child, level)
+
+    # Section titles are mapped to HTML headings starting at initial_header_level.
+    visit(document, initial_header_level)
+    return _join(sections)
+
+
+def sections_to_text(sections: Iterable[dict[str, Any]]) -> str:
+    """Return the plain text of a document from its sections."""
+    return "\n".join(
+        part
+        for section in sections
+        for part in (section["title"], section["text"])
+        if part
+    )
+
+
+def write_search_index(generators: Iterable[Any]):
+    """Write the sections of the articles and pages to the ``MYST_SEARCH_INDEX`` file.
+
+    Connected to the ``all_generators_finalized`` signal of Pelican.
+    """
+    generators = list(generators)
+    if not generators:
+        return
+    settings = generators[0].settings
+    if not (index_path := settings.get("MYST_SEARCH_INDEX")):
+        return
+
+    documents = []
+    for generator in generators:
+        for content in [
+            *getattr(generator, "articles", []),
+            *getattr(generator, "pages", []),
+        ]:
+            if "sections" not in content.metadata:
+                continue
+            documents.append(
+                {
+                    "url": content.url,
+                    "title": str(getattr(content, "title", "")),
+                    "sections": [
+                        {key: section[key] for key in ("id", "title", "text")}
+                        for section in content.metadata["sections"]
+                    ],
+                }
+            )
+    documents.sort(key=lambda document: document["url"])
+
+    path = os.path.join(generators[0].output_path, index_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {"documents": documents}, file, ensure_ascii=False, separators=(",", ":")
+        )
+    logger.info("Wrote search index of %d documents to %s", len(documents), path)
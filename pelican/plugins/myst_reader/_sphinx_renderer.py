@@ -2,18 +2,40 @@
 
 from __future__ import annotations
 
+import asyncio
+import importlib
+import logging
+import multiprocessing
 import subprocess
 import tempfile
+import threading
+import weakref
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
 from pathlib import Path
 from shutil import copyfile
+from types import MappingProxyType
 from typing import Any, Iterable
 
 from bs4 import BeautifulSoup
 
+from ._cache import hash_key
+
+# Pools of warm Sphinx worker processes, shared by all readers and indexed by size
+# and extensions to import.
+_worker_pools: dict[tuple[int, frozenset[str]], ProcessPoolExecutor] = {}
+_worker_pools_lock = threading.Lock()
+# Key of each shared pool, to replace it once it is broken.
+_worker_pool_keys: weakref.WeakKeyDictionary[Executor, tuple[int, frozenset[str]]] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def get_div_body(html_output: str) -> str:
     soup = BeautifulSoup(html_output, "html.parser")
-    div = soup.findAll("div", {"class": "body"})[0]
+    div = soup.find_all("div", {"class": "body"})[0]
     parts = []
     for elem in div.contents:
         try:
@@ -24,48 +46,307 @@ def get_div_body(html_output: str) -> str:
     return "\n".join(parts).strip()
 
 
-def sphinx_renderer(
+def write_sphinx_project(
+    tempdir: Path,
     content: str,
     conf: dict[str, Any],
-    bib_files: Iterable[str | Path] | None = None,
-    tempdir_suffix: str | None = None,
+    bib_files: Iterable[Path] | None = None,
+):
+    """Write a minimal Sphinx project with a single ``index.md`` in ``tempdir``."""
+    # Saves the MyST content to a temporary index.md file.
+    with open(tempdir / "index.md", "w") as file:
+        file.write(content)
+
+    # Generates a Sphinx conf.py file from the configuration dictionary.
+    with open(tempdir / "conf.py", "w") as file:
+        for key, value in conf.items():
+            if isinstance(value, set):
+                value = sorted(value)
+            file.write(f"{key} = {repr(value)}\n")
+
+    if bib_files:
+        for path, name in bib_file_names(bib_files).items():
+            copyfile(path, tempdir / name)
+
+
+def bib_file_names(bib_files: Iterable[str | Path]) -> dict[Path, str]:
+    """Name the bibliographies of a document in its Sphinx project.
+
+    Bibliographies found in subdirectories usually have the same name as the
+    document, so the following ones with the same name get a numbered suffix.
+    """
+    names: dict[Path, str] = {}
+    for path in sorted(map(Path, bib_files)):
+        name, number = path.name, 1
+        while name in names.values():
+            number += 1
+            name = f"{path.stem}-{number}{path.suffix}"
+        names[path] = name
+    return names
+
+
+def build_sphinx_project(tempdir: Path):
+    """Build the Sphinx project in ``tempdir`` with a ``sphinx-build`` subprocess."""
+    completed_process = subprocess.run(
+        "sphinx-build . -b html _build".split(),
+        cwd=tempdir,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    completed_process.check_returncode()
+
+
+def build_sphinx_project_in_process(tempdir: Path):
+    """Build the Sphinx project in ``tempdir`` within the current process.
+
+    This mirrors what ``sphinx-build`` does, including the isolation of the
+    roles and directives registered in Docutils. It is meant to be called in a
+    worker process only, never in the process running Pelican.
+    """
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    with patch_docutils(tempdir), docutils_namespace():
+        app = Sphinx(
+            srcdir=tempdir,
+            confdir=tempdir,
+            outdir=tempdir / "_build",
+            doctreedir=tempdir / "_build" / ".doctrees",
+            buildername="html",
+            status=None,
+            warning=StringIO(),
+            freshenv=True,
+        )
+        app.build()
+
+
+def _render_in_worker(
+    content: str,
+    conf: dict[str, Any],
+    bib_files: set[Path] | None,
+    tempdir_suffix: str | None,
 ) -> str:
-    """Builds a Sphinx project from a MyST ``content`` string and returns the HTML body."""
-    # Do not modify the original configuration dictionary in place.
-    local_conf = conf.copy()
-    # Dynamiccaly add the bibtex files to the Sphinx configuration.
+    with tempfile.TemporaryDirectory(suffix=tempdir_suffix) as tempdir:
+        tempdir = Path(tempdir)
+        write_sphinx_project(tempdir, content, conf, bib_files)
+        build_sphinx_project_in_process(tempdir)
+        with open(tempdir / "_build/index.html") as file:
+            content = file.read()
+
+    return get_div_body(content)
+
+
+def _init_worker(extensions: Iterable[str]):
+    """Import Sphinx and its extensions once for all the renders of a worker."""
+    # The logger class of Pelican keeps every message to deduplicate them. Sphinx
+    # logs debug messages unique to each build, which would grow a warm worker.
+    logging.setLoggerClass(logging.Logger)
+    importlib.import_module("sphinx.application")
+    for extension in extensions:
+        try:
+            importlib.import_module(extension)
+        except ImportError:
+            # Let Sphinx report the error when building.
+            pass
+
+
+def get_worker_pool(max_workers: int, extensions: Iterable[str]) -> Executor:
+    """Return a shared pool of ``max_workers`` warm Sphinx worker processes."""
+    key = (max_workers, frozenset(extensions))
+    with _worker_pools_lock:
+        try:
+            return _worker_pools[key]
+        except KeyError:
+            # Spawn fresh interpreters, which do not inherit the Docutils global
+            # state of the process running Pelican.
+            pool = _worker_pools[key] = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(sorted(extensions),),
+            )
+            _worker_pool_keys[pool] = key
+            return pool
+
+
+def _replace_worker_pool(pool: Executor) -> Executor | None:
+    """Drop a broken shared pool and return a new one of the same size.
+
+    Returns ``None`` if ``pool`` is not one of the shared pools.
+    """
+    key = _worker_pool_keys.get(pool)
+    if key is None:
+        return None
+    with _worker_pools_lock:
+        # Another thread may already have replaced it.
+        if _worker_pools.get(key) is pool:
+            del _worker_pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+    return get_worker_pool(*key)
+
+
+class _FrozenList(tuple):
+    """A list frozen into a tuple, to be thawed back into a list."""
+
+
+def freeze(value: Any) -> Any:
+    """Return an immutable copy of a configuration value."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return _FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a mutable copy of a value frozen by :func:`freeze`."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, _FrozenList):
+        return [thaw(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(thaw(item) for item in value)
+    if isinstance(value, frozenset):
+        return {thaw(item) for item in value}
+    return value
+
+
+class SphinxConfig:
+    """Immutable Sphinx configuration shared by all the documents of a build.
+
+    The configuration of each document is a copy of this base configuration,
+    overlaid with the settings specific to the document, like its bibliography.
+    """
+
+    def __init__(self, settings: Mapping[str, Any]):
+        self.base: Mapping[str, Any] = freeze(settings)
+        # Identifies the configuration across processes and builds.
+        self.fingerprint = hash_key(thaw(self.base))
+
+    @property
+    def extensions(self) -> frozenset[str]:
+        return frozenset(self.base.get("extensions", ()))
+
+    def for_document(
+        self, bib_files: Iterable[str | Path] | None = None
+    ) -> dict[str, Any]:
+        """Return the configuration of the Sphinx project of a document."""
+        conf = thaw(self.base)
+        # Dynamiccaly add the bibtex files to the Sphinx configuration.
+        if bib_files:
+            conf["bibtex_bibfiles"] = [
+                *conf.get("bibtex_bibfiles", ()),
+                *sorted(bib_file_names(bib_files).values()),
+            ]
+            # Only activate the bibtex extension if bib_files are provided.
+            conf["extensions"] = {*conf.get("extensions", ()), "sphinxcontrib.bibtex"}
+        return conf
+
+
+def _document_project(
+    conf: SphinxConfig | Mapping[str, Any],
+    bib_files: Iterable[str | Path] | None = None,
+) -> tuple[dict[str, Any], set[Path] | None]:
+    """Return the configuration and bibliography of the project of a document."""
+    if not isinstance(conf, SphinxConfig):
+        conf = SphinxConfig(conf)
     if bib_files:
         bib_files = {Path(path) for path in bib_files}
-        local_conf["bibtex_bibfiles"].extend(path.name for path in bib_files)
-        # Only activate the bibtex extension if bib_files are provided.
-        local_conf["extensions"].add("sphinxcontrib.bibtex")
+    return conf.for_document(bib_files), bib_files or None
+
+
+def sphinx_renderer(
+    content: str,
+    conf: SphinxConfig | Mapping[str, Any],
+    bib_files: Iterable[str | Path] | None = None,
+    tempdir_suffix: str | None = None,
+    worker_pool: Executor | None = None,
+) -> str:
+    """Builds a Sphinx project from a MyST ``content`` string and returns the HTML body.
+
+    If a ``worker_pool`` is given, the project is built by one of its warm workers
+    instead of a new ``sphinx-build`` subprocess.
+    """
+    local_conf, bib_files = _document_project(conf, bib_files)
+
+    if worker_pool is not None:
+        args = (content, local_conf, bib_files, tempdir_suffix)
+        try:
+            return worker_pool.submit(_render_in_worker, *args).result()
+        except BrokenProcessPool:
+            # A worker died, e.g. killed when running out of memory: retry once
+            # in a new pool.
+            if (worker_pool := _replace_worker_pool(worker_pool)) is None:
+                raise
+            return worker_pool.submit(_render_in_worker, *args).result()
 
     with tempfile.TemporaryDirectory(suffix=tempdir_suffix) as tempdir:
         tempdir = Path(tempdir)
+        write_sphinx_project(tempdir, content, local_conf, bib_files)
+        build_sphinx_project(tempdir)
+
+        with open(tempdir / "_build/index.html") as file:
+            content = file.read()
 
-        # Saves the MyST content to a temporary index.md file.
-        with open(tempdir / "index.md", "w") as file:
-            file.write(content)
+    return get_div_body(content)
 
-        # Generates a Sphinx conf.py file from the configuration dictionary.
-        with open(tempdir / "conf.py", "w") as file:
-            for key, value in local_conf.items():
-                if isinstance(value, set):
-                    value = sorted(value)
-                file.write(f"{key} = {repr(value)}\n")
 
-        if bib_files:
-            for path in bib_files:
-                copyfile(path, tempdir / path.name)
-
-        completed_process = subprocess.run(
-            "sphinx-build . -b html _build".split(),
-            cwd=tempdir,
-            capture_output=True,
-            text=True,
-            check=False,
+async def build_sphinx_project_async(tempdir: Path):
+    """Build the Sphinx project in ``tempdir`` without blocking the event loop.
+
+    The ``sphinx-build`` subprocess is killed if the build is cancelled.
+    """
+    args = "sphinx-build . -b html _build".split()
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=tempdir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    if process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, args, stdout.decode(), stderr.decode()
         )
-        completed_process.check_returncode()
+
+
+async def sphinx_renderer_async(
+    content: str,
+    conf: SphinxConfig | Mapping[str, Any],
+    bib_files: Iterable[str | Path] | None = None,
+    tempdir_suffix: str | None = None,
+    worker_pool: Executor | None = None,
+) -> str:
+    """Asynchronous version of :func:`sphinx_renderer`."""
+    local_conf, bib_files = _document_project(conf, bib_files)
+
+    if worker_pool is not None:
+        args = (content, local_conf, bib_files, tempdir_suffix)
+        try:
+            return await asyncio.wrap_future(
+                worker_pool.submit(_render_in_worker, *args)
+            )
+        except BrokenProcessPool:
+            if (worker_pool := _replace_worker_pool(worker_pool)) is None:
+                raise
+            return await asyncio.wrap_future(
+                worker_pool.submit(_render_in_worker, *args)
+            )
+
+    with tempfile.TemporaryDirectory(suffix=tempdir_suffix) as tempdir:
+        tempdir = Path(tempdir)
+        write_sphinx_project(tempdir, content, local_conf, bib_files)
+        await build_sphinx_project_async(tempdir)
 
         with open(tempdir / "_build/index.html") as file:
             content = file.read()
@@ -0,0 +1,96 @@
+"""Build tables of contents from markdown-it tokens or Docutils document trees.
+
+A table of contents is a nested list of entries, each one being a dictionary with
+the ``level``, ``text`` and anchor ``id`` of a heading, and its ``children``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from html import escape
+from typing import Any
+
+from docutils import nodes
+from markdown_it.token import Token
+
+
+def inline_text(token: Token) -> str:
+    """Return the plain text of an ``inline`` token."""
+    parts = []
+    for child in token.children or ():
+        if child.type in ("softbreak", "hardbreak"):
+            parts.append(" ")
+        elif child.type not in ("html_inline",):
+            parts.append(child.content)
+    return "".join(parts).strip()
+
+
+def set_heading_ids(tokens: Sequence[Token]):
+    """Add a unique anchor id to the headings which do not have one yet.
+
+    Ids are generated like Docutils does for section titles.
+    """
+    used_ids = {token.attrGet("id") for token in tokens if token.type == "heading_open"}
+    for index, token in enumerate(tokens):
+        if token.type != "heading_open" or token.attrGet("id"):
+            continue
+        base_id = nodes.make_id(inline_text(tokens[index + 1])) or "section"
+        heading_id, suffix = base_id, 0
+        while heading_id in used_ids:
+            suffix += 1
+            heading_id = f"{base_id}-{suffix}"
+        used_ids.add(heading_id)
+        token.attrSet("id", heading_id)
+
+
+def _nest(headings: Iterable[tuple[int, str, str]]) -> list[dict[str, Any]]:
+    """Nest a flat sequence of ``(level, text, id)`` headings by level."""
+    toc: list[dict[str, Any]] = []
+    stack: list[dict[str, Any]] = []
+    for level, text, heading_id in headings:
+        entry = {"level": level, "text": text, "id": heading_id, "children": []}
+        while stack and stack[-1]["level"] >= level:
+            stack.pop()
+        (stack[-1]["children"] if stack else toc).append(entry)
+        stack.append(entry)
+    return toc
+
+
+def toc_from_tokens(tokens: Sequence[Token]) -> list[dict[str, Any]]:
+    """Build a table of contents from the ``heading_open`` and ``inline`` tokens."""
+    set_heading_ids(tokens)
+    return _nest(
+        (int(token.tag[1:]), inline_text(tokens[index + 1]), token.attrGet("id"))
+        for index, token in enumerate(tokens)
+        if token.type == "heading_open"
+    )
+
+
+def toc_from_doctree(
+    document: nodes.document, initial_header_level: int = 1
+) -> list[dict[str, Any]]:
+    """Build a table of contents from the sections of a Docutils document tree."""
+
+    def headings(node: nodes.Element, level: int):
+        for section in node.children:
+            if not isinstance(section, nodes.section):
+                continue
+            if section.children and isinstance(section[0], nodes.title):
+                heading_id = section["ids"][0] if section["ids"] else ""
+                yield level, section[0].astext(), heading_id
+            yield from headings(section, level + 1)
+
+    # Section titles are mapped to HTML headings starting at initial_header_level.
+    return _nest(headings(document, initial_header_level))
+
+
+def toc_to_html(toc: list[dict[str, Any]]) -> str:
+    """Render a table of contents as nested HTML lists."""
+    if not toc:
+        return ""
+
+    items = []
+    for entry in toc:
+        link = f'<a href="#{escape(entry["id"])}">{escape(entry["text"])}</a>'
+        items.append(f"<li>{link}{toc_to_html(entry['children'])}</li>")
+    return "<ul>" + "".join(items) + "</ul>"
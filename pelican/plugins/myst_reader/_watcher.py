@@ -0,0 +1,273 @@
+"""Re-render MyST documents in the background as soon as they change.
+
+For ``pelican --autoreload`` sessions: a watcher renders the documents which
+changed, or whose bibliographies or included files changed, while Pelican is
+still waiting to notice the change. When Pelican reads them, the results are
+served from the cache of incremental rendering.
+
+Changes are watched with `watchdog <https://github.com/gorakhargosh/watchdog>`_
+if it is installed, and by polling the content directory otherwise.
+"""
+
+from __future__ import annotations
+
+import atexit
+import fnmatch
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from ._dependencies import DependencyCache, stat_files
+
+logger = logging.getLogger(__name__)
+
+# Delay to wait for more changes, since editors often save a file in several steps.
+DEBOUNCE_DELAY = 0.1  # seconds
+
+# Watchers by content directory, kept alive across the builds of a session.
+_watchers: dict[str, Watcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def _is_within(parts: tuple[str, ...], directory: str) -> bool:
+    prefix = Path(directory).parts
+    return parts[: len(prefix)] == prefix
+
+
+class SourceFilter:
+    """Tell the documents which Pelican reads, from its path settings.
+
+    Documents are in ``ARTICLE_PATHS`` or ``PAGE_PATHS``, less their excludes, and
+    do not match ``IGNORE_FILES``. Those in ``STATIC_PATHS`` are left out too: if
+    Pelican reads them anyway, they are rendered then instead of in advance.
+    """
+
+    def __init__(self, root: str | os.PathLike, settings: Mapping[str, Any]):
+        self.root = os.path.abspath(root)
+        self.ignores = tuple(settings.get("IGNORE_FILES", ()))
+        self.static_paths = tuple(settings.get("STATIC_PATHS", ()))
+        self.sources = [
+            (
+                tuple(settings.get(f"{kind}_PATHS", ())),
+                tuple(settings.get(f"{kind}_EXCLUDES", ())),
+            )
+            for kind in ("ARTICLE", "PAGE")
+        ]
+
+    def is_ignored(self, path: str) -> bool:
+        """Return whether a file or directory matches ``IGNORE_FILES``.
+
+        Patterns are matched against the name, like Pelican does, and against the
+        path relative to the content directory, for patterns like ``**/.*``.
+        """
+        relative = Path(os.path.relpath(path, self.root)).as_posix()
+        return any(
+            fnmatch.fnmatch(os.path.basename(path), pattern)
+            or fnmatch.fnmatch(relative, pattern)
+            for pattern in self.ignores
+        )
+
+    def __call__(self, path: str) -> bool:
+        parts = Path(os.path.relpath(path, self.root)).parts
+        if not parts or parts[0] == os.pardir:
+            return False
+        if any(
+            self.is_ignored(os.path.join(self.root, *parts[: index + 1]))
+            for index in range(len(parts))
+        ):
+            return False
+        if any(_is_within(parts, directory) for directory in self.static_paths):
+            return False
+        return any(
+            any(_is_within(parts, directory) for directory in paths)
+            and not any(_is_within(parts, directory) for directory in excludes)
+            for paths, excludes in self.sources
+        )
+
+
+class Watcher:
+    """Watch a content directory and re-render the documents which change.
+
+    ``read`` renders a document and caches the result. ``extensions`` are those of
+    the documents and ``dependency_extensions`` those of the other files to watch,
+    like bibliographies. ``dependency_cache`` tells which documents depend on a
+    file. Without watchdog, files are polled every ``interval`` seconds. ``key``
+    identifies the settings of ``read``. Only the documents accepted by
+    ``sources`` are rendered, and the directories it ignores are not polled.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[str], Any],
+        root: str | os.PathLike,
+        extensions: Iterable[str],
+        dependency_extensions: Iterable[str],
+        dependency_cache: DependencyCache,
+        interval: float = 1.0,
+        key: str = "",
+        sources: SourceFilter | None = None,
+    ):
+        self.read = read
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(f".{extension}" for extension in extensions)
+        self.watched_extensions = self.extensions + tuple(
+            f".{extension}" for extension in dependency_extensions
+        )
+        self.dependency_cache = dependency_cache
+        self.interval = interval
+        self.key = key
+        self.sources = sources
+        self._changes: set[str] = set()
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._observer = None
+
+    def start(self, use_watchdog: bool = True):
+        """Start watching in daemon threads, with watchdog if it is available."""
+        if use_watchdog:
+            try:
+                self._observer = self._start_observer()
+            except ImportError:
+                logger.debug("watchdog is not installed, polling %s", self.root)
+        if self._observer is None:
+            self._start_thread(self._poll, "myst-watcher-poll")
+        self._start_thread(self._render_changes, "myst-watcher")
+
+    def stop(self):
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def notify(self, paths: Iterable[str]):
+        """Schedule the documents depending on ``paths`` to be rendered again."""
+        with self._condition:
+            self._changes.update(os.path.abspath(path) for path in paths)
+            self._condition.notify_all()
+
+    def documents(self, paths: Iterable[str]) -> set[str]:
+        """Return the documents which changed or depend on files which changed."""
+        documents = set()
+        for path in paths:
+            if (
+                path.endswith(self.extensions)
+                and (self.sources is None or self.sources(path))
+                and os.path.isfile(path)
+            ):
+                documents.add(path)
+            documents.update(self.dependency_cache.dependents(path))
+        return documents
+
+    @staticmethod
+    def _start_thread(target: Callable[[], None], name: str):
+        threading.Thread(target=target, name=name, daemon=True).start()
+
+    def _start_observer(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type in ("opened", "closed"):
+                    return
+                watcher.notify(
+                    [event.src_path, *filter(None, [getattr(event, "dest_path", "")])]
+                )
+
+        observer = Observer()
+        observer.schedule(Handler(), self.root, recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _scan(self) -> dict[str, Any]:
+        """Return the state of the documents and of the files they depend on."""
+        paths = []
+        for directory, directories, names in os.walk(self.root):
+            if self.sources is not None:
+                directories[:] = [
+                    name
+                    for name in directories
+                    if not self.sources.is_ignored(os.path.join(directory, name))
+                ]
+            paths.extend(
+                os.path.join(directory, name)
+                for name in names
+                if name.endswith(self.watched_extensions)
+            )
+        # Included files may have other extensions or be out of the directory.
+        paths.extend(self.dependency_cache.dependency_paths())
+        return stat_files(paths)
+
+    def _poll(self):
+        states = self._scan()
+        while not self._stopped.wait(self.interval):
+            new_states = self._scan()
+            changes = [
+                path
+                for path in states.keys() | new_states.keys()
+                if states.get(path) != new_states.get(path)
+            ]
+            states = new_states
+            if changes:
+                self.notify(changes)
+
+    def _render_changes(self):
+        while not self._stopped.is_set():
+            with self._condition:
+                while not self._changes and not self._stopped.is_set():
+                    self._condition.wait()
+            # Collect the other changes of the same save.
+            self._stopped.wait(DEBOUNCE_DELAY)
+            with self._condition:
+                changes, self._changes = self._changes, set()
+
+            for path in sorted(self.documents(changes)):
+                if self._stopped.is_set():
+                    return
+                try:
+                    self.read(path)
+                except Exception:
+                    # Pelican reports the error when it reads the document.
+                    logger.debug("Could not pre-render %s", path, exc_info=True)
+                else:
+                    logger.debug("Pre-rendered %s", path)
+
+
+def start_watcher(
+    read: Callable[[str], Any],
+    root: str | os.PathLike,
+    *args: Any,
+    key: str = "",
+    **kwargs: Any,
+) -> Watcher:
+    """Start the watcher of ``root``, or return it if it is already started.
+
+    The other arguments are those of :class:`Watcher`. A watcher with another
+    ``key``, for other settings, is replaced.
+    """
+    root = os.path.abspath(root)
+    with _watchers_lock:
+        watcher = _watchers.get(root)
+        if watcher is not None and watcher.key == key:
+            return watcher
+        if watcher is not None:
+            watcher.stop()
+        watcher = _watchers[root] = Watcher(read, root, *args, key=key, **kwargs)
+        watcher.start()
+        logger.info("Watching %s to pre-render MyST documents", root)
+        return watcher
+
+
+@atexit.register
+def stop_watchers():
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            watcher.stop()
+        _watchers.clear()
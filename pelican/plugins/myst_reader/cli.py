@@ -0,0 +1,203 @@
+"""Command line interface of MyST Reader, to render content without Pelican.
+
+Usage::
+
+    myst-reader render CONTENT_DIR -o OUTPUT_DIR -j 4
+
+Each MyST file of ``CONTENT_DIR`` is rendered to an HTML fragment and a JSON file
+of metadata in ``OUTPUT_DIR``, with the same relative path. The exit code is
+non-zero if any file fails to render, which makes it a quick pre-merge check.
+With ``--cache-dir CACHE_DIR``, renders are cached there and the next runs only
+render the files which changed.
+
+The caches of the jobs of a split build can be shared with::
+
+    myst-reader export-cache CACHE_DIR -o SHARD_DIR
+    myst-reader merge-cache SHARD_DIR... -o CACHE_DIR
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Sequence
+
+from pelican.settings import read_settings
+
+from ._cache import export_cache, merge_caches
+from .myst_reader import FILE_EXTENSIONS, MySTReader
+
+# Reader of each worker process, created once by _init_worker.
+_reader: MySTReader | None = None
+
+
+def find_sources(content_dir: Path) -> list[Path]:
+    """Find the MyST files under ``content_dir``, sorted by path."""
+    extensions = tuple(f".{ext}" for ext in FILE_EXTENSIONS)
+    return sorted(
+        Path(directory, name)
+        for directory, _, names in os.walk(content_dir)
+        for name in names
+        if name.endswith(extensions)
+    )
+
+
+def create_settings(
+    content_dir: Path,
+    settings_path: str | None = None,
+    cache_path: str | None = None,
+) -> dict[str, Any]:
+    """Read the Pelican settings used to render the content.
+
+    A ``cache_path`` enables the render cache there, so that the next runs reuse the
+    renders of unchanged files.
+    """
+    override = {"PATH": str(content_dir)}
+    if cache_path is not None:
+        override["MYST_CACHE_PATH"] = cache_path
+        override["MYST_RENDER_CACHE"] = True
+    return read_settings(settings_path, override=override)
+
+
+def _init_worker(content_dir: Path, settings_path: str | None, cache_path: str | None):
+    global _reader
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.WARNING)
+    # Silence the warnings about feeds, which are not generated.
+    logging.getLogger("pelican.settings").setLevel(logging.ERROR)
+    _reader = MySTReader(create_settings(content_dir, settings_path, cache_path))
+
+
+def render_file(
+    source_path: Path, content_dir: Path, output_dir: Path
+) -> tuple[float, str | None]:
+    """Render a file in a worker and write its output.
+
+    Returns the duration in seconds and the error message, if rendering failed.
+    """
+    start = time.perf_counter()
+    try:
+        output, metadata = _reader.read(str(source_path))
+    except Exception as err:
+        return time.perf_counter() - start, f"{type(err).__name__}: {err}"
+    duration = time.perf_counter() - start
+
+    output_path = output_dir / source_path.relative_to(content_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.with_suffix(".html").write_text(output, encoding="utf-8")
+    # Pelican turns metadata into dates, authors or tags: save their text.
+    output_path.with_suffix(".json").write_text(
+        json.dumps(metadata, indent=2, sort_keys=True, default=str), encoding="utf-8"
+    )
+    return duration, None
+
+
+def render(args: argparse.Namespace) -> int:
+    """Render a content directory and report the timings and errors of each file."""
+    content_dir = Path(args.content_dir)
+    output_dir = Path(args.output)
+    sources = find_sources(content_dir)
+
+    start = time.perf_counter()
+    failures = 0
+    with ProcessPoolExecutor(
+        max_workers=args.jobs,
+        initializer=_init_worker,
+        initargs=(content_dir, args.settings, args.cache_dir),
+    ) as executor:
+        futures = {
+            executor.submit(render_file, path, content_dir, output_dir): path
+            for path in sources
+        }
+        for future in as_completed(futures):
+            path = futures[future].relative_to(content_dir)
+            duration, error = future.result()
+            if error is None:
+                print(f"{1000 * duration:10.1f} ms  {path}")
+            else:
+                failures += 1
+                print(f"FAILED {path}: {error}", file=sys.stderr)
+
+    duration = time.perf_counter() - start
+    print(
+        f"Rendered {len(sources) - failures} of {len(sources)} files "
+        f"in {duration:.2f} s."
+    )
+    return 1 if failures else 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """Export a cache directory to a shard."""
+    count = export_cache(args.cache_dir, args.output)
+    print(f"Exported {count} cache entries to {args.output}.")
+    return 0
+
+
+def merge(args: argparse.Namespace) -> int:
+    """Merge cache shards into a cache directory."""
+    copied, skipped = merge_caches(args.shards, args.output)
+    print(f"Merged {copied} cache entries into {args.output}, skipped {skipped}.")
+    return 1 if skipped else 0
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="myst-reader", description="Render MyST content without Pelican."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser(
+        "render", help="Render a content directory to HTML fragments and metadata."
+    )
+    render_parser.add_argument("content_dir", help="Directory of the MyST files.")
+    render_parser.add_argument(
+        "-o", "--output", required=True, help="Directory of the rendered files."
+    )
+    render_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    render_parser.add_argument(
+        "-s", "--settings", help="Pelican settings file, e.g. pelicanconf.py."
+    )
+    render_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the caches (MYST_CACHE_PATH), with the render cache on.",
+    )
+    render_parser.set_defaults(func=render)
+
+    export_parser = subparsers.add_parser(
+        "export-cache", help="Export a cache directory to a shard with checksums."
+    )
+    export_parser.add_argument("cache_dir", help="Cache directory (MYST_CACHE_PATH).")
+    export_parser.add_argument(
+        "-o", "--output", required=True, help="Directory of the shard."
+    )
+    export_parser.set_defaults(func=export)
+
+    merge_parser = subparsers.add_parser(
+        "merge-cache", help="Merge cache shards into a cache directory."
+    )
+    merge_parser.add_argument("shards", nargs="+", help="Directories of the shards.")
+    merge_parser.add_argument(
+        "-o", "--output", required=True, help="Cache directory (MYST_CACHE_PATH)."
+    )
+    merge_parser.set_defaults(func=merge)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
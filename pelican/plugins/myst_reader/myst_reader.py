@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import cProfile
+import hashlib
+import logging
 import math
 import os
+import threading
+import time
 import warnings
+from concurrent.futures import Executor, ThreadPoolExecutor
 from copy import deepcopy
 from enum import Enum
 from io import StringIO
@@ -12,23 +18,61 @@ from pathlib import Path
 from typing import Any, Iterable
 
 import docutils
+import yaml
 from bs4 import BeautifulSoup, element
+from markdown_it import MarkdownIt
 from markdown_it.renderer import RendererHTML
 from markdown_it.token import Token
 from mwc.counter import count_words_in_markdown
-from myst_parser.config.main import MdParserConfig, TopmatterReadError, read_topmatter
+from myst_parser.config.main import MdParserConfig
 from myst_parser.parsers.mdit import create_md_parser
 
 from pelican import signals
 from pelican.readers import BaseReader
 from pelican.utils import pelican_open
 
+from ._cache import Cache, bypass_caches, hash_key, package_versions
+from ._dependencies import DependencyCache, IncludeCache, stat_files
 from ._docutils_renderer import Parser as DocutilsParser
 from ._docutils_renderer import docutils_renderer
-from ._mdit_renderer import mdit_init, mdit_renderer
-from ._sphinx_renderer import sphinx_renderer
+from ._highlight import Highlighter
+from ._images import ImageSizes
+from ._label_index import get_label_index, has_cross_references
+from ._links import links_from_doctree, links_from_tokens
+from ._mdit_renderer import (
+    create_math_renderer,
+    mdit_init,
+    mdit_render_many,
+    mdit_renderer,
+)
+from ._minify import minify_html
+from ._notebooks import (
+    NotebookExecutor,
+    is_text_notebook,
+    notebook_to_myst,
+    parse_notebook,
+    parse_text_notebook,
+)
+from ._pruning import PrunedParsers
+from ._search import (
+    sections_from_doctree,
+    sections_from_tokens,
+    sections_to_text,
+    write_search_index,
+)
+from ._sphinx_renderer import SphinxConfig, get_worker_pool, sphinx_renderer
+from ._toc import toc_from_doctree, toc_from_tokens, toc_to_html
+from ._watcher import SourceFilter, start_watcher
 from .exceptions import MystReaderContentError
 
+try:
+    # Use the C-accelerated YAML loader when LibYAML is available.
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YamlSafeLoader
+
+logger = logging.getLogger(__name__)
+
 DEFAULT_READING_SPEED = 200  # Words per minute
 
 ENCODED_LINKS_TO_RAW_LINKS_MAP = {
@@ -37,6 +81,24 @@ ENCODED_LINKS_TO_RAW_LINKS_MAP = {
     "%7Bfilename%7D": "{filename}",
 }
 
+# Settings which do not change the rendered documents, but only where or how fast
+# they are rendered.
+LOCAL_SETTINGS = frozenset(
+    {
+        "MYST_CACHE_PATH",
+        "MYST_INCREMENTAL",
+        "MYST_PROFILE_PATH",
+        "MYST_PROFILE_THRESHOLD_MS",
+        "MYST_RENDER_CACHE",
+        "MYST_SPHINX_WORKERS",
+    }
+)
+# Caches bypassed when profiling a slow document, for the profile to show where
+# the time is spent rather than cache hits.
+PROFILED_CACHES = ("render", "doctree", "highlight", "math", "include")
+# Pelican settings used to render documents and their metadata fields.
+RENDER_SETTINGS = ("FORMATTED_FIELDS", "READING_SPEED", "CALCULATE_READING_TIME")
+
 # Markdown variants supported in default files
 # Update as MyST adds or removes support for formats
 VALID_BIB_EXTENSIONS = ["bibtex", "bib"]
@@ -49,6 +111,7 @@ FILE_EXTENSIONS = [
     "markdown",
     "Rmd",
     "myst",
+    "ipynb",
 ]
 
 # Default MyST settings common to all parsers.
@@ -63,6 +126,11 @@ DEFAULT_MYST_SETTINGS = {
     ],
 }
 
+# Render results kept in memory between the successive builds of a development server.
+_dependency_cache = DependencyCache()
+# Nested includes of the files included by documents, shared by all readers.
+_include_cache = IncludeCache()
+
 # List of implemented renderers.
 # TODO: refactor Renderer management with classes to make code more readable and avoid
 # passing this enum as parameters everywhere. This should remove lots of duplicate code
@@ -78,7 +146,6 @@ DEFAULT_DOCUTILS_SETTINGS = {
     "input_encoding": "utf-8",
     "halt_level": 2,
     "traceback": True,
-    "warning_stream": StringIO(),
     "embed_stylesheet": False,
     # Default set of MyST extensions.
     "myst_enable_extensions": set(),
@@ -122,6 +189,42 @@ class MySTReader(BaseReader):
         """Fetch settings from ``pelicanconf.py`` and initialize parsers."""
         super().__init__(*args, **kwargs)
 
+        # Directory where caches persist from one build to the next.
+        self.cache_path = self.settings.get("MYST_CACHE_PATH")
+
+        # Re-render only the documents which changed, for `pelican --autoreload`.
+        # Pre-rendering changed documents in the background relies on it too.
+        self.watch = self.settings.get("MYST_WATCH", False)
+        self.incremental = self.settings.get("MYST_INCREMENTAL", False) or self.watch
+        self.settings_key = hash_key(repr(sorted(self.settings.items())))
+
+        # Cache the Docutils document trees, to only run the writer on unchanged
+        # documents. Enabled by default when caches persist on disk.
+        if self.settings.get("MYST_DOCTREE_CACHE", bool(self.cache_path)):
+            self.doctree_cache = Cache("doctree", self.cache_path, maxsize=128)
+        else:
+            self.doctree_cache = None
+
+        # Cache the rendered documents, keyed by their content and dependencies, to
+        # share them between builds, machines or the jobs of a split build.
+        if self.settings.get("MYST_RENDER_CACHE", False):
+            self.render_cache = Cache("render", self.cache_path, maxsize=256)
+        else:
+            self.render_cache = None
+
+        # Execute notebooks without outputs ("auto") or all notebooks ("force"), with
+        # a cache of their outputs so that unchanged notebooks are never re-executed.
+        self.notebook_executor = NotebookExecutor(
+            self.settings.get("MYST_NOTEBOOK_EXECUTION", "off"),
+            Cache("notebook", self.cache_path),
+        )
+
+        # Profile the documents taking longer than this threshold to read.
+        self.profile_threshold_ms = self.settings.get("MYST_PROFILE_THRESHOLD_MS")
+        self.profile_path = Path(
+            self.settings.get("MYST_PROFILE_PATH", "myst_profiles")
+        )
+
         # Merge user-defined settings with defaults.
         self.docutils_settings = deepcopy(
             DEFAULT_DOCUTILS_SETTINGS
@@ -149,6 +252,27 @@ class MySTReader(BaseReader):
             self.mdit_settings["enable_extensions"].update(myst_extensions)
             self.sphinx_settings["myst_enable_extensions"].update(myst_extensions)
 
+        # Add the links and images of each document to the metadata.
+        self.collect_links = self.settings.get("MYST_LINKS", False)
+
+        # Add the plain text of each document, split in sections, to the metadata,
+        # to build a search index.
+        self.search = self.settings.get("MYST_SEARCH", False) or bool(
+            self.settings.get("MYST_SEARCH_INDEX")
+        )
+
+        # Collapse the insignificant whitespace of the rendered HTML.
+        self.minify_html = self.settings.get("MYST_MINIFY_HTML", False)
+
+        # Add a table of contents of the headings to the metadata.
+        self.table_of_contents = self.settings.get("MYST_TOC", False)
+
+        # Pre-render math at build time instead of in the browser with MathJax.
+        math_engine = self.settings.get("MYST_MATH_PRERENDER")
+        if math_engine == "mathml":
+            # Docutils has a built-in LaTeX to MathML converter.
+            self.docutils_settings.setdefault("math_output", "MathML")
+
         # Parse and validate MyST settings.
         docutils_myst_conf, normalized_setting = self._validate_myst_settings(
             self.docutils_settings
@@ -176,21 +300,120 @@ class MySTReader(BaseReader):
         )
         # Reintegrate normalized settings to the renderer settings.
         self.sphinx_settings |= normalized_setting
+        # Configuration shared by the Sphinx projects of all documents, which must not
+        # be modified by any of them.
+        self.sphinx_config = SphinxConfig(self.sphinx_settings)
+
+        # Fingerprint of the settings of the renderers, which unlike settings_key does
+        # not depend on the machine, for keys of the render cache.
+        self.render_fingerprint = hash_key(
+            {
+                key: value
+                for key, value in self.settings.items()
+                if key.startswith("MYST_") and key not in LOCAL_SETTINGS
+            },
+            self.docutils_settings,
+            self.mdit_settings,
+            self.sphinx_config.fingerprint,
+            {key: self.settings.get(key) for key in RENDER_SETTINGS},
+            package_versions(),
+        )
+
+        # Resolve {ref} and {doc} cross-references with an index of all documents.
+        if self.settings.get("MYST_LABEL_INDEX", False):
+            self.label_index = get_label_index(
+                self.settings["PATH"], self.file_extensions, self.cache_path
+            )
+        else:
+            self.label_index = None
+
+        # Highlight code blocks with a cache shared by the Docutils and MDIT renderers.
+        if self.settings.get("MYST_HIGHLIGHT", False):
+            self.highlighter = Highlighter(
+                Cache("highlight", self.cache_path),
+                tokennames=self.docutils_settings["syntax_highlight"],
+            )
+        else:
+            self.highlighter = None
+
+        # Add the intrinsic size of images and lazy-loading attributes with MDIT.
+        if self.settings.get("MYST_IMAGE_ATTRIBUTES", False):
+            image_sizes = ImageSizes(self.settings.get("PATH"))
+        else:
+            image_sizes = None
 
         # Create a MyST parser for each renderer with its own config.
         self.docutils_myst_parser = create_md_parser(docutils_myst_conf, RendererHTML)
-        self.mdit_myst_parser = mdit_init(mdit_myst_conf)
+        self.mdit_myst_parser = mdit_init(
+            mdit_myst_conf,
+            render_math=create_math_renderer(
+                math_engine, cache=Cache("math", self.cache_path)
+            ),
+            heading_ids=self.table_of_contents or self.search,
+            label_index=self.label_index,
+            highlight=self.highlighter.highlight if self.highlighter else None,
+            image_sizes=image_sizes,
+        )
         self.sphinx_myst_parser = create_md_parser(sphinx_myst_conf, RendererHTML)
 
+        # Skip the markdown-it rules which a document cannot use, with the same
+        # output. The Docutils renderer creates its own parser for each document.
+        self.prune_rules = self.settings.get("MYST_PRUNE_RULES", False)
+        if self.prune_rules:
+            self.pruned_parsers = {
+                RENDERER.DOCUTILS: PrunedParsers(self.docutils_myst_parser),
+                RENDERER.MDIT: PrunedParsers(self.mdit_myst_parser),
+                RENDERER.SPHINX: PrunedParsers(self.sphinx_myst_parser),
+            }
+
         # Create a Docutils parser once to not have to re-create it for each file.
         self.force_docutils = self.settings.get("MYST_FORCE_DOCUTILS", False)
         self.force_mdit = self.settings.get("MYST_FORCE_MDIT", False)
         self.force_sphinx = self.settings.get("MYST_FORCE_SPHINX", False)
 
-        # Save the creation of a parser if Sphinx is forced.
-        if not self.force_sphinx:
-            DocutilsParser.override_settings_spec(docutils_myst_conf)
-            self.docutils_parser = DocutilsParser()
+        # Build Sphinx projects in a shared pool of warm worker processes, instead of
+        # starting a new sphinx-build subprocess for each file.
+        self.sphinx_workers = self.settings.get("MYST_SPHINX_WORKERS", 0)
+
+        # Docutils parsers are created lazily, one per thread, since they keep the
+        # state of the document being parsed.
+        self.docutils_myst_conf = docutils_myst_conf
+        self._thread_local = threading.local()
+
+        # Re-render documents in the background as soon as they, or the files they
+        # depend on, are saved, so that Pelican finds them in the incremental cache.
+        if self.watch:
+            start_watcher(
+                self._prerender,
+                self.settings["PATH"],
+                self.file_extensions,
+                VALID_BIB_EXTENSIONS,
+                _dependency_cache,
+                interval=self.settings.get("MYST_WATCH_INTERVAL", 1.0),
+                key=self.settings_key,
+                sources=SourceFilter(self.settings["PATH"], self.settings),
+            )
+
+    @property
+    def docutils_parser(self) -> DocutilsParser:
+        """Docutils parser of the current thread."""
+        try:
+            return self._thread_local.docutils_parser
+        except AttributeError:
+            parser = self._thread_local.docutils_parser = DocutilsParser(
+                self.docutils_myst_conf
+            )
+            return parser
+
+    @property
+    def sphinx_worker_pool(self) -> Executor | None:
+        """Shared pool of warm Sphinx workers, replaced by a new one if broken."""
+        if not self.sphinx_workers:
+            return None
+        return get_worker_pool(
+            self.sphinx_workers,
+            extensions=self.sphinx_config.extensions | {"sphinxcontrib.bibtex"},
+        )
 
     def _validate_myst_settings(
         self, settings: dict[str, Any]
@@ -217,41 +440,308 @@ class MySTReader(BaseReader):
 
     def read(self, source_path: str) -> tuple[str, dict[str, Any]]:
         """Parse MyST Markdown and return HTML5 markup and metadata."""
-        # Get the user-defined path to the MyST executable or fall back to default
-        # Open Markdown file and read content
-        content = ""
-        with pelican_open(source_path) as file_content:
-            content = file_content
-
-        # Retrieve HTML content and the renderer used.
-        output, renderer = self._create_html(source_path, content)
+        if not self.incremental:
+            output, metadata, _, _ = self._read_timed(source_path)
+            return output, metadata
+
+        # Wait for a render of the same document by another thread, like the
+        # watcher, rather than rendering it twice.
+        with _dependency_cache.rendering(source_path):
+            # Serve documents whose dependencies did not change from memory.
+            # References are resolved against the labels of the other documents.
+            result = _dependency_cache.get(
+                source_path,
+                self.settings_key,
+                self.label_index.fingerprint if self.label_index is not None else None,
+            )
+            if result is not None:
+                output, metadata = result
+                return output, metadata.copy()
+
+            dependencies = stat_files([source_path])
+            output, metadata, dependency_paths, labels = self._read_timed(source_path)
+            dependencies |= stat_files(dependency_paths)
+            _dependency_cache.set(
+                source_path,
+                self.settings_key,
+                dependencies,
+                (output, metadata.copy()),
+                labels=labels,
+            )
+        return output, metadata
 
-        # Retrieve metadata with the same configuration as the renderer.
-        metadata = self._extract_metadata(content, renderer)
+    def _read_timed(
+        self, source_path: str
+    ) -> tuple[str, dict[str, Any], list[str], str | None]:
+        """Read a file like :meth:`_read`, and profile it if it is slow."""
+        start = time.perf_counter()
+        result = self._read(source_path)
+        duration_ms = 1000 * (time.perf_counter() - start)
+
+        if (
+            self.profile_threshold_ms is not None
+            and duration_ms > self.profile_threshold_ms
+        ):
+            self._profile_read(source_path, duration_ms)
+        return result
+
+    def _prerender(self, source_path: str):
+        """Render a document for the watcher, with up to date cross-references."""
+        if self.label_index is not None:
+            self.label_index.update()
+        self.read(source_path)
+
+    def read_many(
+        self, source_paths: Iterable[str], max_workers: int | None = None
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """Read several files concurrently with a pool of ``max_workers`` threads.
+
+        Returns the same results as :meth:`read`, in the order of ``source_paths``.
+        Threads overlap the waits on files and Sphinx builds, and run in parallel on
+        free-threaded Python.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.read, source_paths))
 
-        return output, metadata
+    def _read(
+        self, source_path: str
+    ) -> tuple[str, dict[str, Any], list[str], str | None]:
+        """Read and render a file.
 
-    def _create_html(self, source_path: str, content: str) -> tuple[str, RENDERER]:
-        """Create HTML5 content."""
+        Returns HTML5 markup, metadata, the other files the output depends on and
+        the fingerprint of the labels its cross-references resolve against, if any.
+        """
+        content = self._read_content(source_path)
 
         # Find and add bibliography if citations are specified
         if "{cite" in content:
             bib_files = self._find_bibs(source_path)
         else:
-            bib_files = ()
+            bib_files = []
+
+        includes = _include_cache.dependencies(content, source_path)
+        dependency_paths = [*bib_files, *includes]
+        labels = self._label_fingerprint(content, source_path)
 
-        stem = Path(source_path).stem
+        if self.render_cache is None:
+            env: dict[str, Any] = {}
+            output, fields = self._render(content, source_path, bib_files, env)
+            image_paths = env.get("image_paths", [])
+        else:
+            (output, fields), image_paths = self._render_cached(
+                content, source_path, bib_files, dependency_paths, labels
+            )
+        return (
+            output,
+            self._process_fields(fields),
+            [*dependency_paths, *image_paths],
+            labels,
+        )
+
+    def _label_fingerprint(self, content: str, source_path: str | None) -> str | None:
+        """Return the fingerprint of the labels which the cross-references of a
+        document resolve against, or None if it and its includes have none.
+        """
+        if self.label_index is None:
+            return None
+        if has_cross_references(content):
+            return self.label_index.fingerprint
+        if source_path is not None:
+            for path in _include_cache.dependencies(content, source_path):
+                try:
+                    text = _include_cache.read(path, errors="replace")
+                except OSError:
+                    continue
+                if has_cross_references(text):
+                    return self.label_index.fingerprint
+        return None
+
+    def _render_cached(
+        self,
+        content: str,
+        source_path: str,
+        bib_files: list[str],
+        dependency_paths: list[str],
+        labels: str | None = None,
+    ) -> tuple[tuple[str, dict[str, Any]], list[str]]:
+        """Render a file with the render cache.
+
+        Returns the HTML5 markup and unprocessed fields, and the images the output
+        depends on.
+        """
+        key = self._render_key(content, source_path, dependency_paths, labels)
+        # The images whose size is read are only known once the document is
+        # rendered, so their digests are cached with the result and checked here.
+        if (cached := self.render_cache.get(key)) is not None:
+            result, images = cached
+            root = self.settings.get("PATH") or "."
+            image_paths = [os.path.join(root, path) for path in images]
+            if self._file_digests(image_paths) == images:
+                return deepcopy(result), image_paths
+
+        env: dict[str, Any] = {}
+        result = self._render(content, source_path, bib_files, env)
+        image_paths = env.get("image_paths", [])
+        self.render_cache.set(key, (result, self._file_digests(image_paths)))
+        return deepcopy(result), image_paths
+
+    def _read_content(self, source_path: str) -> str:
+        """Read a MyST file, or convert a notebook to MyST Markdown."""
+        with pelican_open(source_path) as file_content:
+            content = file_content
+
+        if Path(source_path).suffix == ".ipynb":
+            notebook = parse_notebook(content)
+        elif is_text_notebook(content):
+            notebook = parse_text_notebook(content)
+        else:
+            return content
+        notebook = self.notebook_executor.update_outputs(notebook, source_path)
+        return notebook_to_myst(notebook)
+
+    def _render_key(
+        self,
+        content: str,
+        source_path: str,
+        dependency_paths: Iterable[str],
+        labels: str | None = None,
+    ) -> str:
+        """Key of a render in the render cache.
+
+        Files are identified by their path relative to the content directory and by
+        their content, so that keys are the same on other machines and checkouts.
+        ``labels`` is the fingerprint of the labels which the cross-references of
+        the document resolve against, if any.
+        """
+        root = self.settings.get("PATH") or "."
+        return hash_key(
+            content,
+            Path(os.path.relpath(source_path, root)).as_posix(),
+            self._file_digests(dependency_paths),
+            self.render_fingerprint,
+            labels,
+        )
+
+    def _file_digests(self, paths: Iterable[str]) -> dict[str, str | None]:
+        """Return the digest of each file by its path relative to the content."""
+        root = self.settings.get("PATH") or "."
+        digests = {}
+        for path in paths:
+            try:
+                with open(path, "rb") as file:
+                    digest = hashlib.sha256(file.read()).hexdigest()
+            except OSError:
+                digest = None
+            digests[Path(os.path.relpath(path, root)).as_posix()] = digest
+        return digests
+
+    def render(
+        self,
+        content: str,
+        source_path: str | None = None,
+        bib_files: Iterable[str] = (),
+    ) -> tuple[str, dict[str, Any]]:
+        """Render a MyST Markdown string and return HTML5 markup and metadata.
+
+        ``source_path`` is only used to resolve cross-references and name things,
+        the file is not read.
+        """
+        output, fields = self._render(content, source_path, bib_files)
+        return output, self._process_fields(fields)
+
+    def _render(
+        self,
+        content: str,
+        source_path: str | None,
+        bib_files: Iterable[str],
+        env: dict[str, Any] | None = None,
+    ) -> tuple[str, dict[str, Any]]:
+        """Render a MyST Markdown string to HTML5 markup and unprocessed fields.
+
+        If an ``env`` dictionary is given, it is filled by the renderer, with the
+        ``image_paths`` the output depends on for instance.
+        """
+        # Retrieve HTML content and the renderer used. The renderer stores its syntax
+        # tree in env, to extract more metadata without parsing the content again.
+        env = {} if env is None else env
+        env["source_path"] = source_path
+        output, renderer = self._create_html(source_path, content, bib_files, env)
+
+        # Retrieve metadata with the same configuration as the renderer.
+        return output, self._extract_fields(content, renderer, env)
+
+    def _profile_read(self, source_path: str, duration_ms: float):
+        """Read a file again under cProfile and save the statistics.
+
+        The caches filled by the first read are bypassed, so that the profile shows
+        the work of a cold read.
+        """
+        try:
+            name = os.path.relpath(source_path, self.settings.get("PATH", "."))
+        except ValueError:
+            # On Windows, paths on different drives cannot be relative.
+            name = os.path.abspath(source_path)
+        name = name.strip(os.sep).replace(os.sep, "__").replace("..", "_")
+        profile_file = self.profile_path / f"{name}.pstats"
+
+        profile = cProfile.Profile()
+        with bypass_caches(PROFILED_CACHES):
+            profile.runcall(self._read, source_path)
+        self.profile_path.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(profile_file)
+        logger.warning(
+            "Reading %s took %.0f ms. Profile saved to %s",
+            source_path,
+            duration_ms,
+            profile_file,
+        )
+
+    def read_metadata(self, source_path: str) -> dict[str, Any]:
+        """Parse only the front-matter of a MyST Markdown file and return metadata.
+
+        The body of the file is neither loaded nor rendered, so this is much cheaper
+        than :meth:`read` for passes which only need metadata. Only the fields listed
+        in ``FORMATTED_FIELDS`` are rendered and the reading time is not calculated.
+        """
+        with open(source_path, encoding="utf-8-sig") as file:
+            if Path(source_path).suffix == ".ipynb":
+                lines = notebook_to_myst(parse_notebook(file.read())).splitlines()
+                myst_metadata = self._read_front_matter(lines)
+            else:
+                myst_metadata = self._read_front_matter(file)
+
+        return self._process_metadata(self._format_dates(myst_metadata))
+
+    def _create_html(
+        self,
+        source_path: str | None,
+        content: str,
+        bib_files: Iterable[str] = (),
+        env: dict[str, Any] | None = None,
+    ) -> tuple[str, RENDERER]:
+        """Create HTML5 content."""
+        stem = Path(source_path).stem if source_path else None
         output, renderer = self._run_myst_to_html(
-            content, bib_files=bib_files, tempdir_suffix=stem
+            content, bib_files=bib_files, tempdir_suffix=stem, env=env
         )
+        return self._postprocess_html(output), renderer
 
+    def _postprocess_html(self, output: str) -> str:
+        """Restore the links and minify the HTML output, if enabled."""
+        output = self._restore_links(output)
+        if self.minify_html:
+            output = minify_html(output)
+        return output
+
+    @staticmethod
+    def _restore_links(output: str) -> str:
+        """Restore the links to be resolved by Pelican in the HTML output."""
         # Replace all occurrences of %7Bstatic%7D to {static},
         # %7Battach%7D to {attach} and %7Bfilename%7D to {filename}
         # so that static links are resolvable by pelican
         for encoded_str, raw_str in ENCODED_LINKS_TO_RAW_LINKS_MAP.items():
             output = output.replace(encoded_str, raw_str)
-
-        return output, renderer
+        return output
 
     def _calculate_reading_time(self, content: str) -> str:
         """Calculate time taken to read content."""
@@ -277,6 +767,7 @@ class MySTReader(BaseReader):
 
         # Cycle through the metadata and process them
         metadata = {}
+        formatted_keys = []
 
         for key, value in myst_metadata.items():
             key = key.lower()
@@ -287,8 +778,20 @@ class MySTReader(BaseReader):
             metadata[key] = p_value = self.process_metadata(key, value)
 
             if key in formatted_fields and isinstance(p_value, str):
-                # Convert metadata values in markdown, if any: for example summary
-                metadata[key], _ = self._run_myst_to_html(p_value)
+                formatted_keys.append(key)
+
+        # Convert metadata values in markdown, if any: for example summary
+        formatted_values = [metadata[key] for key in formatted_keys]
+        if self._select_renderer() is RENDERER.MDIT:
+            # Render all the fields in one batch with the same parser.
+            formatted_values = mdit_render_many(
+                formatted_values, parser=self.mdit_myst_parser
+            )
+        else:
+            formatted_values = [
+                self._run_myst_to_html(value)[0] for value in formatted_values
+            ]
+        metadata.update(zip(formatted_keys, formatted_values))
 
         return metadata
 
@@ -302,59 +805,190 @@ class MySTReader(BaseReader):
             str(tag) for tag in main.children if isinstance(tag, element.Tag)
         )
 
-    def _extract_metadata(self, content: str, renderer: RENDERER) -> dict[str, Any]:
-        """Extract metadata from MyST markdown content"""
-        if not content:
-            raise MystReaderContentError("Could not find metadata. File is empty.")
+    @staticmethod
+    def _read_front_matter(lines: Iterable[str]) -> dict[str, Any]:
+        """Read the YAML front-matter from an iterable of lines.
+
+        Lines are consumed only up to the terminating ``---`` or ``...`` line, so
+        that the rest of the document is never read when iterating over a file.
+        """
+        lines = iter(lines)
+        try:
+            first_line = next(lines)
+        except StopIteration:
+            raise MystReaderContentError(
+                "Could not find metadata. File is empty."
+            ) from None
+
+        if not first_line.startswith("---"):
+            raise MystReaderContentError("Invalid front-matter metadata.")
+
+        front_matter = []
+        for line in lines:
+            if line.startswith(("---", "...")):
+                break
+            front_matter.append(line.rstrip() + "\n")
 
         try:
-            myst_metadata = read_topmatter(content)
-        except TopmatterReadError as err:
+            myst_metadata = yaml.load("".join(front_matter), Loader=YamlSafeLoader)
+        except yaml.YAMLError as err:
             raise MystReaderContentError(
                 "Could not find front-matter metadata or invalid formatting."
             ) from err
-        else:
-            if myst_metadata is None:
-                raise MystReaderContentError("Invalid front-matter metadata.")
 
+        if not isinstance(myst_metadata, dict):
+            raise MystReaderContentError(
+                "Could not find front-matter metadata or invalid formatting."
+            )
+        return myst_metadata
+
+    @staticmethod
+    def _format_dates(myst_metadata: dict[str, Any]) -> dict[str, Any]:
+        """Convert date fields parsed by YAML back to strings for Pelican."""
         for key in ["date", "modified", "Date", "Modified"]:
             try:
                 myst_metadata[key] = myst_metadata[key].strftime("%Y-%m-%d")
             except (AttributeError, KeyError):
                 pass
+        return myst_metadata
 
-        # Parse MyST metadata and add it to Pelican
-        metadata = self._process_metadata(myst_metadata)
+    def _extract_metadata(
+        self,
+        content: str,
+        renderer: RENDERER,
+        env: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Extract metadata from MyST markdown content"""
+        return self._process_fields(self._extract_fields(content, renderer, env))
+
+    def _extract_fields(
+        self,
+        content: str,
+        renderer: RENDERER,
+        env: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Extract the metadata fields of MyST content, before Pelican processes them.
+
+        Fields only hold plain data, which can be cached on disk, whereas processed
+        metadata hold Pelican objects referring to the settings.
+        """
+        fields: dict[str, Any] = {
+            "front_matter": self._format_dates(
+                self._read_front_matter(content.splitlines())
+            )
+        }
+
+        if self.table_of_contents:
+            # Create table of contents
+            fields["toc"] = self._create_toc(content, renderer, env or {})
+
+        if self.collect_links:
+            # Collect outbound links
+            fields["links"] = self._collect_links(content, renderer, env or {})
+
+        if self.search:
+            # Split plain text in sections
+            fields["sections"] = self._create_sections(content, renderer, env or {})
 
-        # FIXME:
-        #  if table_of_contents:
-        #      # Create table of contents and add to metadata
-        #      metadata["toc"] = self.process_metadata("toc", toc)
-        #
         if self.settings.get("CALCULATE_READING_TIME", []):
-            # Calculate reading time and add to metadata
+            # Calculate reading time
+            fields["reading_time"] = self._calculate_reading_time(content)
+        return fields
+
+    def _process_fields(self, fields: dict[str, Any]) -> dict[str, Any]:
+        """Turn the fields extracted from MyST content into Pelican metadata."""
+        # Parse MyST metadata and add it to Pelican
+        metadata = self._process_metadata(fields["front_matter"])
+
+        if "toc" in fields:
+            metadata["toc_tree"] = fields["toc"]
+            metadata["toc"] = self.process_metadata("toc", toc_to_html(fields["toc"]))
+
+        if "links" in fields:
+            metadata["links"] = fields["links"]
+
+        if "sections" in fields:
+            metadata["sections"] = fields["sections"]
+            metadata["plain_text"] = sections_to_text(fields["sections"])
+
+        if "reading_time" in fields:
             metadata["reading_time"] = self.process_metadata(
-                "reading_time", self._calculate_reading_time(content)
+                "reading_time", fields["reading_time"]
             )
         return metadata
 
+    def _create_toc(
+        self, content: str, renderer: RENDERER, env: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """Create a table of contents from the syntax tree of the renderer."""
+        match renderer:
+            case RENDERER.DOCUTILS if "doctree" in env:
+                return toc_from_doctree(
+                    env["doctree"],
+                    int(self.docutils_settings["initial_header_level"]),
+                )
+            case RENDERER.MDIT if "tokens" in env:
+                return toc_from_tokens(env["tokens"])
+            case _:
+                # Sphinx renders in another process, so parse the content again.
+                return toc_from_tokens(self._run_myst_to_tokens(content, renderer))
+
+    def _collect_links(
+        self, content: str, renderer: RENDERER, env: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """Collect the links and images from the syntax tree of the renderer."""
+        match renderer:
+            case RENDERER.DOCUTILS if "doctree" in env:
+                links = links_from_doctree(env["doctree"])
+            case RENDERER.MDIT if "tokens" in env:
+                links = links_from_tokens(env["tokens"])
+            case _:
+                # Sphinx renders in another process, so parse the content again.
+                links = links_from_tokens(self._run_myst_to_tokens(content, renderer))
+
+        for link in links:
+            link["url"] = self._restore_links(link["url"])
+        return links
+
+    def _create_sections(
+        self, content: str, renderer: RENDERER, env: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """Split the plain text of the syntax tree of the renderer in sections."""
+        match renderer:
+            case RENDERER.DOCUTILS if "doctree" in env:
+                return sections_from_doctree(
+                    env["doctree"],
+                    int(self.docutils_settings["initial_header_level"]),
+                )
+            case RENDERER.MDIT if "tokens" in env:
+                return sections_from_tokens(env["tokens"])
+            case _:
+                # Sphinx renders in another process, so parse the content again.
+                return sections_from_tokens(self._run_myst_to_tokens(content, renderer))
+
     def _run_myst_to_tokens(self, content: str, renderer: RENDERER) -> list[Token]:
         """Execute the MyST parser and generate the syntax tree / tokens"""
+        return self._myst_parser(content, renderer).parse(content)
+
+    def _myst_parser(self, content: str, renderer: RENDERER) -> MarkdownIt:
+        """Return the MyST parser of a renderer, pruned for ``content`` if enabled."""
+        if self.prune_rules:
+            return self.pruned_parsers[renderer].get(content)
+
         match renderer:
             case RENDERER.SPHINX:
-                myst_parser = self.sphinx_myst_parser
+                return self.sphinx_myst_parser
             case RENDERER.DOCUTILS:
-                myst_parser = self.docutils_myst_parser
+                return self.docutils_myst_parser
             case _:
-                myst_parser = self.mdit_myst_parser
-
-        return myst_parser.parse(content)
+                return self.mdit_myst_parser
 
     def _run_myst_to_html(
         self,
         content: str,
         bib_files: Iterable[str | Path] | None = None,
         tempdir_suffix: str | None = None,
+        env: dict[str, Any] | None = None,
     ) -> tuple(str, RENDERER):
         """Select the right MyST renderer for each file and return output.
 
@@ -366,11 +1000,34 @@ class MySTReader(BaseReader):
         """
 
         def call_docutils_renderer() -> str:
+            # Collect the warnings of each call in its own stream, and read included
+            # files through the cache shared by all documents.
+            conf = {
+                "warning_stream": StringIO(),
+                "include_cache": _include_cache,
+            } | self.docutils_settings
+            source_path = (env or {}).get("source_path")
+            if self.doctree_cache is not None and source_path is not None:
+                # Cached document trees depend on the files they include.
+                includes = _include_cache.dependencies(content, source_path)
+            else:
+                includes = None
+            # Documents without cross-references do not depend on the labels.
+            if self._label_fingerprint(content, source_path) is not None:
+                conf = conf | {
+                    "label_index": self.label_index,
+                    "label_source_path": source_path,
+                }
             try:
                 return docutils_renderer(
                     content,
-                    conf=self.docutils_settings,
+                    conf=conf,
                     parser=self.docutils_parser,
+                    env=env,
+                    doctree_cache=self.doctree_cache,
+                    source_path=str(source_path) if source_path else None,
+                    includes=includes,
+                    highlighter=self.highlighter,
                 )
             except docutils.utils.SystemMessage as err:
                 raise MystReaderContentError(
@@ -378,33 +1035,48 @@ class MySTReader(BaseReader):
                 ) from err
 
         def call_mdit_renderer():
-            return mdit_renderer(content, parser=self.mdit_myst_parser)
+            return mdit_renderer(
+                content, parser=self._myst_parser(content, RENDERER.MDIT), env=env
+            )
 
         def call_sphinx_renderer() -> str:
             return sphinx_renderer(
                 content,
-                conf=self.sphinx_settings,
+                conf=self.sphinx_config,
                 bib_files=bib_files,
                 tempdir_suffix=tempdir_suffix,
+                worker_pool=self.sphinx_worker_pool,
             )
 
+        match self._select_renderer(bib_files):
+            case RENDERER.DOCUTILS:
+                return call_docutils_renderer(), RENDERER.DOCUTILS
+            case RENDERER.SPHINX:
+                return call_sphinx_renderer(), RENDERER.SPHINX
+            case _:
+                return call_mdit_renderer(), RENDERER.MDIT
+
+    def _select_renderer(
+        self, bib_files: Iterable[str | Path] | None = None
+    ) -> RENDERER:
+        """Select the renderer to use according to the settings and bibliography."""
         if self.force_docutils:
-            return call_docutils_renderer(), RENDERER.DOCUTILS
+            return RENDERER.DOCUTILS
         elif self.force_mdit:
-            return call_mdit_renderer(), RENDERER.MDIT
+            return RENDERER.MDIT
         elif self.force_sphinx:
-            return call_sphinx_renderer(), RENDERER.SPHINX
+            return RENDERER.SPHINX
         elif bib_files:
-            return call_sphinx_renderer(), RENDERER.SPHINX
+            return RENDERER.SPHINX
         # elif self.mdit_settings["myst_enable_extensions"].intersection(
         #     ("dollarmath", "amsmath")
         # ) or any(
         #     syntax in content for syntax in ("{filename}", "{static}", "{attach}")
         # ):
         #     # return call_sphinx_renderer(), RENDERER.SPHINX
-        #     return call_mdit_renderer(), RENDERER.MDIT
+        #     return RENDERER.MDIT
         else:
-            return call_mdit_renderer(), RENDERER.MDIT
+            return RENDERER.MDIT
 
     @staticmethod
     def _find_bibs(source_path: str) -> list[str]:
@@ -429,3 +1101,4 @@ def add_reader(readers):
 def register():
     """Register the MySTReader."""
     signals.readers_init.connect(add_reader)
+    signals.all_generators_finalized.connect(write_search_index)
@@ -0,0 +1,162 @@
+"""Generator of synthetic MyST content trees, to test how reading scales.
+
+Usage::
+
+    python tests/corpus.py CONTENT_DIR -n 10000 --citation-ratio 0.1
+
+Documents are spread in subdirectories, like the yearly folders of a blog, and
+some sit at the root of the tree, like the pages of a site. The same seed always
+generates the same tree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute irure "
+    "in reprehenderit voluptate velit esse cillum fugiat nulla pariatur"
+).split()
+
+BIB_ENTRY = """\
+@article{{key{index},
+  author = {{Author, {index}}},
+  title = {{Article number {index}}},
+  journal = {{Journal}},
+  year = {{2020}},
+}}
+"""
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 16))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _directive(rng: random.Random) -> str:
+    return rng.choice(
+        [
+            f"```{{note}}\n{_sentence(rng)}\n```",
+            "```{code-block} python\ndef square(x):\n    return x * x\n```",
+            f"```python\nprint({rng.randint(0, 100)})\n```",
+        ]
+    )
+
+
+def generate_document(
+    rng: random.Random,
+    index: int,
+    paragraphs: int = 5,
+    cited: bool = False,
+    math_ratio: float = 0.2,
+    directive_ratio: float = 0.2,
+    bib_entries: int = 3,
+) -> str:
+    """Generate a MyST document with sections, math, directives and citations."""
+    blocks = [
+        f"---\ntitle: Document {index}\ndate: 2020-01-01\ntags: synthetic\n---",
+        _paragraph(rng),
+    ]
+    for number in range(paragraphs):
+        if number % 3 == 0:
+            blocks.append(f"## Section {number // 3}")
+        text = _paragraph(rng)
+        if rng.random() < math_ratio:
+            text += " With {math}`e^{i\\pi} + 1 = 0` inline."
+            blocks.append(text)
+            blocks.append("```{math}\n\\int_0^1 x^2 \\, dx = \\frac{1}{3}\n```")
+        else:
+            blocks.append(text)
+        if rng.random() < directive_ratio:
+            blocks.append(_directive(rng))
+    if cited:
+        blocks.append(f"As shown by {{cite}}`key{rng.randrange(bib_entries)}`.")
+        blocks.append("```{bibliography}\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(
+    directory: str | Path,
+    nb_documents: int,
+    paragraphs: int = 5,
+    citation_ratio: float = 0.0,
+    math_ratio: float = 0.2,
+    directive_ratio: float = 0.2,
+    bib_files: int = 1,
+    bib_entries: int = 3,
+    documents_per_directory: int = 100,
+    root_ratio: float = 0.1,
+    seed: int = 0,
+) -> list[Path]:
+    """Generate a content tree and return the paths of its documents.
+
+    A ``citation_ratio`` of the documents cite references found in ``bib_files``
+    bibliographies named after them, in nested subdirectories. A ``root_ratio`` of
+    the documents are at the root of the tree, so that finding their
+    bibliographies walks the whole tree.
+    """
+    rng = random.Random(seed)
+    directory = Path(directory)
+    paths = []
+    for index in range(nb_documents):
+        if rng.random() < root_ratio:
+            subdirectory = directory
+        else:
+            subdirectory = directory / f"{index // documents_per_directory:05d}"
+        subdirectory.mkdir(parents=True, exist_ok=True)
+        path = subdirectory / f"document{index:06d}.md"
+        cited = rng.random() < citation_ratio
+        path.write_text(
+            generate_document(
+                rng, index, paragraphs, cited, math_ratio, directive_ratio, bib_entries
+            )
+        )
+        if cited:
+            bib_directory = subdirectory
+            for number in range(bib_files):
+                # Keys must be unique across the bibliographies of a document.
+                keys = range(number * bib_entries, (number + 1) * bib_entries)
+                bib_directory.mkdir(exist_ok=True)
+                (bib_directory / f"{path.stem}.bib").write_text(
+                    "\n".join(BIB_ENTRY.format(index=key) for key in keys)
+                )
+                bib_directory = bib_directory / "references"
+        paths.append(path)
+    return paths
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="Directory of the generated content.")
+    parser.add_argument("-n", "--documents", type=int, default=1000)
+    parser.add_argument("--paragraphs", type=int, default=5)
+    parser.add_argument("--citation-ratio", type=float, default=0.0)
+    parser.add_argument("--math-ratio", type=float, default=0.2)
+    parser.add_argument("--directive-ratio", type=float, default=0.2)
+    parser.add_argument("--bib-files", type=int, default=1)
+    parser.add_argument("--root-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_corpus(
+        args.directory,
+        args.documents,
+        paragraphs=args.paragraphs,
+        citation_ratio=args.citation_ratio,
+        math_ratio=args.math_ratio,
+        directive_ratio=args.directive_ratio,
+        bib_files=args.bib_files,
+        root_ratio=args.root_ratio,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Tests of the asynchronous rendering API of myst-reader plugin."""
+
+import asyncio
+import sys
+
+import pytest
+
+from pelican.plugins.myst_reader import AsyncMySTRenderer, MySTReader
+from pelican.tests.support import get_settings
+
+CONTENT = """---
+title: Draft
+---
+Some *MyST* content.
+"""
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT", "SPHINX"])
+def test_render(renderer):
+    """Check if rendering asynchronously gives the same result as synchronously."""
+    reader = MySTReader(get_settings(**{f"MYST_FORCE_{renderer}": True}))
+
+    output, metadata = asyncio.run(AsyncMySTRenderer(reader).render(CONTENT))
+    assert "<em>" in output
+    assert (output, metadata) == reader.render(CONTENT)
+
+
+def test_coalesce_and_supersede(monkeypatch):
+    """Check if duplicate renders are coalesced and superseded ones cancelled."""
+    reader = MySTReader(get_settings())
+    renderer = AsyncMySTRenderer(reader)
+    calls = []
+
+    async def render(content, source_path):
+        calls.append(content)
+        await asyncio.sleep(0.1)
+        return content.upper(), {"title": content}
+
+    monkeypatch.setattr(renderer, "_render", render)
+
+    async def main():
+        return await asyncio.gather(
+            renderer.render("first", session="alice"),
+            renderer.render("first", session="bob"),
+            renderer.render("second", session="alice"),
+            return_exceptions=True,
+        )
+
+    superseded, coalesced, latest = asyncio.run(main())
+    assert isinstance(superseded, asyncio.CancelledError)
+    # Bob still gets the render started for Alice.
+    assert coalesced == ("FIRST", {"title": "first"})
+    assert latest == ("SECOND", {"title": "second"})
+    assert calls == ["first", "second"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="Task.cancelling() is 3.11+")
+def test_supersede_only_cancels_render(monkeypatch):
+    """Check if superseding a render does not cancel the task of its caller."""
+    renderer = AsyncMySTRenderer(MySTReader(get_settings()))
+
+    async def render(content, source_path):
+        await asyncio.sleep(0.1)
+        return content.upper(), {}
+
+    monkeypatch.setattr(renderer, "_render", render)
+
+    async def first_caller():
+        with pytest.raises(asyncio.CancelledError):
+            await renderer.render("first", session="alice")
+        return asyncio.current_task().cancelling()
+
+    async def main():
+        first = asyncio.create_task(first_caller())
+        await asyncio.sleep(0.01)
+        latest = await renderer.render("second", session="alice")
+        return await first, latest
+
+    cancel_requests, latest = asyncio.run(main())
+    assert cancel_requests == 0
+    assert latest == ("SECOND", {})
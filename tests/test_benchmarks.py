@@ -0,0 +1,80 @@
+"""Throughput benchmarks of myst-reader plugin.
+
+These are deselected by default. Run them with ``nox -s benchmarks`` or
+``pytest -m benchmark -s``.
+"""
+
+import shutil
+import timeit
+from pathlib import Path
+
+import pytest
+from myst_parser.config.main import MdParserConfig
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.plugins.myst_reader._mdit_renderer import (
+    mdit_init,
+    mdit_render_many,
+    mdit_renderer,
+)
+from pelican.tests.support import get_settings
+
+pytestmark = pytest.mark.benchmark
+
+TEST_CONTENT_PATH = Path(__file__).parent.resolve() / "test_content"
+
+NB_SNIPPETS = 5_000
+
+
+def _report(name: str, nb_items: int, duration: float):
+    print(f"\n{name}: {nb_items / duration:,.0f} items/s ({duration:.3f} s)")
+
+
+def test_mdit_render_many_short_snippets():
+    """Compare the throughput of batch and one by one MDIT rendering."""
+    parser = mdit_init(MdParserConfig(enable_extensions={"colon_fence", "deflist"}))
+    snippets = [
+        f"Summary number {index} with *emphasis* and a [link](https://example.com)."
+        for index in range(NB_SNIPPETS)
+    ]
+
+    duration_one_by_one = min(
+        timeit.repeat(
+            lambda: [mdit_renderer(snippet, parser=parser) for snippet in snippets],
+            number=1,
+            repeat=3,
+        )
+    )
+    duration_many = min(
+        timeit.repeat(
+            lambda: mdit_render_many(snippets, parser=parser), number=1, repeat=3
+        )
+    )
+
+    _report("mdit_renderer", NB_SNIPPETS, duration_one_by_one)
+    _report("mdit_render_many", NB_SNIPPETS, duration_many)
+    assert mdit_render_many(snippets, parser=parser) == [
+        mdit_renderer(snippet, parser=parser) for snippet in snippets
+    ]
+
+
+def test_sphinx_cited_posts_scaling(tmp_path):
+    """Check if the time to render a cited post stays flat as posts are rendered."""
+    nb_posts = 8
+    for index in range(nb_posts):
+        for extension in ("md", "bib"):
+            shutil.copy(
+                TEST_CONTENT_PATH / f"valid_content_citations.{extension}",
+                tmp_path / f"post{index}.{extension}",
+            )
+    reader = MySTReader(get_settings(MYST_SPHINX_WORKERS=1))
+
+    durations = [
+        timeit.timeit(lambda: reader.read(tmp_path / f"post{index}.md"), number=1)
+        for index in range(nb_posts)
+    ]
+    # The first render warms the worker up.
+    first, last = min(durations[1:3]), min(durations[-2:])
+    _report("first cited posts", 2, 2 * first)
+    _report("last cited posts", 2, 2 * last)
+    assert last < 1.5 * first
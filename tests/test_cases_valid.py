@@ -8,6 +8,7 @@ import bs4
 import pytest
 
 from pelican.plugins.myst_reader import MySTReader
+from pelican.plugins.myst_reader._minify import minify_html
 from pelican.tests.support import get_settings as pelican_get_settings
 
 DIR_PATH = Path(__file__).parent.resolve()
@@ -256,3 +257,35 @@ def test_ext_attrs_inline_image(renderer):
     )
 
     assert ('style="width: 100px;"' in output) or ('w="100px"' in output)
+
+
+def test_sphinx_workers():
+    """Check if warm Sphinx workers render like sphinx-build subprocesses."""
+    settings = {
+        "MYST_FORCE_SPHINX": True,
+        "MYST_SPHINX_WORKERS": 1,
+        "MYST_SPHINX_SETTINGS": dict(myst_enable_extensions=["tasklist"]),
+    }
+
+    # Render twice to reuse the same warm worker.
+    for _ in range(2):
+        output, _ = _test_valid(
+            "ext_tasklist", "ext_tasklist_renderer='SPHINX'", **settings
+        )
+        assert '<li class="task-list-item">' in output
+
+
+@pytest.mark.parametrize("renderer", ["MDIT", "SPHINX"])
+def test_minify_html(renderer):
+    """Check if minified output is the minified expected output."""
+    settings = {
+        f"MYST_FORCE_{renderer}": True,
+        "MYST_MINIFY_HTML": True,
+        f"MYST_{renderer}_SETTINGS": dict(myst_enable_extensions=["tasklist"]),
+    }
+    myst_reader = MySTReader(pelican_get_settings(**settings))
+
+    output, _ = myst_reader.read(TEST_CONTENT_PATH / "ext_tasklist.md")
+    path_expected = PATH_DIR_EXPECTED / f"ext_tasklist_{renderer=}.html"
+    assert output == minify_html(path_expected.read_text().strip())
+    assert "\n" not in output
@@ -0,0 +1,127 @@
+"""Tests of the command line interface of myst-reader plugin."""
+
+import json
+import multiprocessing
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader, cli
+from pelican.plugins.myst_reader.cli import main
+from pelican.tests.support import get_settings
+
+TEST_CONTENT_PATH = Path(__file__).parent.resolve() / "test_content"
+
+
+def test_render(tmp_path, capsys):
+    """Check if a content directory is rendered, with failures reported."""
+    content_dir = tmp_path / "content"
+    (content_dir / "posts").mkdir(parents=True)
+    shutil.copy(TEST_CONTENT_PATH / "valid_content_minimal.md", content_dir)
+    shutil.copy(TEST_CONTENT_PATH / "valid_content_images.md", content_dir / "posts")
+    shutil.copy(TEST_CONTENT_PATH / "wrong_metadata_end.md", content_dir)
+    output_dir = tmp_path / "output"
+
+    assert main(["render", str(content_dir), "-o", str(output_dir), "-j", "2"]) == 1
+
+    captured = capsys.readouterr()
+    assert "ms  posts/valid_content_images.md" in captured.out
+    assert "Rendered 2 of 3 files" in captured.out
+    assert "FAILED wrong_metadata_end.md: MystReaderContentError" in captured.err
+
+    assert (output_dir / "posts" / "valid_content_images.html").exists()
+    assert not (output_dir / "wrong_metadata_end.html").exists()
+    metadata = json.loads((output_dir / "valid_content_minimal.json").read_text())
+    assert metadata["title"] == "Valid Content"
+    assert metadata["date"] == "2020-10-16 00:00:00"
+
+
+def test_worker_settings(tmp_path, monkeypatch):
+    """Check if the readers of workers use the settings file and the cache directory."""
+    monkeypatch.setattr(cli, "_reader", None)
+    settings_path = tmp_path / "pelicanconf.py"
+    settings_path.write_text("MYST_FORCE_MDIT = True\n")
+
+    cli._init_worker(tmp_path, str(settings_path), None)
+    assert cli._reader.force_mdit
+    assert cli._reader.render_cache is None
+
+    cli._init_worker(tmp_path, str(settings_path), str(tmp_path / "cache"))
+    assert cli._reader.force_mdit
+    assert cli._reader.cache_path == str(tmp_path / "cache")
+    assert cli._reader.render_cache is not None
+
+
+def test_render_cache(tmp_path, capsys, monkeypatch):
+    """Check if the renders of a run are read from the cache by the next run."""
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("Workers must inherit the patched reader.")
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    shutil.copy(TEST_CONTENT_PATH / "valid_content_minimal.md", content_dir)
+    shutil.copy(TEST_CONTENT_PATH / "valid_content_images.md", content_dir)
+    args = ["render", str(content_dir), "-o", str(tmp_path / "output")]
+    args += ["--cache-dir", str(tmp_path / "cache")]
+
+    assert main(args) == 0
+    expected = (tmp_path / "output" / "valid_content_minimal.html").read_text()
+    assert any((tmp_path / "cache" / "render").iterdir())
+
+    def fail_to_render(*args):
+        raise AssertionError("The render should be cached.")
+
+    monkeypatch.setattr(MySTReader, "_render", fail_to_render)
+    assert main(args) == 0
+    assert "Rendered 2 of 2 files" in capsys.readouterr().out
+    assert (tmp_path / "output" / "valid_content_minimal.html").read_text() == expected
+
+
+def test_split_build_cache(tmp_path, capsys, monkeypatch):
+    """Check if renders cached by split jobs are reused by another checkout."""
+    shards = []
+    for job in range(2):
+        content_dir = tmp_path / f"job{job}" / "content"
+        content_dir.mkdir(parents=True)
+        shutil.copy(TEST_CONTENT_PATH / "valid_content_minimal.md", content_dir)
+        shutil.copy(TEST_CONTENT_PATH / "valid_content_images.md", content_dir)
+        # Each job renders half of the documents.
+        settings = get_settings(
+            PATH=str(content_dir),
+            MYST_CACHE_PATH=str(tmp_path / f"job{job}" / "cache"),
+            MYST_RENDER_CACHE=True,
+        )
+        source_path = sorted(content_dir.iterdir())[job]
+        expected = MySTReader(settings).read(source_path)
+
+        shards.append(str(tmp_path / f"shard{job}"))
+        assert (
+            main(["export-cache", settings["MYST_CACHE_PATH"], "-o", shards[-1]]) == 0
+        )
+
+    cache_dir = tmp_path / "cache"
+    assert main(["merge-cache", *shards, "-o", str(cache_dir)]) == 0
+    assert "Merged 2 cache entries" in capsys.readouterr().out
+    manifest = json.loads((cache_dir / "manifest.json").read_text())
+    assert all(name.startswith("render/") for name in manifest["entries"])
+
+    def fail_to_render(*args):
+        raise AssertionError("The render should be cached.")
+
+    monkeypatch.setattr(MySTReader, "_render", fail_to_render)
+    reader = MySTReader(
+        get_settings(
+            PATH=str(content_dir),
+            MYST_CACHE_PATH=str(cache_dir),
+            MYST_RENDER_CACHE=True,
+        )
+    )
+    assert reader.read(source_path) == expected
+    for path in content_dir.iterdir():
+        reader.read(path)
+
+    # Corrupted entries are skipped when merging.
+    entry = next((tmp_path / "shard0" / "render").glob("*/*"))
+    entry.write_bytes(b"corrupted")
+    assert main(["merge-cache", shards[0], "-o", str(tmp_path / "merged")]) == 1
+    assert "skipped 1" in capsys.readouterr().out
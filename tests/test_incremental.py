@@ -0,0 +1,261 @@
+"""Tests of the incremental mode of myst-reader plugin."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from pelican.plugins.myst_reader import (
+    MySTReader,
+    _dependencies,
+    _watcher,
+    myst_reader,
+)
+from pelican.tests.support import get_settings
+
+CONTENT = """\
+---
+title: "Incremental"
+---
+Some content.
+
+```{include} snippet.md
+```
+"""
+
+
+@pytest.fixture()
+def source_path(tmp_path):
+    (tmp_path / "snippet.md").write_text("A snippet.\n")
+    path = tmp_path / "incremental.md"
+    path.write_text(CONTENT)
+    return path
+
+
+def _touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_incremental(source_path, monkeypatch):
+    """Check if documents are rendered again only when a dependency changes."""
+    monkeypatch.setattr(myst_reader, "_dependency_cache", myst_reader.DependencyCache())
+    renders = []
+
+    def count_renders(reader):
+        create_html = reader._create_html
+
+        def counting_create_html(*args, **kwargs):
+            renders.append(args)
+            return create_html(*args, **kwargs)
+
+        monkeypatch.setattr(reader, "_create_html", counting_create_html)
+        return reader
+
+    reader = count_renders(MySTReader(get_settings(MYST_INCREMENTAL=True)))
+
+    output, metadata = reader.read(source_path)
+    assert len(renders) == 1
+    assert "Incremental" == metadata["title"]
+
+    # A new reader, as created by Pelican on each build, hits the cache.
+    new_reader = count_renders(MySTReader(get_settings(MYST_INCREMENTAL=True)))
+    assert (output, metadata) == new_reader.read(source_path)
+    assert (output, metadata) == reader.read(source_path)
+    assert len(renders) == 1
+    assert str(source_path.parent / "snippet.md") in (
+        myst_reader._dependency_cache.dependencies(source_path)
+    )
+
+    # Modifying an included file invalidates the cache.
+    _touch(source_path.parent / "snippet.md")
+    reader.read(source_path)
+    assert len(renders) == 2
+
+    # As well as modifying the settings.
+    settings = get_settings(MYST_INCREMENTAL=True, READING_SPEED=100)
+    count_renders(MySTReader(settings)).read(source_path)
+    assert len(renders) == 3
+
+
+def _wait_for_render(source_path, settings_key, timeout=10):
+    """Wait for the watcher to render ``source_path`` and return the result."""
+    deadline = time.monotonic() + timeout
+    while (
+        result := myst_reader._dependency_cache.get(source_path, settings_key)
+    ) is None:
+        assert time.monotonic() < deadline, f"{source_path} was not pre-rendered"
+        time.sleep(0.02)
+    return result
+
+
+def test_watch(source_path, monkeypatch):
+    """Check if documents are pre-rendered when they or their includes change."""
+    monkeypatch.setattr(myst_reader, "_dependency_cache", myst_reader.DependencyCache())
+    monkeypatch.setattr(_watcher, "_watchers", {})
+    settings = get_settings(
+        PATH=str(source_path.parent),
+        MYST_FORCE_DOCUTILS=True,
+        MYST_WATCH=True,
+        MYST_WATCH_INTERVAL=0.05,
+    )
+    reader = MySTReader(settings)
+    try:
+        reader.read(source_path)
+
+        (source_path.parent / "snippet.md").write_text("Another snippet.\n")
+        _touch(source_path.parent / "snippet.md")
+        output, _ = _wait_for_render(source_path, reader.settings_key)
+        assert "Another snippet." in output
+
+        new_path = source_path.parent / "new.md"
+        new_path.write_text("---\ntitle: New\n---\nA new document.\n")
+        output, metadata = _wait_for_render(new_path, reader.settings_key)
+        assert metadata["title"] == "New"
+
+        # Pelican gets the pre-rendered documents from a new reader.
+        assert MySTReader(settings).read(new_path) == (output, metadata)
+    finally:
+        _watcher.stop_watchers()
+
+
+def test_watch_sources(tmp_path):
+    """Check if the watcher only renders the documents which Pelican reads."""
+    settings = get_settings(
+        ARTICLE_PATHS=["posts"],
+        ARTICLE_EXCLUDES=["posts/drafts"],
+        PAGE_PATHS=["pages"],
+        STATIC_PATHS=["posts/images"],
+        IGNORE_FILES=["**/.*", "*.tmp.md"],
+    )
+    paths = {
+        "posts/post.md": True,
+        "posts/2024/post.md": True,
+        "pages/page.md": True,
+        "posts/drafts/draft.md": False,
+        "posts/images/README.md": False,
+        "posts/.hidden/post.md": False,
+        "posts/post.tmp.md": False,
+        "notes/note.md": False,
+    }
+    for path in paths:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("---\ntitle: Document\n---\n")
+
+    sources = _watcher.SourceFilter(tmp_path, settings)
+    watcher = _watcher.Watcher(
+        lambda path: None,
+        tmp_path,
+        ["md"],
+        [],
+        _dependencies.DependencyCache(),
+        sources=sources,
+    )
+    assert watcher.documents(str(tmp_path / path) for path in paths) == {
+        str(tmp_path / path) for path, read in paths.items() if read
+    }
+    assert not any(".hidden" in path for path in watcher._scan())
+
+
+def test_concurrent_renders(source_path, monkeypatch):
+    """Check if a document being pre-rendered is not rendered again meanwhile."""
+    monkeypatch.setattr(myst_reader, "_dependency_cache", myst_reader.DependencyCache())
+    reader = MySTReader(get_settings(MYST_INCREMENTAL=True))
+    started, finish = threading.Event(), threading.Event()
+    renders = []
+    read = reader._read
+
+    def slow_read(path):
+        renders.append(path)
+        started.set()
+        finish.wait(5)
+        return read(path)
+
+    monkeypatch.setattr(reader, "_read", slow_read)
+    with ThreadPoolExecutor(2) as executor:
+        prerender = executor.submit(reader.read, source_path)
+        assert started.wait(5)
+        pelican_read = executor.submit(reader.read, source_path)
+        time.sleep(0.05)
+        assert not pelican_read.done()
+        finish.set()
+        assert pelican_read.result(5) == prerender.result(5)
+    assert len(renders) == 1
+
+
+def test_include_cache(tmp_path, monkeypatch):
+    """Check if included files are tracked, and scanned once per change."""
+    monkeypatch.setattr(myst_reader, "_include_cache", myst_reader.IncludeCache())
+    snippets = tmp_path / "snippets"
+    snippets.mkdir()
+    (snippets / "note.md").write_text("A note.\n\n```{include} code.md\n```\n")
+    (snippets / "code.md").write_text("Some code.\n")
+    posts = []
+    for index in range(3):
+        path = tmp_path / f"post{index}.md"
+        path.write_text(
+            f"---\ntitle: Post {index}\n---\n```{{include}} snippets/note.md\n```\n"
+        )
+        posts.append(path)
+
+    scanned = []
+    find_includes = _dependencies.find_includes
+
+    def counting_find_includes(content, source_path):
+        scanned.append(Path(source_path).name)
+        return find_includes(content, source_path)
+
+    monkeypatch.setattr(_dependencies, "find_includes", counting_find_includes)
+    settings = get_settings(
+        PATH=str(tmp_path), MYST_FORCE_DOCUTILS=True, MYST_DOCTREE_CACHE=True
+    )
+    reader = MySTReader(settings)
+
+    outputs = [reader.read(path)[0] for path in posts]
+    # Includes are resolved relative to the including document, recursively.
+    assert all("A note." in output and "Some code." in output for output in outputs)
+    assert scanned.count("note.md") == 1
+    assert set(reader._read(posts[0])[2]) == {
+        str(snippets / "note.md"),
+        str(snippets / "code.md"),
+    }
+
+    # Changing a nested include invalidates the cached document trees.
+    (snippets / "code.md").write_text("Other code.\n")
+    _touch(snippets / "code.md")
+    assert "Other code." in reader.read(posts[0])[0]
+    assert scanned.count("code.md") == 2
+
+
+def test_include_cache_reads(tmp_path, monkeypatch):
+    """Check if included files are read once, and resolved like MyST does."""
+    monkeypatch.setattr(myst_reader, "_include_cache", myst_reader.IncludeCache())
+    snippet = tmp_path / "snippets" / "note.md"
+    snippet.parent.mkdir()
+    snippet.write_text("A note.\n")
+    posts = []
+    for index, include in enumerate(["snippets/note.md", snippet]):
+        path = tmp_path / f"post{index}.md"
+        path.write_text(
+            f"---\ntitle: Post {index}\n---\n```{{include}} {include}\n```\n"
+        )
+        posts.append(path)
+
+    def read_text(path, *args, **kwargs):
+        raise AssertionError(f"{path} should be read from the include cache.")
+
+    settings = get_settings(
+        PATH=str(tmp_path), MYST_FORCE_DOCUTILS=True, MYST_DOCTREE_CACHE=False
+    )
+    reader = MySTReader(settings)
+    reader.read(posts[0])
+    monkeypatch.setattr(Path, "read_text", read_text)
+
+    # Absolute paths are paths of the file system, not of the content directory.
+    for path in posts:
+        output, _ = reader.read(path)
+        assert "A note." in output
+        assert reader._read(path)[2] == [str(snippet)]
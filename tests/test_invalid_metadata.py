@@ -29,6 +29,9 @@ def test_empty_file(myst_reader_obj):
     with pytest.raises(Exception, match="Could not find metadata. File is empty."):
         myst_reader_obj.read(source_path)
 
+    with pytest.raises(Exception, match="Could not find metadata. File is empty."):
+        myst_reader_obj.read_metadata(source_path)
+
 
 msg0 = "Invalid front-matter metadata."
 msg1 = "Could not find front-matter metadata or invalid formatting."
@@ -54,3 +57,6 @@ def test_non_empty_file_no_metadata(myst_reader_obj, source_md, expected_msg):
     if expected_msg:
         with pytest.raises(MystReaderContentError, match=expected_msg):
             myst_reader_obj.read(source_path)
+
+        with pytest.raises(MystReaderContentError, match=expected_msg):
+            myst_reader_obj.read_metadata(source_path)
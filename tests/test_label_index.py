@@ -0,0 +1,224 @@
+"""Tests of the site-wide cross-references of myst-reader plugin."""
+
+import os
+
+import pytest
+from docutils.parsers.rst import roles
+
+from pelican.plugins.myst_reader import MySTReader, _docutils_renderer, myst_reader
+from pelican.plugins.myst_reader._label_index import LabelIndex, scan_document
+from pelican.plugins.myst_reader.exceptions import MystReaderContentError
+from pelican.tests.support import get_settings
+
+PAGE_A = """\
+---
+title: "Page A"
+---
+(intro-label)=
+## Introduction
+
+See {ref}`details`, {ref}`Custom title <other-target>` and {doc}`sub/b`.
+"""
+
+PAGE_B = """\
+---
+title: Page B
+---
+## Details
+
+(other-target)=
+Some paragraph.
+
+```
+## Not a heading
+```
+
+Back to {doc}`../a` and {ref}`intro-label`.
+"""
+
+
+@pytest.fixture()
+def content_path(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.md").write_text(PAGE_A)
+    (tmp_path / "sub" / "b.md").write_text(PAGE_B)
+    return tmp_path
+
+
+def test_scan_document():
+    """Check if titles, headings and targets are found."""
+    title, labels = scan_document(PAGE_B)
+
+    assert "Page B" == title
+    assert [
+        ("Details", "details", "Details", False),
+        ("other-target", "other-target", "other-target", True),
+    ] == labels
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT"])
+def test_cross_references(renderer, content_path):
+    """Check if references to other documents are resolved."""
+    settings = get_settings(
+        PATH=str(content_path),
+        MYST_LABEL_INDEX=True,
+        **{f"MYST_FORCE_{renderer}": True},
+    )
+    reader = MySTReader(settings)
+
+    output, _ = reader.read(content_path / "a.md")
+    assert 'href="{filename}/sub/b.md#details">Details</a>' in output
+    assert 'href="{filename}/sub/b.md#other-target">Custom title</a>' in output
+    assert 'href="{filename}/sub/b.md">Page B</a>' in output
+    assert 'id="intro-label"' in output
+
+    output, _ = reader.read(content_path / "sub" / "b.md")
+    assert 'href="{filename}/a.md">Page A</a>' in output
+    assert 'href="{filename}/a.md#intro-label">Introduction</a>' in output
+    assert 'id="other-target"' in output
+
+    # The roles are never registered in Docutils.
+    assert "ref" not in roles._roles
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT"])
+def test_heading_ids(renderer, content_path):
+    """Check if headings with inline markup are labelled with the ids of renderers."""
+    (content_path / "c.md").write_text(
+        "---\ntitle: C\n---\n## See [the *docs*](https://example.com) and `code`\n"
+    )
+    settings = get_settings(
+        PATH=str(content_path),
+        MYST_LABEL_INDEX=True,
+        MYST_TOC=True,
+        **{f"MYST_FORCE_{renderer}": True},
+    )
+    reader = MySTReader(settings)
+
+    _, anchor, title = reader.label_index.labels["see the docs and code"]
+    assert ("see-the-docs-and-code", "See the docs and code") == (anchor, title)
+    output, _ = reader.read(content_path / "c.md")
+    assert f'id="{anchor}"' in output
+
+
+def test_unlabelled_cross_references(content_path, monkeypatch):
+    """Check if references are unknown without an index, whatever other threads do."""
+    reader = MySTReader(get_settings(PATH=str(content_path), MYST_FORCE_DOCUTILS=True))
+
+    def render():
+        try:
+            return reader.render("See {ref}`details`.")
+        except MystReaderContentError as err:
+            return str(err)
+
+    expected = render()
+    assert "Unknown interpreted text role" in str(expected)
+    results = []
+    resolve = LabelIndex.resolve
+
+    def resolve_and_render(self, *args, **kwargs):
+        # Render while the document with an index is being parsed.
+        results.append(render())
+        return resolve(self, *args, **kwargs)
+
+    monkeypatch.setattr(LabelIndex, "resolve", resolve_and_render)
+    labelled_reader = MySTReader(
+        get_settings(
+            PATH=str(content_path), MYST_LABEL_INDEX=True, MYST_FORCE_DOCUTILS=True
+        )
+    )
+    labelled_reader.read(content_path / "a.md")
+    assert results and all(result == expected for result in results)
+
+
+@pytest.mark.parametrize("setting", ["MYST_DOCTREE_CACHE", "MYST_RENDER_CACHE"])
+def test_cached_cross_references(setting, content_path, tmp_path, monkeypatch):
+    """Check if only cached documents with references depend on the labels."""
+    (content_path / "c.md").write_text("---\ntitle: C\n---\nNo references.\n")
+    parsed = []
+    parse_doctree = _docutils_renderer.parse_doctree
+
+    def counting_parse_doctree(content, conf, parser, source_path, *args):
+        parsed.append(os.path.basename(source_path))
+        return parse_doctree(content, conf, parser, source_path, *args)
+
+    monkeypatch.setattr(_docutils_renderer, "parse_doctree", counting_parse_doctree)
+    settings = get_settings(
+        PATH=str(content_path),
+        MYST_CACHE_PATH=str(tmp_path / "cache"),
+        MYST_LABEL_INDEX=True,
+        MYST_FORCE_DOCUTILS=True,
+        **{setting: True},
+    )
+    for name in ("a.md", "c.md"):
+        MySTReader(settings).read(content_path / name)
+
+    (content_path / "sub" / "b.md").write_text(
+        PAGE_B.replace("## Details", "(details)=\n## More details")
+    )
+    output, _ = MySTReader(settings).read(content_path / "a.md")
+    assert ">More details</a>" in output
+    MySTReader(settings).read(content_path / "c.md")
+    assert parsed == ["a.md", "c.md", "a.md"]
+
+
+def test_label_index_update(content_path):
+    """Check if the index is updated when documents are added."""
+    settings = get_settings(PATH=str(content_path), MYST_LABEL_INDEX=True)
+    assert "new-target" not in MySTReader(settings).label_index.labels
+
+    (content_path / "c.md").write_text("---\ntitle: C\n---\n(new-target)=\nText.\n")
+    label_index = MySTReader(settings).label_index
+    assert ("c.md", "new-target", "new-target") == label_index.labels["new-target"]
+
+
+def test_label_index_invalid_files(content_path, caplog):
+    """Check if files which cannot be scanned are skipped with a warning."""
+    (content_path / "latin1.md").write_bytes(
+        "---\ntitle: Caf\xe9\n---\n".encode("latin-1")
+    )
+    (content_path / "broken.ipynb").write_text("{")
+    settings = get_settings(PATH=str(content_path), MYST_LABEL_INDEX=True)
+
+    label_index = MySTReader(settings).label_index
+    assert "details" in label_index.labels
+    assert {"latin1", "broken"}.isdisjoint(label_index.documents)
+    assert caplog.text.count("Could not index the labels") == 2
+
+
+def test_incremental_cross_references(content_path, monkeypatch):
+    """Check if cached documents are rendered again when the labels they use change."""
+    monkeypatch.setattr(myst_reader, "_dependency_cache", myst_reader.DependencyCache())
+    settings = get_settings(
+        PATH=str(content_path), MYST_LABEL_INDEX=True, MYST_INCREMENTAL=True
+    )
+    # Documents without cross-references, even in their includes, do not depend
+    # on the labels.
+    (content_path / "c.md").write_text("---\ntitle: C\n---\nNo references.\n")
+    (content_path / "snippet.md").write_text("See {ref}`details`.\n")
+    (content_path / "d.md").write_text(
+        "---\ntitle: D\n---\n```{include} snippet.md\n```\n"
+    )
+    renders = []
+    create_html = MySTReader._create_html
+
+    def counting_create_html(self, source_path, *args, **kwargs):
+        renders.append(os.path.basename(source_path))
+        return create_html(self, source_path, *args, **kwargs)
+
+    monkeypatch.setattr(MySTReader, "_create_html", counting_create_html)
+    reader = MySTReader(settings)
+    output, _ = reader.read(content_path / "a.md")
+    assert ">Details</a>" in output
+    for name in ("c.md", "d.md"):
+        reader.read(content_path / name)
+
+    (content_path / "sub" / "b.md").write_text(
+        PAGE_B.replace("## Details", "(details)=\n## More details")
+    )
+    reader = MySTReader(settings)
+    output, _ = reader.read(content_path / "a.md")
+    assert ">More details</a>" in output
+    for name in ("c.md", "d.md"):
+        reader.read(content_path / name)
+    assert renders == ["a.md", "c.md", "d.md", "a.md", "d.md"]
@@ -0,0 +1,60 @@
+"""Tests of the outbound links collected by myst-reader plugin."""
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.tests.support import get_settings
+
+CONTENT = """\
+---
+title: "Links"
+---
+(target)=
+## Section
+
+See [an *external* page](https://example.com/page), [a post]({filename}post.md)
+and [the section](#target).
+
+![A picture]({static}/images/picture.png)
+
+```{image} {attach}images/diagram.png
+:alt: A diagram
+```
+"""
+
+EXPECTED_LINKS = [
+    {"kind": "link", "url": "https://example.com/page", "text": "an external page"},
+    {"kind": "link", "url": "{filename}post.md", "text": "a post"},
+    {"kind": "link", "url": "#target", "text": "the section"},
+    {"kind": "image", "url": "{static}/images/picture.png", "text": "A picture"},
+    {"kind": "image", "url": "{attach}images/diagram.png", "text": "A diagram"},
+]
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT", "SPHINX"])
+def test_links(renderer, tmp_path):
+    """Check if the links and images of a document are added to the metadata."""
+    source_path = tmp_path / "links.md"
+    source_path.write_text(CONTENT)
+    settings = get_settings(
+        MYST_LINKS=True,
+        # Otherwise, Docutils looks for a target named after {filename} links.
+        MYST_DOCUTILS_SETTINGS={"myst_all_links_external": True},
+        **{f"MYST_FORCE_{renderer}": True},
+    )
+
+    output, metadata = MySTReader(settings).read(source_path)
+
+    assert metadata["links"] == EXPECTED_LINKS
+    for link in EXPECTED_LINKS:
+        assert link["url"] in output
+
+
+def test_no_links(tmp_path):
+    """Check if links are not collected by default."""
+    source_path = tmp_path / "links.md"
+    source_path.write_text(CONTENT)
+
+    _, metadata = MySTReader(get_settings()).read(source_path)
+
+    assert "links" not in metadata
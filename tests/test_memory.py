@@ -0,0 +1,144 @@
+"""Memory footprint tests of myst-reader plugin.
+
+These are deselected by default. Run them with ``nox -s memory`` or
+``pytest -m memory -s``. They fail if the memory retained per document read
+exceeds a budget, which reveals leaks like growing streams or shared lists.
+"""
+
+import gc
+import os
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader, _sphinx_renderer
+from pelican.tests.support import get_settings
+
+pytestmark = pytest.mark.memory
+
+TEST_CONTENT_PATH = Path(__file__).parent.resolve() / "test_content"
+SOURCE_PATH = TEST_CONTENT_PATH / "valid_content_images.md"
+CITATIONS_PATH = TEST_CONTENT_PATH / "valid_content_citations.md"
+
+NB_READS = 1_000
+# Sphinx builds are slower, but enough to reveal a leak of a few KiB per build.
+NB_SPHINX_READS = 50
+NB_WORKER_READS = 200
+# Memory which may be retained per read, by caches filling up for instance.
+RETAINED_BUDGET_PER_READ = 512  # bytes
+# Growth allowed per read for the resident memory of a warm Sphinx worker.
+WORKER_RSS_BUDGET_PER_READ = 32 * 1024  # bytes
+# Peak resident memory of a sphinx-build subprocess, with the default extensions.
+SPHINX_BUILD_RSS_BUDGET = 512 * 1024**2  # bytes
+
+
+def _report(name: str, **sizes: int):
+    print(
+        f"\n{name}: " + ", ".join(f"{k}={v / 1024:,.1f} KiB" for k, v in sizes.items())
+    )
+
+
+def _rss(pid: int, field: str = "VmRSS") -> int | None:
+    """Return the resident memory of a process, or None if it is unknown.
+
+    ``field`` is ``VmRSS`` for the current resident memory, or ``VmHWM`` for its
+    peak so far.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@pytest.mark.parametrize(
+    "renderer, nb_reads",
+    [("DOCUTILS", NB_READS), ("MDIT", NB_READS), ("SPHINX", NB_SPHINX_READS)],
+    ids=["DOCUTILS", "MDIT", "SPHINX"],
+)
+def test_retained_memory(renderer, nb_reads):
+    """Check if reading the same file many times does not leak memory.
+
+    Sphinx projects are built by subprocesses, so only the memory of the process
+    running Pelican is checked.
+    """
+    reader = MySTReader(get_settings(**{f"MYST_FORCE_{renderer}": True}))
+    # Warm up lazy imports and caches.
+    for _ in range(20):
+        reader.read(SOURCE_PATH)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        reader.read(SOURCE_PATH)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+
+        for _ in range(nb_reads):
+            reader.read(SOURCE_PATH)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    _report(renderer, peak_per_read=peak, retained_per_read=retained // nb_reads)
+    assert retained / nb_reads < RETAINED_BUDGET_PER_READ
+
+
+def test_sphinx_worker_memory():
+    """Check if a warm Sphinx worker does not grow with the cited posts it renders."""
+    reader = MySTReader(get_settings(MYST_SPHINX_WORKERS=1))
+    # The pool has a single worker, so any task runs in the one rendering the posts.
+    pid = reader.sphinx_worker_pool.submit(os.getpid).result()
+    if _rss(pid) is None:
+        pytest.skip("Resident memory of processes is not available.")
+    # Warm up lazy imports and caches.
+    for _ in range(20):
+        reader.read(CITATIONS_PATH)
+    rss_start = _rss(pid)
+
+    for _ in range(NB_WORKER_READS):
+        reader.read(CITATIONS_PATH)
+    rss_end = _rss(pid)
+
+    _report(
+        "SPHINX worker",
+        rss_start=rss_start,
+        rss_growth_per_read=(rss_end - rss_start) // NB_WORKER_READS,
+    )
+    assert (rss_end - rss_start) / NB_WORKER_READS < WORKER_RSS_BUDGET_PER_READ
+
+
+def test_sphinx_build_peak_memory(monkeypatch):
+    """Check if the peak resident memory of sphinx-build subprocesses is bounded."""
+    if _rss(os.getpid(), "VmHWM") is None:
+        pytest.skip("Resident memory of processes is not available.")
+    peaks = []
+
+    def build_sphinx_project(tempdir):
+        # Same as the renderer, with the peak memory of the process sampled.
+        process = subprocess.Popen(
+            "sphinx-build . -b html _build".split(),
+            cwd=tempdir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        peak = 0
+        while process.poll() is None:
+            peak = max(peak, _rss(process.pid, "VmHWM") or 0)
+            time.sleep(0.01)
+        assert process.returncode == 0
+        peaks.append(peak)
+
+    monkeypatch.setattr(_sphinx_renderer, "build_sphinx_project", build_sphinx_project)
+    MySTReader(get_settings(MYST_FORCE_SPHINX=True)).read(CITATIONS_PATH)
+
+    _report("SPHINX sphinx-build", peak_rss=peaks[0])
+    assert 0 < peaks[0] < SPHINX_BUILD_RSS_BUDGET
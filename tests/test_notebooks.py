@@ -0,0 +1,217 @@
+"""Tests of Jupyter notebooks and MyST text notebooks read by myst-reader plugin."""
+
+import json
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.plugins.myst_reader._notebooks import (
+    NotebookExecutor,
+    is_text_notebook,
+    parse_text_notebook,
+)
+from pelican.tests.support import get_settings
+
+# A transparent pixel.
+PNG = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAA"
+    "SUVORK5CYII=\n"
+)
+
+NOTEBOOK = {
+    "cells": [
+        {
+            "cell_type": "markdown",
+            "metadata": {},
+            "source": ["---\n", "title: A notebook\n", "date: 2024-01-01\n", "---"],
+        },
+        {
+            "cell_type": "markdown",
+            "metadata": {},
+            "source": "## Analysis\n\nSome *data*.",
+        },
+        {
+            "cell_type": "code",
+            "execution_count": 1,
+            "metadata": {},
+            "source": ["import pandas\n", "print('loaded')"],
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": "loaded\n"}
+            ],
+        },
+        {
+            "cell_type": "code",
+            "execution_count": 2,
+            "metadata": {"tags": ["remove-input"]},
+            "source": "frame",
+            "outputs": [
+                {
+                    "output_type": "execute_result",
+                    "execution_count": 2,
+                    "metadata": {},
+                    "data": {
+                        "text/html": "<table>\n\n<tr><td>42</td></tr>\n</table>",
+                        "text/plain": "   0\n0  42",
+                    },
+                },
+                {
+                    "output_type": "display_data",
+                    "metadata": {},
+                    "data": {"image/png": PNG, "text/plain": "<Figure>"},
+                },
+            ],
+        },
+        {
+            "cell_type": "code",
+            "execution_count": 3,
+            "metadata": {},
+            "source": "1 / 0",
+            "outputs": [
+                {
+                    "output_type": "error",
+                    "ename": "ZeroDivisionError",
+                    "evalue": "division by zero",
+                    "traceback": [
+                        "\x1b[0;31mZeroDivisionError\x1b[0m: division by zero"
+                    ],
+                }
+            ],
+        },
+    ],
+    "metadata": {
+        "kernelspec": {"name": "python3", "display_name": "Python 3"},
+        "language_info": {"name": "python"},
+    },
+    "nbformat": 4,
+    "nbformat_minor": 5,
+}
+
+TEXT_NOTEBOOK = """\
+---
+title: A text notebook
+kernelspec:
+  name: python3
+  display_name: Python 3
+---
+Some text.
+
+```{code-cell} python
+print(6 * 7)
+```
+
++++
+
+More text.
+"""
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT"])
+def test_notebook(renderer, tmp_path):
+    """Check if notebooks are rendered with their stored outputs."""
+    source_path = tmp_path / "notebook.ipynb"
+    source_path.write_text(json.dumps(NOTEBOOK))
+    settings = get_settings(**{f"MYST_FORCE_{renderer}": True})
+
+    output, metadata = MySTReader(settings).read(str(source_path))
+
+    assert metadata["title"] == "A notebook"
+    assert "Analysis" in output
+    assert "pandas" in output
+    assert "loaded" in output
+    # Outputs are kept, but not the input of cells tagged with remove-input.
+    assert "<td>42</td>" in output
+    assert "frame" not in output
+    assert '<img src="data:image/png;base64,iVBOR' in output
+    assert "ZeroDivisionError: division by zero" in output
+    assert "\x1b" not in output
+
+    assert MySTReader(settings).read_metadata(str(source_path))["title"] == (
+        "A notebook"
+    )
+
+
+def test_text_notebook(tmp_path):
+    """Check if the code cells of text notebooks are rendered as code blocks."""
+    source_path = tmp_path / "notebook.md"
+    source_path.write_text(TEXT_NOTEBOOK)
+
+    output, metadata = MySTReader(get_settings()).read(str(source_path))
+
+    assert metadata["title"] == "A text notebook"
+    assert "print(6 * 7)" in output
+    assert "+++" not in output
+    assert "More text." in output
+
+
+def test_text_notebook_detection():
+    """Check if only the front-matter tells text notebooks from Markdown posts."""
+    post = "---\ntitle: A post\n---\n````md\n```{code-cell} python\nx\n```\n````\n"
+    assert not is_text_notebook(post)
+    assert not is_text_notebook("```{code-cell} python\nx\n```\n")
+    assert is_text_notebook(TEXT_NOTEBOOK)
+    jupytext = "jupytext:\n  text_representation:\n    format_name: myst\n"
+    jupytext_post = post.replace("title: A post\n", jupytext)
+    assert is_text_notebook(jupytext_post)
+    assert not is_text_notebook(jupytext_post.replace("myst", "markdown"))
+
+    # Code cells shown in other blocks are not cells.
+    notebook = parse_text_notebook(post.replace("title: A post", "kernelspec: {}"))
+    assert [cell["cell_type"] for cell in notebook["cells"]] == ["markdown"]
+    notebook = parse_text_notebook(TEXT_NOTEBOOK)
+    assert [cell["cell_type"] for cell in notebook["cells"]] == [
+        "markdown",
+        "code",
+        "markdown",
+    ]
+    assert notebook["metadata"]["kernelspec"]["display_name"] == "Python 3"
+
+
+def test_notebook_execution_cache(tmp_path, monkeypatch):
+    """Check if notebooks are only executed again when their code changes."""
+    executions = []
+
+    def execute(notebook, directory):
+        executions.append(notebook)
+        return [[{"output_type": "stream", "name": "stdout", "text": "42\n"}]]
+
+    monkeypatch.setattr(NotebookExecutor, "_execute", staticmethod(execute))
+    source_path = tmp_path / "content" / "notebook.md"
+    source_path.parent.mkdir()
+    source_path.write_text(TEXT_NOTEBOOK)
+    settings = get_settings(
+        MYST_NOTEBOOK_EXECUTION="auto", MYST_CACHE_PATH=str(tmp_path / "cache")
+    )
+
+    for _ in range(2):
+        output, _ = MySTReader(settings).read(str(source_path))
+        assert "42" in output
+    assert len(executions) == 1
+
+    source_path.write_text(TEXT_NOTEBOOK.replace("6 * 7", "7 * 6"))
+    MySTReader(settings).read(str(source_path))
+    assert len(executions) == 2
+
+    # Stored outputs are used as they are, unless execution is forced.
+    notebook_path = source_path.with_suffix(".ipynb")
+    notebook_path.write_text(json.dumps(NOTEBOOK))
+    MySTReader(settings).read(str(notebook_path))
+    assert len(executions) == 2
+
+
+def test_notebook_execution(tmp_path):
+    """Check if notebooks are executed with a Jupyter kernel."""
+    pytest.importorskip("nbclient")
+    pytest.importorskip("ipykernel")
+    source_path = tmp_path / "notebook.md"
+    source_path.write_text(TEXT_NOTEBOOK)
+
+    output, _ = MySTReader(get_settings(MYST_NOTEBOOK_EXECUTION="force")).read(
+        str(source_path)
+    )
+
+    assert "42" in output
+
+
+def test_invalid_execution_mode():
+    with pytest.raises(ValueError, match="Unknown notebook execution mode"):
+        MySTReader(get_settings(MYST_NOTEBOOK_EXECUTION="always"))
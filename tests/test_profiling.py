@@ -0,0 +1,41 @@
+"""Tests of the profiling of slow documents by myst-reader plugin."""
+
+import pstats
+from pathlib import Path
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.tests.support import get_settings
+
+TEST_CONTENT_PATH = Path(__file__).absolute().parent / "test_content"
+
+
+@pytest.mark.parametrize("cache", ["MYST_RENDER_CACHE", "MYST_DOCTREE_CACHE"])
+def test_profile_slow_documents(cache, tmp_path):
+    """Check if documents slower than the threshold are profiled without caches."""
+    settings = get_settings(
+        PATH=str(TEST_CONTENT_PATH),
+        MYST_FORCE_DOCUTILS=True,
+        MYST_PROFILE_THRESHOLD_MS=0,
+        MYST_PROFILE_PATH=str(tmp_path),
+        **{cache: True},
+    )
+    MySTReader(settings).read(TEST_CONTENT_PATH / "valid_content_minimal.md")
+
+    profile_file = tmp_path / "valid_content_minimal.md.pstats"
+    assert profile_file.exists()
+    stats = pstats.Stats(str(profile_file))
+    assert any(name == "_create_html" for _, _, name in stats.stats)
+    assert any(name == "parse_doctree" for _, _, name in stats.stats)
+
+
+def test_no_profile_fast_documents(tmp_path):
+    """Check if documents faster than the threshold are not profiled."""
+    settings = get_settings(
+        MYST_PROFILE_THRESHOLD_MS=60_000,
+        MYST_PROFILE_PATH=str(tmp_path),
+    )
+    MySTReader(settings).read(TEST_CONTENT_PATH / "valid_content_minimal.md")
+
+    assert not tuple(tmp_path.iterdir())
@@ -0,0 +1,434 @@
+"""Tests of the renderers used by myst-reader plugin."""
+
+import asyncio
+import os
+import signal
+import struct
+from pathlib import Path
+
+import pytest
+from myst_parser.config.main import MdParserConfig
+
+from pelican.plugins.myst_reader import (
+    MySTReader,
+    _docutils_renderer,
+    _images,
+    _sphinx_renderer,
+    myst_reader,
+)
+from pelican.plugins.myst_reader._cache import Cache
+from pelican.plugins.myst_reader._docutils_renderer import docutils_renderer
+from pelican.plugins.myst_reader._highlight import Highlighter, Lexer, base, body
+from pelican.plugins.myst_reader._images import ImageSizes, read_image_size
+from pelican.plugins.myst_reader._mdit_renderer import (
+    MATH_ENGINES,
+    create_math_renderer,
+    mdit_init,
+    mdit_render_many,
+    mdit_renderer,
+)
+from pelican.plugins.myst_reader._minify import minify_html
+from pelican.plugins.myst_reader._pruning import unused_rules
+from pelican.plugins.myst_reader._sphinx_renderer import (
+    SphinxConfig,
+    sphinx_renderer,
+    sphinx_renderer_async,
+)
+from pelican.plugins.myst_reader.exceptions import MystReaderContentError
+from pelican.tests.support import get_settings
+
+SNIPPETS = [
+    "A *short* summary with a [reference link][ref].\n\n[ref]: https://example.com",
+    # The reference definition above must not leak into the next snippet.
+    "Another summary with a dangling [reference link][ref].",
+    ":::{note}\nA colon fence.\n:::",
+    "",
+    "Term\n: Definition",
+]
+
+
+def test_mdit_render_many():
+    """Check if rendering in batch is the same as rendering one by one."""
+    parser = mdit_init(MdParserConfig(enable_extensions={"colon_fence", "deflist"}))
+
+    expected = [mdit_renderer(snippet, parser=parser) for snippet in SNIPPETS]
+    assert mdit_render_many(SNIPPETS, parser=parser) == expected
+    assert "<a" not in expected[1]
+
+
+def test_math_prerendering(tmp_path, monkeypatch):
+    """Check if math is pre-rendered to MathML and cached on disk."""
+    pytest.importorskip("latex2mathml")
+    parser = mdit_init(
+        MdParserConfig(enable_extensions={"dollarmath", "amsmath"}),
+        render_math=create_math_renderer("mathml", cache=Cache("math", tmp_path)),
+    )
+
+    output = mdit_renderer("Inline $x^2$ and\n\n$$\na + b\n$$", parser=parser)
+    assert (
+        '<math xmlns="http://www.w3.org/1998/Math/MathML" display="inline">' in output
+    )
+    assert 'display="block"' in output
+    assert "\\(" not in output
+    assert len(list((tmp_path / "math").glob("*/*"))) == 2
+
+    # A new cache backed by the same directory should not call the engine again.
+    def fail_to_load():
+        def fail(content, display_mode):
+            raise AssertionError("Math should have been read from the cache.")
+
+        return fail
+
+    monkeypatch.setitem(MATH_ENGINES, "mathml", fail_to_load)
+    render_math = create_math_renderer("mathml", cache=Cache("math", tmp_path))
+    assert "<math" in render_math("x^2", {"display_mode": False})
+
+
+def test_math_prerendering_failure(tmp_path, monkeypatch):
+    """Check if math falls back to MathJax without caching the fallback."""
+    calls = []
+
+    def load_engine():
+        def convert(content, display_mode):
+            calls.append(content)
+            if len(calls) == 1:
+                raise ValueError("Unsupported command")
+            return "<math></math>"
+
+        return convert
+
+    monkeypatch.setitem(MATH_ENGINES, "mathml", load_engine)
+    render_math = create_math_renderer("mathml", cache=Cache("math", tmp_path))
+
+    assert render_math("x^2", {"display_mode": False}) == "\\( x^2 \\)"
+    assert not (tmp_path / "math").exists()
+    assert render_math("x^2", {"display_mode": False}) == "<math></math>"
+    assert len(calls) == 2
+
+
+def test_math_prerendering_unknown_engine():
+    """Check if an unknown math engine is reported."""
+    with pytest.raises(ValueError, match="Unknown math pre-rendering engine"):
+        create_math_renderer("does_not_exist")
+
+
+def test_doctree_cache(tmp_path, monkeypatch):
+    """Check if only the writer runs when writer settings change."""
+    parser = _docutils_renderer.Parser()
+    content = "# One\n\nSome *text*.\n\n# Two\n\nMore."
+    conf = {"initial_header_level": 2}
+
+    expected = docutils_renderer(content, conf, parser)
+    doctree_cache = Cache("doctree", tmp_path)
+    env = {}
+    assert docutils_renderer(content, conf, parser, env, doctree_cache) == expected
+    assert env["doctree"].children
+
+    def fail_to_parse(*args):
+        raise AssertionError("The document tree should have been read from the cache.")
+
+    monkeypatch.setattr(_docutils_renderer, "parse_doctree", fail_to_parse)
+    # Cached document trees are reused from disk and with other writer settings.
+    doctree_cache = Cache("doctree", tmp_path)
+    assert docutils_renderer(content, conf, parser, None, doctree_cache) == expected
+    output = docutils_renderer(
+        content, {"initial_header_level": 3}, parser, None, doctree_cache
+    )
+    assert "<h3>One</h3>" in output
+
+    # Parser settings are part of the key.
+    with pytest.raises(AssertionError):
+        docutils_renderer(
+            content, conf | {"myst_heading_anchors": 2}, parser, None, doctree_cache
+        )
+
+
+def test_highlight(tmp_path):
+    """Check if both renderers highlight code alike, with a shared cache."""
+    content = "```python\nprint('<hello>')\n```\n\n```unknown\nplain\n```"
+    highlighter = Highlighter(Cache("highlight", tmp_path))
+
+    parser = mdit_init(MdParserConfig(), highlight=highlighter.highlight)
+    output = mdit_renderer(content, parser=parser)
+    assert '<span class="nb">print</span>' in output
+    assert "&lt;hello&gt;" in output
+    assert '<pre><code class="language-unknown">plain\n</code></pre>' in output
+    assert len(list((tmp_path / "highlight").glob("*/*"))) == 1
+
+    python_fence, python_block = content.split("\n\n")[0], output.split("\n<pre>")[0]
+    parser = _docutils_renderer.Parser()
+    output = docutils_renderer(python_fence, {}, parser, highlighter=highlighter)
+    assert output == python_block
+    assert len(list((tmp_path / "highlight").glob("*/*"))) == 1
+    # The lexers of Docutils are only replaced while the document is parsed.
+    assert base.Lexer is body.Lexer is Lexer
+
+
+def test_highlight_tokennames():
+    """Check if markdown-it code blocks get the configured class style."""
+    highlighter = Highlighter(tokennames="long")
+    assert '<span class="name builtin">print</span>' in highlighter.highlight(
+        "print()", "python"
+    )
+
+
+def test_minify_html():
+    """Check if only the insignificant whitespace is removed."""
+    html = """<section id="title">
+ <h1>
+  Title
+  <a class="headerlink" href="#title" title="a > b">
+   ¶
+  </a>
+ </h1>
+ <p>
+  Some <em>emphasis</em>,<br/>  then
+  <code>  inline  code </code> .
+ </p>
+ <!-- PELICAN_END_SUMMARY -->
+ <pre><code>def f():
+    return  1
+</code></pre>
+ <textarea>  kept </textarea>
+</section>
+"""
+    assert minify_html(html) == (
+        '<section id="title"><h1>Title '
+        '<a class="headerlink" href="#title" title="a > b"> ¶ </a></h1>'
+        "<p>Some <em>emphasis</em>,<br/>then <code>  inline  code </code> .</p>"
+        "<!-- PELICAN_END_SUMMARY -->"
+        "<pre><code>def f():\n    return  1\n</code></pre>"
+        "<textarea>  kept </textarea></section>"
+    )
+    assert minify_html(minify_html(html)) == minify_html(html)
+    # No-break spaces are not whitespace in HTML.
+    assert minify_html("<p>10\xa0km \xa0</p>") == "<p>10\xa0km \xa0</p>"
+    # A "<" in a script or a style does not start a tag.
+    html = "<script>if (a<b) {\n  f();\n}</script>\n<p>\n  After  <b>it</b>\n</p>"
+    assert minify_html(html) == (
+        "<script>if (a<b) {\n  f();\n}</script><p>After <b>it</b></p>"
+    )
+    html = "<style>\n  a<b { x: 1 }\n</STYLE >\n<p> After </p>"
+    assert minify_html(html) == "<style>\n  a<b { x: 1 }\n</STYLE ><p>After</p>"
+
+
+def test_sphinx_conf_not_modified(tmp_path, monkeypatch):
+    """Check if rendering with a bibliography leaves the configuration untouched."""
+
+    def build_sphinx_project(tempdir):
+        (tempdir / "_build").mkdir()
+        (tempdir / "_build" / "index.html").write_text(
+            '<div class="body"><p>Output</p></div>'
+        )
+
+    monkeypatch.setattr(_sphinx_renderer, "build_sphinx_project", build_sphinx_project)
+    bib_file = tmp_path / "references.bib"
+    bib_file.write_text("")
+    conf = {"extensions": {"myst_parser"}, "bibtex_bibfiles": []}
+
+    for _ in range(2):
+        assert "Output" in sphinx_renderer("Content", conf, bib_files=[bib_file])
+    assert conf == {"extensions": {"myst_parser"}, "bibtex_bibfiles": []}
+
+
+def test_sphinx_config_overlays(tmp_path, monkeypatch):
+    """Check if the Sphinx project of each cited post only loads its bibliography."""
+    conf_sizes = []
+
+    def build_sphinx_project(tempdir):
+        conf_sizes.append(len((tempdir / "conf.py").read_text()))
+        (tempdir / "_build").mkdir()
+        (tempdir / "_build" / "index.html").write_text('<div class="body"></div>')
+
+    monkeypatch.setattr(_sphinx_renderer, "build_sphinx_project", build_sphinx_project)
+    reader = MySTReader(get_settings(MYST_FORCE_SPHINX=True))
+    fingerprint = reader.sphinx_config.fingerprint
+
+    for index in range(20):
+        source_path = tmp_path / f"post{index:02}.md"
+        source_path.write_text("---\ntitle: Post\n---\nSee {cite}`key`.\n")
+        (tmp_path / f"post{index:02}.bib").write_text("")
+        reader.read(source_path)
+
+    assert conf_sizes == conf_sizes[:1] * 20
+    assert list(reader.sphinx_config.base["bibtex_bibfiles"]) == []
+    assert SphinxConfig(reader.sphinx_settings).fingerprint == fingerprint
+
+
+def test_broken_sphinx_worker_pool(tmp_path):
+    """Check if a Sphinx render is retried in a new pool when a worker dies."""
+    reader = MySTReader(get_settings(MYST_SPHINX_WORKERS=1, MYST_FORCE_SPHINX=True))
+    source_path = tmp_path / "post.md"
+    source_path.write_text("---\ntitle: Post\n---\nRendered by a worker.\n")
+
+    pool = reader.sphinx_worker_pool
+    os.kill(pool.submit(os.getpid).result(), signal.SIGKILL)
+    assert "Rendered by a worker." in reader.read(source_path)[0]
+    assert reader.sphinx_worker_pool is not pool
+
+    pool = reader.sphinx_worker_pool
+    os.kill(pool.submit(os.getpid).result(), signal.SIGKILL)
+    output = asyncio.run(
+        sphinx_renderer_async("Rendered again.", reader.sphinx_config, worker_pool=pool)
+    )
+    assert "Rendered again." in output
+    assert reader.sphinx_worker_pool is not pool
+
+
+def test_nested_bibliographies(tmp_path, monkeypatch):
+    """Check if bibliographies with the same name in subdirectories are all used."""
+    bibliographies = []
+
+    def build_sphinx_project(tempdir):
+        bibliographies.append(
+            sorted(path.read_text() for path in tempdir.glob("*.bib"))
+        )
+        (tempdir / "_build").mkdir()
+        (tempdir / "_build" / "index.html").write_text('<div class="body"></div>')
+
+    monkeypatch.setattr(_sphinx_renderer, "build_sphinx_project", build_sphinx_project)
+    source_path = tmp_path / "post.md"
+    source_path.write_text("---\ntitle: Post\n---\nSee {cite}`key`.\n")
+    (tmp_path / "post.bib").write_text("first")
+    (tmp_path / "references").mkdir()
+    (tmp_path / "references" / "post.bib").write_text("second")
+
+    MySTReader(get_settings(MYST_FORCE_SPHINX=True)).read(source_path)
+    assert bibliographies == [["first", "second"]]
+
+
+IMAGE_HEADERS = {
+    "image.png": b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    + struct.pack(">II", 640, 480)
+    + b"\x08\x02\x00\x00\x00",
+    "image.gif": b"GIF89a" + struct.pack("<HH", 320, 200) + b"\x00" * 8,
+    "image.jpg": b"\xff\xd8\xff\xe0"
+    + struct.pack(">H", 16)
+    + b"JFIF\x00".ljust(14, b"\x00")
+    + b"\xff\xc0"
+    + struct.pack(">HBHH", 17, 8, 600, 800)
+    + b"\x00" * 10,
+    # Rotated by a quarter turn with the Exif orientation 6.
+    "image-rotated.jpg": b"\xff\xd8\xff\xe1"
+    + struct.pack(">H", 34)
+    + b"Exif\x00\x00II*\x00"
+    + struct.pack("<IHHHIHHI", 8, 1, 0x0112, 3, 1, 6, 0, 0)
+    + b"\xff\xc0"
+    + struct.pack(">HBHH", 17, 8, 600, 800)
+    + b"\x00" * 10,
+    "image.webp": b"RIFF\x00\x00\x00\x00WEBPVP8X"
+    + b"\x00" * 8
+    + (1023).to_bytes(3, "little")
+    + (767).to_bytes(3, "little"),
+}
+
+
+def test_read_image_size(tmp_path):
+    """Check if the size of images is read from their header."""
+    for name, header in IMAGE_HEADERS.items():
+        (tmp_path / name).write_bytes(header)
+
+    assert read_image_size(tmp_path / "image.png") == (640, 480)
+    assert read_image_size(tmp_path / "image.gif") == (320, 200)
+    assert read_image_size(tmp_path / "image.jpg") == (800, 600)
+    assert read_image_size(tmp_path / "image-rotated.jpg") == (600, 800)
+    assert read_image_size(tmp_path / "image.webp") == (1024, 768)
+    assert read_image_size(tmp_path / "missing.png") is None
+
+
+def test_image_attributes(tmp_path, monkeypatch):
+    """Check if MDIT images get their size, cached by path and modification time."""
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "image.png").write_bytes(IMAGE_HEADERS["image.png"])
+    image_sizes = ImageSizes(tmp_path)
+    parser = mdit_init(MdParserConfig(), image_sizes=image_sizes)
+    content = (
+        "![Static]({static}/images/image.png)\n\n"
+        "![Remote](https://example.com/image.png)\n\n"
+        "```{image} {attach}images/image.png\n:alt: Directive\n```"
+    )
+    env = {"source_path": str(tmp_path / "post.md")}
+
+    output = mdit_renderer(content, parser=parser, env=env)
+    assert output.count('width="640" height="480"') == 2
+    assert output.count('loading="lazy" decoding="async"') == 3
+
+    calls = []
+    monkeypatch.setattr(
+        _images, "read_image_size", lambda path: calls.append(path) or (1, 1)
+    )
+    assert mdit_renderer(content, parser=parser, env=env.copy()) == output
+    assert not calls
+
+
+@pytest.mark.parametrize("setting", ["MYST_INCREMENTAL", "MYST_RENDER_CACHE"])
+def test_image_dependencies(setting, tmp_path, monkeypatch):
+    """Check if documents get the new size of an image replaced between builds."""
+    monkeypatch.setattr(myst_reader, "_dependency_cache", myst_reader.DependencyCache())
+    settings = get_settings(
+        PATH=str(tmp_path),
+        MYST_FORCE_MDIT=True,
+        MYST_IMAGE_ATTRIBUTES=True,
+        MYST_CACHE_PATH=str(tmp_path / "cache"),
+        **{setting: True},
+    )
+    image_path = tmp_path / "image.png"
+    image_path.write_bytes(IMAGE_HEADERS["image.png"])
+    source_path = tmp_path / "post.md"
+    source_path.write_text("---\ntitle: Post\n---\n![Image]({static}/image.png)\n")
+
+    output, _ = MySTReader(settings).read(source_path)
+    assert 'width="640" height="480"' in output
+
+    image_path.write_bytes(
+        IMAGE_HEADERS["image.png"].replace(
+            struct.pack(">II", 640, 480), struct.pack(">II", 320, 240)
+        )
+    )
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    output, _ = MySTReader(settings).read(source_path)
+    assert 'width="320" height="240"' in output
+
+
+PRUNING_CONTENTS = {
+    **{
+        path.stem: path.read_text()
+        for path in (Path(__file__).parent / "test_content").glob("valid_*.md")
+        if "citations" not in path.name
+    },
+    "prose": "---\ntitle: Prose\n---\nJust some prose, without any markup.\n",
+    "markup": (
+        "---\ntitle: Markup\n---\n(target)=\n## Heading\n\n| a | b |\n|---|---|\n"
+        "| 1 | 2 |\n\n> Quote with a [link](#target), `code` and a footnote[^1].\n\n"
+        "[^1]: The footnote.\n\n% A comment\n\n+++\n\n***\n\n"
+        "Term\n: Definition\n\n:::{note}\nA *note*.\n:::\n\n    indented code\n"
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(PRUNING_CONTENTS))
+def test_prune_rules(name):
+    """Check if pruning the rules of the MDIT renderer does not change the output."""
+    settings = {
+        "MYST_FORCE_MDIT": True,
+        "MYST_TOC": True,
+        "MYST_LINKS": True,
+        "MYST_MDIT_SETTINGS": {"enable_extensions": {"colon_fence", "deflist"}},
+    }
+    reader = MySTReader(get_settings(**settings))
+    pruned_reader = MySTReader(get_settings(MYST_PRUNE_RULES=True, **settings))
+
+    def render(reader):
+        try:
+            return reader.render(PRUNING_CONTENTS[name])
+        except MystReaderContentError as err:
+            return str(err)
+
+    assert render(pruned_reader) == render(reader)
+
+
+def test_unused_rules():
+    rules = {"table", "fence", "myst_role", "emphasis", "paragraph"}
+    assert unused_rules("Some *prose*.", rules) == {"table", "fence", "myst_role"}
+    assert unused_rules("{math}`x` | y", rules) == {"fence", "emphasis"}
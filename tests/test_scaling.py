@@ -0,0 +1,98 @@
+"""Scaling tests of myst-reader plugin on synthetic content trees.
+
+These are deselected by default. Run them with ``nox -s scaling`` or
+``pytest -m scaling -s``. The numbers of documents are set by the
+``MYST_SCALING_SIZES`` environment variable, e.g. ``100,1000,10000,100000``.
+Sphinx renders a twentieth of these, since it is much slower.
+
+The time and the memory retained per document must stay nearly flat as the
+number of documents grows, which reveals superlinear code paths.
+"""
+
+import gc
+import os
+import time
+import tracemalloc
+
+import pytest
+from corpus import generate_corpus
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.tests.support import get_settings
+
+pytestmark = pytest.mark.scaling
+
+SIZES = [
+    int(size) for size in os.environ.get("MYST_SCALING_SIZES", "100,400").split(",")
+]
+# Tolerance on the time and memory per document, between the smallest and the
+# largest trees.
+MAX_RATIO = 1.5
+# Memory which may be retained per document besides, by bounded caches for instance.
+RETAINED_BUDGET_PER_DOCUMENT = 1024  # bytes
+NB_WARM_UP = 10
+
+
+def _measure(reader, paths) -> tuple[float, int]:
+    """Return the time and memory retained per document to read all ``paths``."""
+    for path in paths[:NB_WARM_UP]:
+        reader.read(str(path))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        for path in paths:
+            reader.read(str(path))
+        duration = time.perf_counter() - start
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return duration / len(paths), retained // len(paths)
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT", "SPHINX"])
+def test_scaling(renderer, tmp_path_factory):
+    """Check if reading documents scales linearly with their number."""
+    if renderer == "SPHINX":
+        # Cited documents select the Sphinx renderer, which builds them in a warm
+        # worker. Each one has two bibliographies, in a directory and a subdirectory.
+        sizes = [max(size // 20, NB_WARM_UP) for size in SIZES]
+        corpus_settings = {"citation_ratio": 1.0, "bib_files": 2}
+        settings = {"MYST_SPHINX_WORKERS": 1}
+    else:
+        # Cited documents are forced to the other renderers too, which still walk
+        # the tree to find their bibliographies. Citations are then unknown roles
+        # and directives.
+        sizes = SIZES
+        corpus_settings = {"citation_ratio": 0.2}
+        settings = {f"MYST_FORCE_{renderer}": True}
+        if renderer == "DOCUTILS":
+            settings["MYST_DOCUTILS_SETTINGS"] = {
+                "myst_suppress_warnings": [
+                    "myst.header",
+                    "myst.role_unknown",
+                    "myst.directive_unknown",
+                ]
+            }
+
+    results = []
+    for size in sizes:
+        content_dir = tmp_path_factory.mktemp(f"corpus{size}")
+        paths = generate_corpus(content_dir, size, **corpus_settings)
+        reader = MySTReader(get_settings(PATH=str(content_dir), **settings))
+        duration, retained = _measure(reader, paths)
+        print(
+            f"\n{renderer} {size:>7} documents: {1000 * duration:8.2f} ms and "
+            f"{retained / 1024:8.2f} KiB retained per document"
+        )
+        results.append((duration, retained))
+
+    (first_duration, first_retained), (last_duration, last_retained) = (
+        results[0],
+        results[-1],
+    )
+    assert last_duration < MAX_RATIO * first_duration
+    assert last_retained < MAX_RATIO * first_retained + RETAINED_BUDGET_PER_DOCUMENT
@@ -0,0 +1,99 @@
+"""Tests of the search text extracted by myst-reader plugin."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.plugins.myst_reader._search import write_search_index
+from pelican.tests.support import get_settings
+
+CONTENT = """\
+---
+title: "Search"
+---
+An *introduction*
+on two lines.
+
+## Installation
+
+Run:
+
+```sh
+pip install package
+```
+
+### Requirements
+
+- Python
+- Pelican
+
+## Usage
+
+The end.
+"""
+
+EXPECTED_SECTIONS = [
+    {"level": 0, "title": "", "id": "", "text": "An introduction on two lines."},
+    {
+        "level": 2,
+        "title": "Installation",
+        "id": "installation",
+        "text": "Run:\npip install package",
+    },
+    {
+        "level": 3,
+        "title": "Requirements",
+        "id": "requirements",
+        "text": "Python\nPelican",
+    },
+    {"level": 2, "title": "Usage", "id": "usage", "text": "The end."},
+]
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT", "SPHINX"])
+def test_sections(renderer, tmp_path):
+    """Check if the text of the sections matches the anchors of the output."""
+    source_path = tmp_path / "search.md"
+    source_path.write_text(CONTENT)
+    settings = get_settings(MYST_SEARCH=True, **{f"MYST_FORCE_{renderer}": True})
+
+    output, metadata = MySTReader(settings).read(source_path)
+
+    assert metadata["sections"] == EXPECTED_SECTIONS
+    assert metadata["plain_text"].startswith(
+        "An introduction on two lines.\nInstallation\nRun:\n"
+    )
+    for heading_id in ("installation", "requirements", "usage"):
+        assert f'id="{heading_id}"' in output
+
+
+def test_search_index(tmp_path):
+    """Check if the search index lists the sections of MyST documents."""
+    source_path = tmp_path / "search.md"
+    source_path.write_text(CONTENT)
+    settings = get_settings(MYST_SEARCH_INDEX="search/index.json")
+    _, metadata = MySTReader(settings).read(source_path)
+
+    generators = [
+        SimpleNamespace(
+            settings=settings,
+            output_path=str(tmp_path / "output"),
+            articles=[
+                SimpleNamespace(url="search.html", title="Search", metadata=metadata),
+                SimpleNamespace(url="other.html", title="Other", metadata={}),
+            ],
+        ),
+        SimpleNamespace(settings=settings, output_path=str(tmp_path / "output")),
+    ]
+    write_search_index(generators)
+
+    index = json.loads((tmp_path / "output" / "search" / "index.json").read_text())
+    (document,) = index["documents"]
+    assert document["url"] == "search.html"
+    assert document["sections"][1] == {
+        "id": "installation",
+        "title": "Installation",
+        "text": "Run:\npip install package",
+    }
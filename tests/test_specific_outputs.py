@@ -83,6 +83,19 @@ class TestReadingTimeAndSummary(unittest.TestCase):
             str(metadata["summary"]),
         )
 
+    def test_read_metadata(self):
+        """Check if reading only the front-matter gives the same metadata."""
+        settings = get_settings(
+            MYST_EXTENSIONS=MYST_EXTENSIONS,
+            FORMATTED_FIELDS=FORMATTED_FIELDS,
+        )
+
+        myst_reader = MySTReader(settings)
+        source_path = TEST_CONTENT_PATH / "valid_content_citations.md"
+        _, metadata = myst_reader.read(source_path)
+
+        self.assertEqual(metadata, myst_reader.read_metadata(source_path))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+"""Tests of the concurrent use of myst-reader plugin."""
+
+from pathlib import Path
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.tests.support import get_settings
+
+TEST_CONTENT_PATH = Path(__file__).parent.resolve() / "test_content"
+SOURCE_PATHS = [
+    TEST_CONTENT_PATH / f"{name}.md"
+    for name in (
+        "valid_content_minimal",
+        "valid_content_images",
+        "valid_content_comments",
+        "reading_time_content",
+    )
+]
+CITATIONS_PATH = TEST_CONTENT_PATH / "valid_content_citations.md"
+
+
+@pytest.mark.parametrize(
+    "renderer, settings",
+    [
+        ("DOCUTILS", {}),
+        ("MDIT", {}),
+        ("SPHINX", {"MYST_SPHINX_WORKERS": 2}),
+    ],
+    ids=["DOCUTILS", "MDIT", "SPHINX"],
+)
+def test_read_many(renderer, settings):
+    """Check if reading files in threads gives the same results as one by one."""
+    myst_reader = MySTReader(
+        get_settings(**{f"MYST_FORCE_{renderer}": True}, **settings)
+    )
+    source_paths = SOURCE_PATHS
+    if renderer == "SPHINX":
+        # Posts with and without a bibliography share the Sphinx configuration.
+        source_paths = [*source_paths, CITATIONS_PATH]
+    source_paths = source_paths * 4
+
+    expected = [myst_reader.read(path) for path in source_paths]
+    assert myst_reader.read_many(source_paths, max_workers=8) == expected
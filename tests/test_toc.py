@@ -0,0 +1,70 @@
+"""Tests of the table of contents created by myst-reader plugin."""
+
+import pytest
+
+from pelican.plugins.myst_reader import MySTReader
+from pelican.tests.support import get_settings
+
+CONTENT = """\
+---
+title: "Table of contents"
+---
+## Introduction
+
+Some text.
+
+### Details with *emphasis*
+
+More text.
+
+## Conclusion
+
+Final text.
+"""
+
+EXPECTED_TOC_TREE = [
+    {
+        "level": 2,
+        "text": "Introduction",
+        "id": "introduction",
+        "children": [
+            {
+                "level": 3,
+                "text": "Details with emphasis",
+                "id": "details-with-emphasis",
+                "children": [],
+            }
+        ],
+    },
+    {"level": 2, "text": "Conclusion", "id": "conclusion", "children": []},
+]
+
+
+@pytest.mark.parametrize("renderer", ["DOCUTILS", "MDIT", "SPHINX"])
+def test_toc(renderer, tmp_path):
+    """Check if the table of contents matches the anchors of the output."""
+    source_path = tmp_path / "toc.md"
+    source_path.write_text(CONTENT)
+    settings = get_settings(MYST_TOC=True, **{f"MYST_FORCE_{renderer}": True})
+
+    output, metadata = MySTReader(settings).read(source_path)
+
+    assert EXPECTED_TOC_TREE == metadata["toc_tree"]
+    assert metadata["toc"] == (
+        '<ul><li><a href="#introduction">Introduction</a>'
+        '<ul><li><a href="#details-with-emphasis">Details with emphasis</a></li></ul>'
+        '</li><li><a href="#conclusion">Conclusion</a></li></ul>'
+    )
+    for heading_id in ("introduction", "details-with-emphasis", "conclusion"):
+        assert f'id="{heading_id}"' in output
+
+
+def test_no_toc(tmp_path):
+    """Check if there is no table of contents by default."""
+    source_path = tmp_path / "toc.md"
+    source_path.write_text(CONTENT)
+
+    output, metadata = MySTReader(get_settings()).read(source_path)
+
+    assert "toc" not in metadata
+    assert 'id="introduction"' not in output